@@ -0,0 +1,38 @@
+"""Add direct_uploads table recording presigned uploads until they are completed
+
+Revision ID: 2b8d4f6a0e19
+Revises: 9c3f5a1e7d24
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b8d4f6a0e19'
+down_revision = '9c3f5a1e7d24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'direct_uploads',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('extension', sa.String(length=16), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_direct_uploads_user_id'), 'direct_uploads', ['user_id'], unique=False)
+    op.create_index(op.f('ix_direct_uploads_expires_at'), 'direct_uploads', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_direct_uploads_expires_at'), table_name='direct_uploads')
+    op.drop_index(op.f('ix_direct_uploads_user_id'), table_name='direct_uploads')
+    op.drop_table('direct_uploads')
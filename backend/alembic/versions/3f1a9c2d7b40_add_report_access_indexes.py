@@ -0,0 +1,49 @@
+"""Add foreign-key and access-path indexes
+
+Revision ID: 3f1a9c2d7b40
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c2d7b40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns) matching the query shapes used by the v1 endpoints
+INDEXES = [
+    ("ix_reports_user_id_created_at", "reports", ["user_id", "created_at"]),
+    ("ix_photos_report_id_sequence_order", "photos", ["report_id", "sequence_order"]),
+    ("ix_comparables_report_id_sale_date", "comparables", ["report_id", "sale_date"]),
+    ("ix_properties_report_id", "properties", ["report_id"]),
+    ("ix_valuations_report_id", "valuations", ["report_id"]),
+    ("ix_legal_aspects_report_id", "legal_aspects", ["report_id"]),
+    ("ix_applicants_report_id", "applicants", ["report_id"]),
+    ("ix_valuer_profiles_user_id", "valuer_profiles", ["user_id"]),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY avoids locking live tables on Postgres; it cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns,
+                if_not_exists=True,
+                postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True
+            )
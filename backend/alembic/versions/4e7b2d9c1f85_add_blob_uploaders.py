@@ -0,0 +1,36 @@
+"""Add blob_uploaders table recording who uploaded each blob
+
+Revision ID: 4e7b2d9c1f85
+Revises: b91e5d3a7c48
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e7b2d9c1f85'
+down_revision = 'b91e5d3a7c48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing blobs get no rows: their owners still reach them through the
+    # photos and reports that reference them
+    op.create_table(
+        'blob_uploaders',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.ForeignKeyConstraint(['sha256'], ['blobs.sha256'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('sha256', 'user_id')
+    )
+    op.create_index(op.f('ix_blob_uploaders_user_id'), 'blob_uploaders', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_blob_uploaders_user_id'), table_name='blob_uploaders')
+    op.drop_table('blob_uploaders')
@@ -0,0 +1,24 @@
+"""Add derivatives column to photos
+
+Revision ID: 7a4c2e9f1b36
+Revises: 0d6f3e8b1a27
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4c2e9f1b36'
+down_revision = '0d6f3e8b1a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('photos', sa.Column('derivatives', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('photos', 'derivatives')
@@ -0,0 +1,24 @@
+"""Add completing_at to upload_sessions for claiming a session while it is completed
+
+Revision ID: 9c3f5a1e7d24
+Revises: 4e7b2d9c1f85
+Create Date: 2026-10-17 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3f5a1e7d24'
+down_revision = '4e7b2d9c1f85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('upload_sessions', sa.Column('completing_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('upload_sessions', 'completing_at')
@@ -0,0 +1,36 @@
+"""Add blobs table for content-addressed upload storage
+
+Revision ID: e5a93b07c2d4
+Revises: c47d2a9e6f18
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a93b07c2d4'
+down_revision = 'c47d2a9e6f18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('extension', sa.String(length=16), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('content_type', sa.String(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.Column('touched_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index(op.f('ix_blobs_touched_at'), 'blobs', ['touched_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_blobs_touched_at'), table_name='blobs')
+    op.drop_table('blobs')
@@ -3,10 +3,13 @@ from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.auth.user_cache import cache_user, get_cached_user
 from app.core.config import get_settings
 from app.core.database import get_db
+from app.core.revocation import revocation_store
 from app.models.user import User
 from app.schemas.auth import TokenData
 
@@ -14,30 +17,46 @@ settings = get_settings()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    token: str = Depends(oauth2_scheme)
-) -> User:
-    credentials_exception = HTTPException(
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def decode_token(token: str, token_type: str = "access", check_revocation: bool = True) -> dict:
+    """Validate a JWT's signature, expiry, type and revocation; returns its claims."""
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
     except JWTError:
-        raise credentials_exception
-        
-    user = db.query(User).filter(User.email == token_data.email).first()
+        raise credentials_exception()
+    
+    # Tokens issued before refresh tokens existed carry no type and count as access tokens
+    if payload.get("sub") is None or payload.get("type", "access") != token_type:
+        raise credentials_exception()
+    # In-memory lookup only; no database round trip per request
+    if check_revocation and revocation_store.is_revoked(payload.get("jti"), payload.get("fam")):
+        raise credentials_exception()
+    return payload
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+) -> User:
+    token_data = TokenData(email=decode_token(token)["sub"])
+    
+    user = get_cached_user(token_data.email)
     if user is None:
-        raise credentials_exception
+        result = await db.execute(select(User).where(User.email == token_data.email))
+        user = result.scalars().first()
+        if user is None:
+            raise credentials_exception()
+        cache_user(user)
+    # Commits on this request's session mark the user as a recent writer,
+    # which keeps their follow-up reads off the replicas
+    db.info["user_id"] = user.id
     return user
 
 def get_current_active_user(
@@ -1,75 +1,139 @@
-from datetime import timedelta
-from typing import Any
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
 from app.core.database import get_db
-from app.core.security import create_access_token, verify_password, get_password_hash
+from app.core.revocation import revocation_store, revoke
+from app.core.security import (
+    PasswordHasherBusy, create_access_token, create_refresh_token,
+    get_password_hash_async, verify_password_async
+)
 from app.models.user import User
-from app.schemas.auth import Token
+from app.schemas.auth import RefreshRequest, Token
 from app.schemas.user import User as UserSchema, UserCreate
-from app.api.auth.deps import get_current_user
+from app.api.auth.deps import credentials_exception, decode_token, get_current_user
 
 settings = get_settings()
 
 auth_router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def authenticate_user(db: Session, email: str, password: str):
-    user = db.query(User).filter(User.email == email).first()
+hasher_busy_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Too many sign-in requests, please retry shortly",
+    headers={"Retry-After": "1"},
+)
+
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    user = await get_user(db, email=email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
-        return False
+    try:
+        if not await verify_password_async(password, user.hashed_password):
+            return False
+    except PasswordHasherBusy:
+        raise hasher_busy_exception
     return user
 
-def get_user(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+async def get_user(db: AsyncSession, email: str):
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
-def create_user(db: Session, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
+async def create_user(db: AsyncSession, user: UserCreate):
+    try:
+        hashed_password = await get_password_hash_async(user.password)
+    except PasswordHasherBusy:
+        raise hasher_busy_exception
     db_user = User(
         email=user.email,
         full_name=user.full_name,
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
     return db_user
 
+def issue_tokens(user: User, family: Optional[str] = None) -> dict:
+    # A family is one login session; every refresh rotates tokens within it
+    family = family or uuid.uuid4().hex
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        subject=user.email, expires_delta=access_token_expires, family=family
+    )
+    return {
+        "access_token": access_token,
+        "refresh_token": create_refresh_token(subject=user.email, family=family),
+        "token_type": "bearer",
+        "expires_in": int(access_token_expires.total_seconds()),
+        "user": user
+    }
+
+async def revoke_family(db: AsyncSession, family: str):
+    # Outlives every token the family can still have in circulation
+    expires_at = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    try:
+        await revoke(db, family, expires_at)
+    except IntegrityError:
+        # Already revoked
+        await db.rollback()
+
 @auth_router.post("/login", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        subject=user.email, expires_delta=access_token_expires
-    )
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": user
-    }
+    return issue_tokens(user)
+
+@auth_router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    request: RefreshRequest,
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    payload = decode_token(request.refresh_token, token_type="refresh", check_revocation=False)
+    token_id, family = payload.get("jti"), payload.get("fam")
+    if not token_id or not family or revocation_store.is_revoked(family):
+        raise credentials_exception()
+    if revocation_store.is_revoked(token_id):
+        # A refresh token that was already rotated came back: treat it as
+        # stolen and end the whole session
+        await revoke_family(db, family)
+        raise credentials_exception()
+    
+    user = await get_user(db, email=payload["sub"])
+    if not user or not user.is_active:
+        raise credentials_exception()
+    
+    try:
+        # Single use: the primary key rejects a second rotation from any worker
+        await revoke(db, token_id, datetime.fromtimestamp(payload["exp"], timezone.utc))
+    except IntegrityError:
+        await db.rollback()
+        await revoke_family(db, family)
+        raise credentials_exception()
+    
+    return issue_tokens(user, family)
 
 @auth_router.post("/register", response_model=UserSchema)
 async def register_user(
     user: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
     # Check if user already exists
-    existing_user = get_user(db, email=user.email)
+    existing_user = await get_user(db, email=user.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -77,7 +141,7 @@ async def register_user(
         )
     
     # Create new user
-    db_user = create_user(db=db, user=user)
+    db_user = await create_user(db=db, user=user)
     return db_user
 
 @auth_router.get("/me", response_model=UserSchema)
@@ -87,7 +151,17 @@ async def get_current_user_info(
     return current_user
 
 @auth_router.post("/logout")
-async def logout():
-    # Since JWT tokens are stateless, logout is handled client-side
-    # In production, you might want to implement token blacklisting
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    payload = decode_token(token)
+    # Revoking the family logs out the access token and its refresh token together
+    if payload.get("fam"):
+        await revoke_family(db, payload["fam"])
+    elif payload.get("jti"):
+        try:
+            await revoke(db, payload["jti"], datetime.fromtimestamp(payload["exp"], timezone.utc))
+        except IntegrityError:
+            await db.rollback()
     return {"message": "Successfully logged out"}
\ No newline at end of file
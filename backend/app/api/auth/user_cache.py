@@ -0,0 +1,83 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.models.user import User
+
+settings = get_settings()
+
+# Postgres NOTIFY channel used to drop cache entries in every worker
+INVALIDATION_CHANNEL = "user_cache_invalidate"
+PENDING_KEY = "invalidated_user_emails"
+
+# Column values of authenticated users keyed by token subject (email)
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+def cache_user(user: User) -> None:
+    user_cache.set(user.email, {column.key: getattr(user, column.key) for column in User.__table__.columns})
+
+def get_cached_user(email: str) -> Optional[User]:
+    values = user_cache.get(email)
+    if values is None:
+        return None
+    # A fresh detached instance per request, so nothing mutates the shared entry
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+def invalidate_user(email: str) -> None:
+    """Drop a cached user. Call after changing users outside the ORM (bulk UPDATE, raw SQL)."""
+    user_cache.pop(email)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _queue_user_invalidation(mapper, connection, target: User) -> None:
+    emails = {target.email, *inspect(target).attrs.email.history.deleted}
+    emails.discard(None)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_KEY, set()).update(emails)
+    if connection.dialect.name == "postgresql":
+        # NOTIFY is transactional: other workers only hear about committed changes
+        for email in emails:
+            connection.execute(
+                text("SELECT pg_notify(:channel, :email)"),
+                {"channel": INVALIDATION_CHANNEL, "email": email}
+            )
+
+@event.listens_for(Session, "after_commit")
+def _apply_user_invalidations(session: Session) -> None:
+    for email in session.info.pop(PENDING_KEY, ()):
+        invalidate_user(email)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_invalidations(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
+
+async def listen_for_invalidations(engine: AsyncEngine) -> Optional[Callable[[], Awaitable[None]]]:
+    """
+    Subscribe to invalidations committed by other workers (Postgres only).
+    Returns a coroutine function that closes the listener, or None when there
+    is nothing to listen to.
+    """
+    if engine.dialect.name != "postgresql" or user_cache.maxsize <= 0:
+        return None
+
+    import asyncpg
+
+    # Dedicated connection rather than one held out of the request pool
+    dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+    connection = await asyncpg.connect(dsn)
+
+    def on_notification(_connection: Any, _pid: int, _channel: str, email: str) -> None:
+        invalidate_user(email)
+
+    await connection.add_listener(INVALIDATION_CHANNEL, on_notification)
+    return connection.close
+
+def get_user_cache_stats() -> Dict[str, Any]:
+    return user_cache.stats()
\ No newline at end of file
@@ -0,0 +1,133 @@
+import mimetypes
+import os
+import stat
+from typing import Optional
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import RedirectResponse
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.auth.deps import credentials_exception, get_current_user
+from app.core.config import get_settings
+from app.core.database import get_db
+from app.core.security import verify_path_signature
+from app.services.blob_store import file_accessible, sha256_from_url
+from app.services.file_serving import (
+    FileRangeResponse, RangeNotSatisfiable, content_disposition, parse_range
+)
+from app.services.storage import LocalStorage, get_storage
+
+settings = get_settings()
+
+files_router = APIRouter()
+# Signed URLs carry no header, so a missing token isn't an error by itself
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
+
+# Blobs are content-addressed: a URL never changes meaning, so clients keep them for a year
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+# Pre-dedup uploads can be replaced in place; revalidate with the ETag every time
+MUTABLE_CACHE_CONTROL = "private, no-cache"
+
+def _valid_key(key: str) -> bool:
+    # Dot segments cover traversal as well as .incoming and .sessions
+    return all(part and not part.startswith(".") for part in key.split("/"))
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [value.strip().removeprefix("W/") for value in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+async def _authorize(
+    key: str,
+    expires: Optional[int],
+    signature: Optional[str],
+    token: Optional[str],
+    db: AsyncSession
+) -> None:
+    if verify_path_signature(f"/uploads/{key}", expires, signature):
+        return
+    if token is None:
+        raise credentials_exception()
+    user = await get_current_user(db, token)
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    # Same answer as a missing file, so other users' keys can't be probed
+    if not await file_accessible(db, f"/uploads/{key}", user.id):
+        raise HTTPException(status_code=404, detail="File not found")
+
+@files_router.api_route("/{key:path}", methods=["GET", "HEAD"])
+async def serve_file(
+    key: str,
+    request: Request,
+    expires: Optional[int] = None,
+    signature: Optional[str] = None,
+    filename: Optional[str] = None,
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    """
+    Uploaded files, for a signed URL from /api/v1/upload/blobs/{sha256}/download
+    or a bearer token whose user uploaded or references the file. Supports Range (PDF viewers fetch
+    pages as they render), ETag revalidation and, behind nginx, X-Accel-Redirect.
+    """
+    if not _valid_key(key):
+        raise HTTPException(status_code=404, detail="File not found")
+    await _authorize(key, expires, signature, token, db)
+
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        # Bucket objects are fetched from the bucket directly
+        return RedirectResponse(await storage.download_url(key, filename), status_code=307)
+
+    path = storage.path(key)
+    try:
+        stat_result = await anyio.to_thread.run_sync(os.stat, path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail="File not found")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    sha256 = sha256_from_url(f"/uploads/{key}")
+    if sha256:
+        etag = f'"{sha256}"'
+    else:
+        etag = f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+    # Derivatives are keyed by their source's hash, so they never change either
+    immutable = sha256 is not None or key.startswith("derivatives/")
+    headers = {
+        "etag": etag,
+        "cache-control": IMMUTABLE_CACHE_CONTROL if immutable else MUTABLE_CACHE_CONTROL,
+        "accept-ranges": "bytes",
+        "content-disposition": content_disposition("attachment" if filename else "inline", filename),
+        # User content: never let the browser reinterpret it as something else
+        "x-content-type-options": "nosniff",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+    if settings.FILE_SERVING_MODE == "x-accel":
+        # nginx sends the file (with sendfile and its own Range handling) from an internal location
+        headers["x-accel-redirect"] = settings.X_ACCEL_REDIRECT_PREFIX + key
+        return Response(headers=headers, media_type=media_type)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    # A stale If-Range means the client's partial copy is of other content; send it all
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), stat_result.st_size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{stat_result.st_size}"})
+
+    return FileRangeResponse(
+        path,
+        stat_result,
+        media_type,
+        byte_range=byte_range,
+        headers=headers,
+        send_body=request.method != "HEAD"
+    )
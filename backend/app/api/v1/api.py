@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import reports, properties, valuations, comparables, photos, legal_aspects, valuer_profile, applicants, upload, ocr, ai, maps
+from app.api.v1.endpoints import reports, properties, valuations, comparables, photos, legal_aspects, valuer_profile, applicants, upload, ocr, ai, maps, metrics, jobs
 
 api_router = APIRouter()
 
@@ -15,4 +15,6 @@ api_router.include_router(applicants.router, prefix="/applicants", tags=["Applic
 api_router.include_router(upload.router, prefix="/upload", tags=["File Upload"])
 api_router.include_router(ocr.router, prefix="/ocr", tags=["OCR"])
 api_router.include_router(ai.router, prefix="/ai", tags=["AI Processing"])
-api_router.include_router(maps.router, prefix="/maps", tags=["Maps & Geocoding"])
\ No newline at end of file
+api_router.include_router(maps.router, prefix="/maps", tags=["Maps & Geocoding"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
\ No newline at end of file
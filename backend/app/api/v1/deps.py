@@ -0,0 +1,147 @@
+from datetime import datetime
+from typing import Any, List, Optional, Set, Type
+from uuid import UUID
+
+from fastapi import Depends, HTTPException
+from sqlalchemy import DateTime, Uuid, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.auth.deps import get_current_active_user
+from app.core.database import Base, get_db, get_read_sessionmaker
+from app.models.user import User
+from app.models.report import Report
+
+def parse_report_id(value: Any) -> UUID:
+    if isinstance(value, UUID):
+        return value
+    try:
+        return UUID(str(value))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid report_id")
+
+def coerce_column_values(model: Type[Base], data: dict) -> dict:
+    """
+    Convert raw JSON values into the Python types the model's columns expect.
+    asyncpg (unlike psycopg2) won't cast ISO date strings or UUID strings itself.
+    Keys that aren't mapped columns are dropped.
+    """
+    columns = model.__table__.columns
+    values = {}
+    for field, value in data.items():
+        if field not in columns:
+            continue
+        column_type = columns[field].type
+        try:
+            if isinstance(value, str) and isinstance(column_type, DateTime):
+                value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            elif isinstance(value, str) and isinstance(column_type, Uuid):
+                value = UUID(value)
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"Invalid value for {field}")
+        values[field] = value
+    return values
+
+class ReportChildRepository:
+    """
+    Data access for records that hang off a Report (properties, valuations,
+    comparables, photos, legal aspects, applicants).
+
+    Ownership is folded into the child query itself, and reports verified once
+    are remembered for the rest of the request.
+    """
+
+    def __init__(self, db: AsyncSession, user: User):
+        self.db = db
+        self.user = user
+        self._owned_report_ids: Set[UUID] = set()
+
+    async def ensure_report_owned(self, report_id: Any) -> UUID:
+        report_id = parse_report_id(report_id)
+        if report_id in self._owned_report_ids:
+            return report_id
+
+        owned = await self.db.scalar(
+            select(Report.id).where(Report.id == report_id, Report.user_id == self.user.id)
+        )
+        if owned is None:
+            raise HTTPException(status_code=404, detail="Report not found")
+
+        self._owned_report_ids.add(report_id)
+        return report_id
+
+    async def list_children(self, model: Type[Base], report_id: Any, *order_by, limit: Optional[int] = None) -> List[Any]:
+        report_id = parse_report_id(report_id)
+        # Outer join keeps the report row when it has no children, so a single
+        # query distinguishes "not yours" (no rows) from "empty" (one null child)
+        query = select(Report.id, model)\
+            .outerjoin(model, model.report_id == Report.id)\
+            .where(Report.id == report_id, Report.user_id == self.user.id)\
+            .order_by(*order_by)
+        if limit is not None:
+            query = query.limit(limit)
+
+        rows = (await self.db.execute(query)).all()
+        if not rows:
+            raise HTTPException(status_code=404, detail="Report not found")
+
+        self._owned_report_ids.add(report_id)
+        return [child for _, child in rows if child is not None]
+
+    async def first_child(self, model: Type[Base], report_id: Any) -> Optional[Any]:
+        children = await self.list_children(model, report_id, limit=1)
+        return children[0] if children else None
+
+    async def get_owned(self, model: Type[Base], child_id: UUID, detail: str) -> Any:
+        child = await self.db.scalar(
+            select(model).join(Report).where(
+                model.id == child_id,
+                Report.user_id == self.user.id
+            )
+        )
+        if not child:
+            raise HTTPException(status_code=404, detail=detail)
+
+        self._owned_report_ids.add(child.report_id)
+        return child
+
+    async def create(self, model: Type[Base], data: dict) -> Any:
+        report_id = await self.ensure_report_owned(data.get("report_id"))
+        child = model(**{**coerce_column_values(model, data), "report_id": report_id})
+        self.db.add(child)
+        await self.db.commit()
+        return child
+
+    async def update(self, child: Any, data: dict) -> Any:
+        for field, value in coerce_column_values(type(child), data).items():
+            # report_id is the ownership link; moving a child between reports isn't supported
+            if field not in ("id", "report_id"):
+                setattr(child, field, value)
+        await self.db.commit()
+        return child
+
+    async def delete(self, child: Any) -> None:
+        await self.db.delete(child)
+        await self.db.commit()
+
+def get_report_children(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> ReportChildRepository:
+    return ReportChildRepository(db, current_user)
+
+async def get_read_db(current_user: User = Depends(get_current_active_user)):
+    """
+    Session for read-only handlers: served by a replica unless the user has
+    written recently, in which case the primary keeps their reads consistent.
+    """
+    db = get_read_sessionmaker(current_user.id)()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+def get_report_reader(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+) -> ReportChildRepository:
+    return ReportChildRepository(db, current_user)
@@ -1,30 +1,17 @@
 from typing import Any, List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query
 
-from app.api.auth.deps import get_current_active_user
-from app.core.database import get_db
-from app.models.user import User
+from app.api.v1.deps import ReportChildRepository, get_report_reader
 from app.models.applicant import Applicant
-from app.models.report import Report
+from app.schemas.applicant import Applicant as ApplicantSchema
 
 router = APIRouter()
 
-@router.get("/")
+@router.get("/", response_model=List[ApplicantSchema])
 async def get_applicants(
     report_id: UUID = Query(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    repo: ReportChildRepository = Depends(get_report_reader)
 ) -> List[Any]:
-    report = db.query(Report).filter(
-        Report.id == report_id,
-        Report.user_id == current_user.id
-    ).first()
-    
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    applicants = db.query(Applicant).filter(Applicant.report_id == report_id).all()
-    return applicants
\ No newline at end of file
+    return await repo.list_children(Applicant, report_id)
\ No newline at end of file
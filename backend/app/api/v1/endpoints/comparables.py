@@ -1,91 +1,148 @@
-from typing import Any, List
+from typing import Any, List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 
 from app.api.auth.deps import get_current_active_user
-from app.core.database import get_db
+from app.api.v1.deps import ReportChildRepository, get_report_children, get_report_reader
+from app.api.v1.endpoints.upload import multipart_body
+from app.core.config import get_settings
+from app.core.database import get_read_sessionmaker
 from app.models.user import User
 from app.models.comparable import Comparable
 from app.models.report import Report
+from app.schemas.comparable import Comparable as ComparableSchema
+from app.services.comparable_import import (
+    MAX_REPORTED_ERRORS, SUPPORTED_FORMATS, MultipartFileReader, detect_format, insert_comparables,
+    iter_rows, open_upload, read_batch
+)
+from app.services.export import EXPORT_FORMATS, stream_rows
+from app.services.uploads import MULTIPART_OVERHEAD, PartStart, UploadError, iter_multipart
 
+settings = get_settings()
 router = APIRouter()
 
-@router.post("/")
+@router.post("/", response_model=ComparableSchema)
 async def create_comparable(
     comparable_data: dict,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    repo: ReportChildRepository = Depends(get_report_children)
 ) -> Any:
-    report = db.query(Report).filter(
-        Report.id == comparable_data.get("report_id"),
-        Report.user_id == current_user.id
-    ).first()
-    
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    db_comparable = Comparable(**comparable_data)
-    db.add(db_comparable)
-    db.commit()
-    db.refresh(db_comparable)
-    return db_comparable
+    return await repo.create(Comparable, comparable_data)
 
-@router.get("/")
+@router.get("/", response_model=List[ComparableSchema])
 async def get_comparables(
     report_id: UUID = Query(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    repo: ReportChildRepository = Depends(get_report_reader)
 ) -> List[Any]:
-    report = db.query(Report).filter(
-        Report.id == report_id,
-        Report.user_id == current_user.id
-    ).first()
+    return await repo.list_children(Comparable, report_id, Comparable.sale_date.desc())
+
+@router.get("/export")
+async def export_comparables(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    report_id: Optional[UUID] = Query(None),
+    current_user: User = Depends(get_current_active_user)
+) -> StreamingResponse:
+    columns = [column.name for column in Comparable.__table__.columns]
+    query = select(*Comparable.__table__.columns)\
+        .join(Report, Comparable.report_id == Report.id)\
+        .where(Report.user_id == current_user.id)\
+        .order_by(Comparable.report_id, Comparable.sale_date.desc())
+    if report_id:
+        query = query.where(Comparable.report_id == report_id)
+    
+    return StreamingResponse(
+        stream_rows(query, columns, format, get_read_sessionmaker(current_user.id)),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f"attachment; filename=comparables.{format}"}
+    )
+
+@router.post("/import", openapi_extra=multipart_body("file"))
+async def import_comparables(
+    request: Request,
+    report_id: UUID = Query(...),
+    format: Optional[str] = Query(None),
+    repo: ReportChildRepository = Depends(get_report_children)
+) -> dict:
+    # CSV and NDJSON rows are parsed as the body arrives (XLSX needs the whole
+    # file first) and each batch is committed on its own: if the file breaks off
+    # partway, earlier batches stay and the error says how many rows were inserted
+    report_id = await repo.ensure_report_owned(report_id)
+    
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        if int(content_length) > settings.COMPARABLE_IMPORT_MAX_SIZE + MULTIPART_OVERHEAD:
+            raise HTTPException(status_code=413, detail="File too large")
     
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
+    try:
+        events = iter_multipart(request)
+        part = None
+        async for event in events:
+            if isinstance(event, PartStart) and event.field_name == "file" and event.filename is not None:
+                part = event
+                break
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    if part is None:
+        raise HTTPException(status_code=422, detail="No file uploaded")
     
-    comparables = db.query(Comparable).filter(Comparable.report_id == report_id).all()
-    return comparables
+    format = format or detect_format(part.filename, part.content_type)
+    if format not in SUPPORTED_FORMATS:
+        raise HTTPException(status_code=400, detail="Unsupported file type; upload CSV, XLSX or NDJSON")
+    
+    reader = MultipartFileReader(events, settings.COMPARABLE_IMPORT_MAX_SIZE)
+    try:
+        file = await run_in_threadpool(open_upload, reader, format)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    inserted, failed, errors = 0, 0, []
+    try:
+        rows = iter_rows(file, format)
+        exhausted = False
+        while not exhausted:
+            # Reading, parsing and validation block; keep them off the event loop
+            try:
+                valid, batch_errors, exhausted = await run_in_threadpool(read_batch, rows, report_id)
+            except UploadError as e:
+                raise HTTPException(status_code=e.status_code, detail={"message": e.detail, "inserted": inserted})
+            except Exception as e:
+                raise HTTPException(
+                    status_code=400,
+                    detail={"message": f"Could not parse file: {str(e)}", "inserted": inserted}
+                )
+            
+            if valid:
+                await insert_comparables(repo.db, valid)
+                await repo.db.commit()
+                inserted += len(valid)
+            failed += len(batch_errors)
+            errors.extend(batch_errors[:MAX_REPORTED_ERRORS - len(errors)])
+    finally:
+        file.close()
+    
+    return {
+        "inserted": inserted,
+        "failed": failed,
+        "errors": errors
+    }
 
-@router.put("/{comparable_id}")
+@router.put("/{comparable_id}", response_model=ComparableSchema)
 async def update_comparable(
     comparable_id: UUID,
     comparable_data: dict,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    repo: ReportChildRepository = Depends(get_report_children)
 ) -> Any:
-    comparable = db.query(Comparable).join(Report).filter(
-        Comparable.id == comparable_id,
-        Report.user_id == current_user.id
-    ).first()
-    
-    if not comparable:
-        raise HTTPException(status_code=404, detail="Comparable not found")
-    
-    for field, value in comparable_data.items():
-        if hasattr(comparable, field):
-            setattr(comparable, field, value)
-    
-    db.commit()
-    db.refresh(comparable)
-    return comparable
+    comparable = await repo.get_owned(Comparable, comparable_id, "Comparable not found")
+    return await repo.update(comparable, comparable_data)
 
 @router.delete("/{comparable_id}")
 async def delete_comparable(
     comparable_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    repo: ReportChildRepository = Depends(get_report_children)
 ) -> Any:
-    comparable = db.query(Comparable).join(Report).filter(
-        Comparable.id == comparable_id,
-        Report.user_id == current_user.id
-    ).first()
-    
-    if not comparable:
-        raise HTTPException(status_code=404, detail="Comparable not found")
-    
-    db.delete(comparable)
-    db.commit()
+    comparable = await repo.get_owned(Comparable, comparable_id, "Comparable not found")
+    await repo.delete(comparable)
     return {"message": "Comparable deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,49 @@
+from datetime import timezone
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.auth.deps import get_current_active_user
+from app.core.database import get_db, note_write
+from app.models.job import JobStatus
+from app.models.user import User
+from app.schemas.job import Job as JobSchema
+from app.services.jobs import describe_job, get_job, job_events
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=JobSchema)
+async def get_job_status(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> dict:
+    # The primary, not a replica: clients poll this right after queueing the job
+    job = await get_job(db, job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    # The file was added to the report by a worker, maybe in another process;
+    # hand the client its write time so the next report read skips stale replicas
+    if job.status == JobStatus.SUCCEEDED and job.finished_at:
+        note_write(job.finished_at.replace(tzinfo=job.finished_at.tzinfo or timezone.utc).timestamp())
+    return await describe_job(job)
+
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> StreamingResponse:
+    job = await get_job(db, job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    await db.close()
+    
+    return StreamingResponse(
+        job_events(job.id),
+        media_type="text/event-stream",
+        # No caching, and no buffering by nginx, or events arrive in one lump at the end
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
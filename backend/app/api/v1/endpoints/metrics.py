@@ -0,0 +1,37 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.api.auth.user_cache import get_user_cache_stats
+from app.core.config import get_settings
+from app.core.database import get_pool_stats
+from app.core.revocation import revocation_store
+from app.core.security import get_password_hasher_stats
+
+settings = get_settings()
+
+def require_metrics_token(x_metrics_token: Optional[str] = Header(None)) -> None:
+    # Internals for operators and monitoring, not for signed-in users
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_metrics_token or not hmac.compare_digest(x_metrics_token, settings.METRICS_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid metrics token")
+
+router = APIRouter(dependencies=[Depends(require_metrics_token)])
+
+@router.get("/db-pool")
+async def get_db_pool_metrics() -> dict:
+    return get_pool_stats()
+
+@router.get("/user-cache")
+async def get_user_cache_metrics() -> dict:
+    return get_user_cache_stats()
+
+@router.get("/password-hash")
+async def get_password_hash_metrics() -> dict:
+    return get_password_hasher_stats()
+
+@router.get("/revocations")
+async def get_revocation_metrics() -> dict:
+    return revocation_store.stats()
\ No newline at end of file
@@ -2,67 +2,43 @@ from typing import Any, List
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
 
-from app.api.auth.deps import get_current_active_user
-from app.core.database import get_db
-from app.models.user import User
+from app.api.v1.deps import ReportChildRepository, get_report_children, get_report_reader
 from app.models.photo import Photo
-from app.models.report import Report
+from app.schemas.photo import Photo as PhotoSchema
+from app.services.blob_store import file_accessible
+from app.services.photo_derivatives import schedule_derivatives
 
 router = APIRouter()
 
-@router.post("/")
+@router.post("/", response_model=PhotoSchema)
 async def create_photo(
     photo_data: dict,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    repo: ReportChildRepository = Depends(get_report_children)
 ) -> Any:
-    report = db.query(Report).filter(
-        Report.id == photo_data.get("report_id"),
-        Report.user_id == current_user.id
-    ).first()
-    
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    db_photo = Photo(**photo_data)
-    db.add(db_photo)
-    db.commit()
-    db.refresh(db_photo)
-    return db_photo
+    # Only files the user can already read can be attached; a photo pointing
+    # at someone else's upload would give access to it
+    file_url = photo_data.get("file_url")
+    if isinstance(file_url, str) and file_url.startswith("/uploads/"):
+        if not await file_accessible(repo.db, file_url, repo.user.id):
+            raise HTTPException(status_code=404, detail="File not found")
+    # Derivative URLs are set by the server once rendered
+    photo = await repo.create(Photo, {k: v for k, v in photo_data.items() if k != "derivatives"})
+    schedule_derivatives(photo.file_url)
+    return photo
 
-@router.get("/")
+@router.get("/", response_model=List[PhotoSchema])
 async def get_photos(
     report_id: UUID = Query(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    repo: ReportChildRepository = Depends(get_report_reader)
 ) -> List[Any]:
-    report = db.query(Report).filter(
-        Report.id == report_id,
-        Report.user_id == current_user.id
-    ).first()
-    
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    photos = db.query(Photo).filter(Photo.report_id == report_id).all()
-    return photos
+    return await repo.list_children(Photo, report_id, Photo.sequence_order)
 
 @router.delete("/{photo_id}")
 async def delete_photo(
     photo_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    repo: ReportChildRepository = Depends(get_report_children)
 ) -> Any:
-    photo = db.query(Photo).join(Report).filter(
-        Photo.id == photo_id,
-        Report.user_id == current_user.id
-    ).first()
-    
-    if not photo:
-        raise HTTPException(status_code=404, detail="Photo not found")
-    
-    db.delete(photo)
-    db.commit()
+    photo = await repo.get_owned(Photo, photo_id, "Photo not found")
+    await repo.delete(photo)
     return {"message": "Photo deleted successfully"}
\ No newline at end of file
@@ -1,75 +1,33 @@
 from typing import Any, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query
 
-from app.api.auth.deps import get_current_active_user
-from app.core.database import get_db
-from app.models.user import User
+from app.api.v1.deps import ReportChildRepository, get_report_children, get_report_reader
 from app.models.property import Property
-from app.models.report import Report
+from app.schemas.property import Property as PropertySchema
 
 router = APIRouter()
 
-@router.post("/")
+@router.post("/", response_model=PropertySchema)
 async def create_property(
     property_data: dict,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    repo: ReportChildRepository = Depends(get_report_children)
 ) -> Any:
-    # Verify report belongs to user
-    report = db.query(Report).filter(
-        Report.id == property_data.get("report_id"),
-        Report.user_id == current_user.id
-    ).first()
-    
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    db_property = Property(**property_data)
-    db.add(db_property)
-    db.commit()
-    db.refresh(db_property)
-    return db_property
+    return await repo.create(Property, property_data)
 
-@router.get("/")
+@router.get("/", response_model=Optional[PropertySchema])
 async def get_property(
     report_id: UUID = Query(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    repo: ReportChildRepository = Depends(get_report_reader)
 ) -> Any:
-    # Verify report belongs to user
-    report = db.query(Report).filter(
-        Report.id == report_id,
-        Report.user_id == current_user.id
-    ).first()
-    
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    property = db.query(Property).filter(Property.report_id == report_id).first()
-    return property
+    return await repo.first_child(Property, report_id)
 
-@router.put("/{property_id}")
+@router.put("/{property_id}", response_model=PropertySchema)
 async def update_property(
     property_id: UUID,
     property_data: dict,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    repo: ReportChildRepository = Depends(get_report_children)
 ) -> Any:
-    property = db.query(Property).join(Report).filter(
-        Property.id == property_id,
-        Report.user_id == current_user.id
-    ).first()
-    
-    if not property:
-        raise HTTPException(status_code=404, detail="Property not found")
-    
-    for field, value in property_data.items():
-        if hasattr(property, field):
-            setattr(property, field, value)
-    
-    db.commit()
-    db.refresh(property)
-    return property
\ No newline at end of file
+    property = await repo.get_owned(Property, property_id, "Property not found")
+    return await repo.update(property, property_data)
\ No newline at end of file
@@ -1,49 +1,121 @@
+import json
 from typing import Any, List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Response
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.api.auth.deps import get_current_active_user
-from app.core.database import get_db
+from app.api.v1.deps import get_read_db
+from app.core.database import get_db, get_read_sessionmaker
+from app.core.pagination import decode_cursor, encode_cursor
 from app.models.user import User
 from app.models.report import Report
-from app.schemas.report import Report as ReportSchema, ReportCreate, ReportUpdate
+from app.models.valuation import Valuation
+from app.schemas.job import Job as JobSchema
+from app.schemas.report import Report as ReportSchema, ReportCreate, ReportUpdate, ReportPage, ReportFull
+from app.services.export import EXPORT_FORMATS, stream_rows
+from app.services.jobs import describe_job, enqueue_job
 
 router = APIRouter()
 
-@router.get("/", response_model=dict)
+async def estimate_report_count(db: AsyncSession, user_id: UUID) -> Optional[int]:
+    # Planner row estimate; avoids a full count(*) for users with many reports
+    if db.bind.dialect.name != "postgresql":
+        return None
+    plan = await db.scalar(
+        text("EXPLAIN (FORMAT JSON) SELECT 1 FROM reports WHERE user_id = :user_id"),
+        {"user_id": user_id}
+    )
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+@router.get("/", response_model=ReportPage)
 async def get_reports(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
-    page: int = Query(1, ge=1),
-    limit: int = Query(10, ge=1, le=100)
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+    total: Optional[str] = Query(None, pattern="^(exact|estimated)$")
 ) -> Any:
-    offset = (page - 1) * limit
+    # Keyset pagination on (created_at, id), newest first
+    query = select(Report)\
+        .where(Report.user_id == current_user.id)\
+        .order_by(Report.created_at.desc(), Report.id.desc())\
+        .limit(limit + 1)
+    
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(
+            tuple_(Report.created_at, Report.id) < (cursor_created_at, cursor_id)
+        )
     
-    # Get total count
-    total = db.query(func.count(Report.id)).filter(Report.user_id == current_user.id).scalar()
+    reports = (await db.scalars(query)).all()
+    has_more = len(reports) > limit
+    reports = reports[:limit]
+    next_cursor = encode_cursor(reports[-1].created_at, reports[-1].id) if has_more else None
     
-    # Get reports with pagination
-    reports = db.query(Report)\
-        .filter(Report.user_id == current_user.id)\
-        .offset(offset)\
-        .limit(limit)\
-        .all()
+    count = None
+    is_estimate = False
+    if total == "estimated":
+        count = await estimate_report_count(db, current_user.id)
+        is_estimate = count is not None
+    if total == "exact" or (total == "estimated" and count is None):
+        count = await db.scalar(
+            select(func.count(Report.id)).where(Report.user_id == current_user.id)
+        )
     
     return {
         "items": reports,
-        "total": total,
-        "page": page,
-        "per_page": limit,
-        "pages": (total + limit - 1) // limit
+        "next_cursor": next_cursor,
+        "limit": limit,
+        "total": count,
+        "total_is_estimate": is_estimate
     }
 
+# Valuation figures flattened onto each report row for audit exports
+EXPORT_REPORT_COLUMNS = [
+    "id", "title", "reference_number", "purpose", "status", "bank_name", "bank_branch",
+    "inspection_date", "valuation_date", "report_date", "created_at", "updated_at",
+]
+EXPORT_VALUATION_COLUMNS = [
+    "primary_method", "total_market_value", "forced_sale_value", "insurance_value",
+    "rental_value_monthly", "valuation_fee", "total_fee",
+]
+
+@router.get("/export")
+async def export_reports(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_active_user)
+) -> StreamingResponse:
+    report_columns = [Report.__table__.c[name] for name in EXPORT_REPORT_COLUMNS]
+    valuation_columns = [
+        Valuation.__table__.c[name].label(f"valuation_{name}") for name in EXPORT_VALUATION_COLUMNS
+    ]
+    # One row per valuation; reports without a valuation still appear once
+    query = select(*report_columns, *valuation_columns)\
+        .outerjoin(Valuation, Valuation.report_id == Report.id)\
+        .where(Report.user_id == current_user.id)\
+        .order_by(Report.created_at.desc(), Report.id.desc())
+    columns = EXPORT_REPORT_COLUMNS + [f"valuation_{name}" for name in EXPORT_VALUATION_COLUMNS]
+    
+    return StreamingResponse(
+        stream_rows(query, columns, format, get_read_sessionmaker(current_user.id)),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f"attachment; filename=reports.{format}"}
+    )
+
 @router.post("/", response_model=ReportSchema)
 async def create_report(
     report: ReportCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     db_report = Report(
@@ -51,19 +123,45 @@ async def create_report(
         user_id=current_user.id
     )
     db.add(db_report)
-    db.commit()
-    db.refresh(db_report)
+    await db.commit()
     return db_report
 
 @router.get("/{report_id}", response_model=ReportSchema)
 async def get_report(
     report_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    report = await db.scalar(
+        select(Report).where(Report.id == report_id, Report.user_id == current_user.id)
+    )
+    
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    return report
+
+@router.get("/{report_id}/full", response_model=ReportFull)
+async def get_report_full(
+    report_id: UUID,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
-    report = db.query(Report)\
-        .filter(Report.id == report_id, Report.user_id == current_user.id)\
-        .first()
+    # Properties and valuations are one-per-report in practice, so they ride along
+    # on the report row; the other collections load with one IN query each
+    result = await db.scalars(
+        select(Report)
+        .where(Report.id == report_id, Report.user_id == current_user.id)
+        .options(
+            joinedload(Report.properties),
+            joinedload(Report.valuations),
+            selectinload(Report.comparables),
+            selectinload(Report.photos),
+            selectinload(Report.legal_aspects),
+            selectinload(Report.applicants),
+        )
+    )
+    report = result.unique().first()
     
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
@@ -74,12 +172,12 @@ async def get_report(
 async def update_report(
     report_id: UUID,
     report_update: ReportUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
-    report = db.query(Report)\
-        .filter(Report.id == report_id, Report.user_id == current_user.id)\
-        .first()
+    report = await db.scalar(
+        select(Report).where(Report.id == report_id, Report.user_id == current_user.id)
+    )
     
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
@@ -88,65 +186,50 @@ async def update_report(
     for field, value in update_data.items():
         setattr(report, field, value)
     
-    db.commit()
-    db.refresh(report)
+    await db.commit()
     return report
 
 @router.delete("/{report_id}")
 async def delete_report(
     report_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
-    report = db.query(Report)\
-        .filter(Report.id == report_id, Report.user_id == current_user.id)\
-        .first()
+    report = await db.scalar(
+        select(Report).where(Report.id == report_id, Report.user_id == current_user.id)
+    )
     
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     
-    db.delete(report)
-    db.commit()
+    await db.delete(report)
+    await db.commit()
     return {"message": "Report deleted successfully"}
 
-@router.post("/{report_id}/generate-pdf")
+async def queue_report_file(db: AsyncSession, report_id: UUID, user: User, kind: str) -> dict:
+    owned = await db.scalar(
+        select(Report.id).where(Report.id == report_id, Report.user_id == user.id)
+    )
+    if not owned:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    # Rendering takes seconds with photos; a worker does it and the client
+    # follows /jobs/{id} (or its event stream) for the file
+    job = await enqueue_job(db, user.id, kind, report_id)
+    return await describe_job(job)
+
+@router.post("/{report_id}/generate-pdf", response_model=JobSchema, status_code=202)
 async def generate_report_pdf(
     report_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
-) -> Any:
-    report = db.query(Report)\
-        .filter(Report.id == report_id, Report.user_id == current_user.id)\
-        .first()
-    
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    # TODO: Implement PDF generation logic
-    # For now, return a placeholder response
-    return Response(
-        content=b"PDF generation not yet implemented",
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=report_{report_id}.pdf"}
-    )
+) -> dict:
+    return await queue_report_file(db, report_id, current_user, "report_pdf")
 
-@router.post("/{report_id}/generate-docx")
+@router.post("/{report_id}/generate-docx", response_model=JobSchema, status_code=202)
 async def generate_report_docx(
     report_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
-) -> Any:
-    report = db.query(Report)\
-        .filter(Report.id == report_id, Report.user_id == current_user.id)\
-        .first()
-    
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    # TODO: Implement DOCX generation logic
-    # For now, return a placeholder response
-    return Response(
-        content=b"DOCX generation not yet implemented",
-        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        headers={"Content-Disposition": f"attachment; filename=report_{report_id}.docx"}
-    )
\ No newline at end of file
+) -> dict:
+    return await queue_report_file(db, report_id, current_user, "report_docx")
\ No newline at end of file
@@ -1,79 +1,217 @@
 import os
-import uuid
-from typing import List
+from typing import Any, List, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.auth.deps import get_current_active_user
 from app.models.user import User
+from app.schemas.direct_upload import DirectUploadComplete, DirectUploadCreate
+from app.schemas.upload_session import UploadSession as UploadSessionSchema, UploadSessionCreate
 from app.core.config import get_settings
+from app.core.database import get_db
+from app.services.blob_store import INCOMING_DIR, blob_info, blob_key, find_blob
+from app.services.direct_uploads import complete_direct_upload, start_direct_upload
+from app.services.storage import get_storage
+from app.services.uploads import UploadError, receive_uploads
+from app.services.upload_sessions import (
+    SESSIONS_DIR, abort_session, complete_session, create_session, get_session, write_chunk
+)
 
 settings = get_settings()
 router = APIRouter()
 
 # Create upload directory if it doesn't exist
-os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+os.makedirs(INCOMING_DIR, exist_ok=True)
+os.makedirs(SESSIONS_DIR, exist_ok=True)
 
-def save_upload_file(upload_file: UploadFile) -> dict:
-    # Generate unique filename
-    file_extension = os.path.splitext(upload_file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        content = upload_file.file.read()
-        buffer.write(content)
-    
+MAX_FILES_PER_REQUEST = 10
+
+def multipart_body(field_name: str, multiple: bool = False) -> dict:
+    # The body is streamed from the request rather than declared with File(...),
+    # so describe it for the OpenAPI docs by hand
+    file_schema = {"type": "string", "format": "binary"}
     return {
-        "file_url": f"/uploads/{unique_filename}",
-        "filename": upload_file.filename,
-        "file_size": len(content),
-        "file_type": upload_file.content_type
+        "requestBody": {
+            "required": True,
+            "content": {"multipart/form-data": {"schema": {
+                "type": "object",
+                "required": [field_name],
+                "properties": {
+                    field_name: {"type": "array", "items": file_schema} if multiple else file_schema
+                },
+            }}},
+        }
     }
 
-@router.post("/single")
+@router.post("/single", openapi_extra=multipart_body("file"))
 async def upload_single_file(
-    file: UploadFile = File(...),
+    request: Request,
     current_user: User = Depends(get_current_active_user)
 ) -> dict:
-    if file.size > settings.MAX_FILE_SIZE:
-        raise HTTPException(status_code=413, detail="File too large")
-    
-    file_extension = os.path.splitext(file.filename)[1].lower()
-    if file_extension not in settings.ALLOWED_EXTENSIONS:
-        raise HTTPException(status_code=400, detail="File type not allowed")
-    
     try:
-        result = save_upload_file(file)
-        return result
+        results = await receive_uploads(request, "file", max_files=1, user_id=current_user.id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+    
+    if not results:
+        raise HTTPException(status_code=422, detail="No file uploaded")
+    return results[0]
 
-@router.post("/multiple")
+@router.post("/multiple", openapi_extra=multipart_body("files", multiple=True))
 async def upload_multiple_files(
-    files: List[UploadFile] = File(...),
+    request: Request,
     current_user: User = Depends(get_current_active_user)
 ) -> List[dict]:
-    if len(files) > 10:  # Limit to 10 files
-        raise HTTPException(status_code=400, detail="Too many files")
-    
-    results = []
-    for file in files:
-        if file.size > settings.MAX_FILE_SIZE:
-            results.append({"error": f"File {file.filename} too large", "filename": file.filename})
-            continue
-            
-        file_extension = os.path.splitext(file.filename)[1].lower()
-        if file_extension not in settings.ALLOWED_EXTENSIONS:
-            results.append({"error": f"File type not allowed", "filename": file.filename})
-            continue
-        
-        try:
-            result = save_upload_file(file)
-            results.append(result)
-        except Exception as e:
-            results.append({"error": f"Upload failed: {str(e)}", "filename": file.filename})
-    
-    return results
\ No newline at end of file
+    # Files are written as they stream in; oversized, disallowed or failed ones
+    # are reported per file without failing the rest
+    try:
+        return await receive_uploads(
+            request, "files", max_files=MAX_FILES_PER_REQUEST, user_id=current_user.id, collect_errors=True
+        )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+@router.get("/blobs/{sha256}")
+async def get_blob(
+    sha256: str = Path(..., pattern="^[0-9a-f]{64}$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> dict:
+    # Clients hash the file first and only upload it when this is a 404,
+    # which is also the answer for content only other users have uploaded
+    blob = await find_blob(db, sha256, current_user.id)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Blob not found")
+    return {**blob_info(blob), "deduplicated": True}
+
+@router.get("/blobs/{sha256}/download")
+async def get_blob_download_url(
+    sha256: str = Path(..., pattern="^[0-9a-f]{64}$"),
+    filename: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> dict:
+    # With S3 this is a short-lived presigned URL, so the bytes skip the API;
+    # locally it is a signed /uploads URL
+    blob = await find_blob(db, sha256, current_user.id)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Blob not found")
+    url = await get_storage().download_url(blob_key(blob.sha256, blob.extension), filename)
+    return {"url": url or blob_info(blob)["file_url"], "presigned": url is not None}
+
+# Direct uploads (S3 backend): the client hashes the file, PUTs it to the
+# presigned URL with the returned headers, then calls complete.
+
+@router.post("/direct")
+async def create_direct_upload(
+    upload_in: DirectUploadCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> dict:
+    try:
+        return await start_direct_upload(
+            db, current_user.id, upload_in.filename, upload_in.size, upload_in.sha256, upload_in.content_type
+        )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.post("/direct/complete")
+async def complete_direct_upload_endpoint(
+    upload_in: DirectUploadComplete,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> dict:
+    try:
+        blob, created = await complete_direct_upload(db, current_user.id, upload_in.filename, upload_in.sha256)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return {**blob_info(blob), "filename": upload_in.filename, "deduplicated": not created}
+
+# Resumable uploads: create a session, PUT chunks with Content-Range, check
+# progress with GET after a dropped connection, then complete.
+
+@router.post("/sessions", response_model=UploadSessionSchema)
+async def create_upload_session(
+    session_in: UploadSessionCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    try:
+        return await create_session(
+            db, current_user.id, session_in.filename, session_in.size,
+            session_in.content_type, session_in.sha256
+        )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.get("/sessions/{session_id}", response_model=UploadSessionSchema)
+async def get_upload_session(
+    session_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    try:
+        return await get_session(db, session_id, current_user.id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.put(
+    "/sessions/{session_id}",
+    response_model=UploadSessionSchema,
+    openapi_extra={
+        "parameters": [{
+            "name": "Content-Range", "in": "header", "required": True,
+            "schema": {"type": "string", "example": "bytes 0-1048575/5242880"}
+        }],
+        "requestBody": {
+            "required": True,
+            "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}},
+        },
+    }
+)
+async def put_upload_chunk(
+    session_id: UUID,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    # A chunk cut off by a dropped connection still counts up to its last byte;
+    # the response (or a later GET) gives the offset to resume from
+    try:
+        upload = await get_session(db, session_id, current_user.id)
+        await write_chunk(db, upload, request)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return upload
+
+@router.post("/sessions/{session_id}/complete")
+async def complete_upload_session(
+    session_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> dict:
+    try:
+        upload = await get_session(db, session_id, current_user.id)
+        blob, created = await complete_session(db, upload)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return {**blob_info(blob), "filename": upload.filename, "deduplicated": not created}
+
+@router.delete("/sessions/{session_id}")
+async def delete_upload_session(
+    session_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    try:
+        upload = await get_session(db, session_id, current_user.id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    await abort_session(db, upload)
+    return {"message": "Upload session cancelled"}
\ No newline at end of file
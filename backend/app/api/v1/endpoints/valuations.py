@@ -1,75 +1,33 @@
-from typing import Any
+from typing import Any, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query
 
-from app.api.auth.deps import get_current_active_user
-from app.core.database import get_db
-from app.models.user import User
+from app.api.v1.deps import ReportChildRepository, get_report_children, get_report_reader
 from app.models.valuation import Valuation
-from app.models.report import Report
+from app.schemas.valuation import Valuation as ValuationSchema
 
 router = APIRouter()
 
-@router.post("/")
+@router.post("/", response_model=ValuationSchema)
 async def create_valuation(
     valuation_data: dict,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    repo: ReportChildRepository = Depends(get_report_children)
 ) -> Any:
-    # Verify report belongs to user
-    report = db.query(Report).filter(
-        Report.id == valuation_data.get("report_id"),
-        Report.user_id == current_user.id
-    ).first()
-    
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    db_valuation = Valuation(**valuation_data)
-    db.add(db_valuation)
-    db.commit()
-    db.refresh(db_valuation)
-    return db_valuation
+    return await repo.create(Valuation, valuation_data)
 
-@router.get("/")
+@router.get("/", response_model=Optional[ValuationSchema])
 async def get_valuation(
     report_id: UUID = Query(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    repo: ReportChildRepository = Depends(get_report_reader)
 ) -> Any:
-    # Verify report belongs to user
-    report = db.query(Report).filter(
-        Report.id == report_id,
-        Report.user_id == current_user.id
-    ).first()
-    
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    valuation = db.query(Valuation).filter(Valuation.report_id == report_id).first()
-    return valuation
+    return await repo.first_child(Valuation, report_id)
 
-@router.put("/{valuation_id}")
+@router.put("/{valuation_id}", response_model=ValuationSchema)
 async def update_valuation(
     valuation_id: UUID,
     valuation_data: dict,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    repo: ReportChildRepository = Depends(get_report_children)
 ) -> Any:
-    valuation = db.query(Valuation).join(Report).filter(
-        Valuation.id == valuation_id,
-        Report.user_id == current_user.id
-    ).first()
-    
-    if not valuation:
-        raise HTTPException(status_code=404, detail="Valuation not found")
-    
-    for field, value in valuation_data.items():
-        if hasattr(valuation, field):
-            setattr(valuation, field, value)
-    
-    db.commit()
-    db.refresh(valuation)
-    return valuation
\ No newline at end of file
+    valuation = await repo.get_owned(Valuation, valuation_id, "Valuation not found")
+    return await repo.update(valuation, valuation_data)
\ No newline at end of file
@@ -2,35 +2,40 @@ from typing import Any, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.auth.deps import get_current_active_user
+from app.api.v1.deps import ReportChildRepository, get_read_db, get_report_children
 from app.core.database import get_db
 from app.models.user import User
 from app.models.valuer_profile import ValuerProfile
+from app.models.applicant import Applicant
+from app.schemas.valuer_profile import ValuerProfile as ValuerProfileSchema
+from app.schemas.applicant import Applicant as ApplicantSchema
 
 router = APIRouter()
 
-@router.get("/")
+@router.get("/", response_model=Optional[ValuerProfileSchema])
 async def get_valuer_profile(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
-    profile = db.query(ValuerProfile).filter(
+    profile = await db.scalar(select(ValuerProfile).where(
         ValuerProfile.user_id == current_user.id
-    ).first()
+    ))
     return profile
 
-@router.post("/")
+@router.post("/", response_model=ValuerProfileSchema)
 async def create_valuer_profile(
     profile_data: dict,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     # Check if profile already exists
-    existing_profile = db.query(ValuerProfile).filter(
+    existing_profile = await db.scalar(select(ValuerProfile).where(
         ValuerProfile.user_id == current_user.id
-    ).first()
+    ))
     
     if existing_profile:
         raise HTTPException(status_code=400, detail="Profile already exists")
@@ -38,19 +43,18 @@ async def create_valuer_profile(
     profile_data["user_id"] = current_user.id
     db_profile = ValuerProfile(**profile_data)
     db.add(db_profile)
-    db.commit()
-    db.refresh(db_profile)
+    await db.commit()
     return db_profile
 
-@router.put("/")
+@router.put("/", response_model=ValuerProfileSchema)
 async def update_valuer_profile(
     profile_data: dict,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
-    profile = db.query(ValuerProfile).filter(
+    profile = await db.scalar(select(ValuerProfile).where(
         ValuerProfile.user_id == current_user.id
-    ).first()
+    ))
     
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
@@ -59,30 +63,12 @@ async def update_valuer_profile(
         if hasattr(profile, field):
             setattr(profile, field, value)
     
-    db.commit()
-    db.refresh(profile)
+    await db.commit()
     return profile
 
-@router.post("/create-applicant")
+@router.post("/create-applicant", response_model=ApplicantSchema)
 async def create_applicant_from_profile(
     applicant_data: dict,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    repo: ReportChildRepository = Depends(get_report_children)
 ) -> Any:
-    from app.models.applicant import Applicant
-    from app.models.report import Report
-    
-    # Verify report belongs to user
-    report = db.query(Report).filter(
-        Report.id == applicant_data.get("report_id"),
-        Report.user_id == current_user.id
-    ).first()
-    
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    db_applicant = Applicant(**applicant_data)
-    db.add(db_applicant)
-    db.commit()
-    db.refresh(db_applicant)
-    return db_applicant
\ No newline at end of file
+    return await repo.create(Applicant, applicant_data)
\ No newline at end of file
@@ -1,16 +1,68 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from functools import lru_cache
+from typing import Dict, List
 import os
 import json
 
+# Token buckets per route prefix: "<count>/<second|minute|hour|day>" per user and/or per IP
+DEFAULT_RATE_LIMITS = {
+    "/api/v1/auth/login": {"ip": "10/minute"},
+    "/api/v1/ocr": {"user": "20/minute", "ip": "60/minute"},
+    "/api/v1/ai": {"user": "30/minute", "ip": "60/minute"},
+    "/api/v1/maps": {"user": "120/minute", "ip": "300/minute"},
+}
+
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./valuerpro.db")
     
+    # Database connection pool
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    
+    # Read replicas (JSON list of URLs); reads fall back to the primary when empty
+    DATABASE_REPLICA_URLS: List[str] = json.loads(os.getenv("DATABASE_REPLICA_URLS", "[]"))
+    # How long a user's reads stay on the primary after they write
+    DATABASE_REPLICA_STICKY_SECONDS: float = float(os.getenv("DATABASE_REPLICA_STICKY_SECONDS", "5"))
+    
+    # Refuse to start unless the database is migrated to the latest revision
+    DB_SCHEMA_CHECK: bool = os.getenv("DB_SCHEMA_CHECK", "true").lower() == "true"
+    
+    # Authenticated user cache (per worker)
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+    USER_CACHE_TTL_SECONDS: float = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    
+    # Password hashing pool: bcrypt runs off the event loop in this many threads,
+    # and requests beyond MAX_PENDING queued hashes get a 503
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    
     # JWT
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+    
+    # Token revocation (logout, refresh rotation): in-memory bloom filter + exact set per worker
+    REVOCATION_SYNC_SECONDS: float = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+    REVOCATION_BLOOM_CAPACITY: int = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+    REVOCATION_BLOOM_ERROR_RATE: float = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+    
+    # Shared secret for /api/v1/metrics, sent as X-Metrics-Token; empty disables the endpoints
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+    
+    # Rate limiting (RATE_LIMITS is a JSON object shaped like DEFAULT_RATE_LIMITS)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMITS: Dict[str, Dict[str, str]] = json.loads(os.getenv("RATE_LIMITS", json.dumps(DEFAULT_RATE_LIMITS)))
+    # "memory" (per worker) or "database" (shared through the rate_limit_buckets table)
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    # Header carrying the client address when behind a proxy, e.g. X-Forwarded-For
+    RATE_LIMIT_FORWARDED_HEADER: str = os.getenv("RATE_LIMIT_FORWARDED_HEADER", "")
+    # Proxies in front of the API that append to that header; the client is the entry they added
+    RATE_LIMIT_TRUSTED_PROXIES: int = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "1"))
     
     # CORS
     CORS_ORIGINS: List[str] = json.loads(os.getenv("CORS_ORIGINS", '["http://localhost:3000"]'))
@@ -21,8 +73,41 @@ class Settings(BaseSettings):
     
     # File Upload
     UPLOAD_DIR: str = "uploads"
+    # Where stored files live: "local" (UPLOAD_DIR) or "s3" (AWS_S3_BUCKET, needs boto3)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "local")
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS: List[str] = [".jpg", ".jpeg", ".png", ".pdf", ".doc", ".docx"]
+    # "app" streams files from the API; "x-accel" hands them to nginx via X-Accel-Redirect
+    FILE_SERVING_MODE: str = os.getenv("FILE_SERVING_MODE", "app")
+    # nginx internal location that maps onto UPLOAD_DIR in x-accel mode
+    X_ACCEL_REDIRECT_PREFIX: str = os.getenv("X_ACCEL_REDIRECT_PREFIX", "/protected-uploads/")
+    # Files of one multipart request written, hashed and stored at the same time
+    UPLOAD_CONCURRENCY: int = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+    # Unreferenced uploads are kept this long before scripts/gc_uploads.py removes them
+    UPLOAD_GC_GRACE_HOURS: float = float(os.getenv("UPLOAD_GC_GRACE_HOURS", "24"))
+    # Resumable upload sessions (large scans sent in chunks over flaky connections)
+    RESUMABLE_MAX_FILE_SIZE: int = int(os.getenv("RESUMABLE_MAX_FILE_SIZE", str(100 * 1024 * 1024)))
+    UPLOAD_SESSION_TTL_HOURS: float = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+    # Processes that render photo thumbnails and print-size copies
+    IMAGE_WORKERS: int = int(os.getenv("IMAGE_WORKERS", str(min(2, os.cpu_count() or 1))))
+    # Per-bank DOCX templates, named after the bank (e.g. commercial-bank-of-ceylon-plc.docx)
+    DOCX_TEMPLATE_DIR: str = os.getenv("DOCX_TEMPLATE_DIR", "report_templates")
+    # Largest comparables file (CSV, XLSX, NDJSON) accepted by /comparables/import
+    COMPARABLE_IMPORT_MAX_SIZE: int = int(os.getenv("COMPARABLE_IMPORT_MAX_SIZE", str(50 * 1024 * 1024)))
+
+    # Background jobs (report generation), queued in the jobs table
+    # Workers started inside each API process; 0 leaves them to scripts/run_job_worker.py
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "1"))
+    # Idle workers check the table this often; jobs queued by the same process wake them at once
+    JOB_POLL_SECONDS: float = float(os.getenv("JOB_POLL_SECONDS", "2"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    # Delay before the first retry, doubled for each further one
+    JOB_RETRY_DELAY_SECONDS: float = float(os.getenv("JOB_RETRY_DELAY_SECONDS", "10"))
+    JOB_TIMEOUT_SECONDS: float = float(os.getenv("JOB_TIMEOUT_SECONDS", "300"))
+    # A running job whose worker stops renewing this lease is handed to another worker
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+    # Finished jobs are deleted after this long; their files stay on the report
+    JOB_RETENTION_HOURS: float = float(os.getenv("JOB_RETENTION_HOURS", str(7 * 24)))
     
     # External APIs
     GOOGLE_MAPS_API_KEY: str = os.getenv("GOOGLE_MAPS_API_KEY", "")
@@ -33,6 +118,11 @@ class Settings(BaseSettings):
     AWS_SECRET_ACCESS_KEY: str = os.getenv("AWS_SECRET_ACCESS_KEY", "")
     AWS_REGION: str = os.getenv("AWS_REGION", "us-east-1")
     AWS_S3_BUCKET: str = os.getenv("AWS_S3_BUCKET", "")
+    # S3-compatible endpoint such as MinIO; empty for AWS itself
+    AWS_S3_ENDPOINT_URL: str = os.getenv("AWS_S3_ENDPOINT_URL", "")
+    # Files larger than this are sent to S3 as multipart uploads in parts of this size
+    S3_MULTIPART_CHUNK_SIZE: int = int(os.getenv("S3_MULTIPART_CHUNK_SIZE", str(8 * 1024 * 1024)))
+    PRESIGNED_URL_EXPIRE_SECONDS: int = int(os.getenv("PRESIGNED_URL_EXPIRE_SECONDS", "900"))
     
     # Google Cloud Configuration
     GOOGLE_APPLICATION_CREDENTIALS: str = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "")
@@ -41,5 +131,24 @@ class Settings(BaseSettings):
     class Config:
         case_sensitive = True
 
-def get_settings():
-    return Settings()
\ No newline at end of file
+@lru_cache()
+def get_settings() -> Settings:
+    """
+    Process-wide Settings, parsed from the environment once.
+    Also usable as a FastAPI dependency: `settings: Settings = Depends(get_settings)`.
+    """
+    return Settings()
+
+def reload_settings() -> Settings:
+    """
+    Re-read the environment into the cached Settings object (tests, config changes).
+
+    Updates the instance in place, so modules that kept a `settings = get_settings()`
+    reference see the new values. Objects already built from settings (engines,
+    pools, caches) are not recreated.
+    """
+    settings = get_settings()
+    fresh = Settings()
+    for name in Settings.model_fields:
+        setattr(settings, name, getattr(fresh, name))
+    return settings
\ No newline at end of file
@@ -1,23 +1,225 @@
-from sqlalchemy import create_engine
+import itertools
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from app.core.config import get_settings
+from app.core.metrics import Counter, Histogram
 
 settings = get_settings()
 
-# Handle PostgreSQL URL format for Railway
-database_url = settings.DATABASE_URL
-if database_url.startswith("postgres://"):
-    database_url = database_url.replace("postgres://", "postgresql://", 1)
+def normalize_database_url(url: str) -> str:
+    # Handle PostgreSQL URL format for Railway
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
+
+database_url = normalize_database_url(settings.DATABASE_URL)
+replica_urls = [normalize_database_url(url) for url in settings.DATABASE_REPLICA_URLS]
+
+def get_async_database_url(url: str) -> str:
+    # Swap the sync drivers for their asyncio counterparts
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgresql+psycopg2://"):
+        return url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+# Shared across pool re-creation (engine.dispose()) so stats survive restarts of the pool
+pool_checkout_wait = Histogram()
+pool_checkout_timeouts = Counter()
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waits for a usable connection."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_checkout_timeouts.inc()
+            raise
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - start)
+
+def get_engine_options(url: str) -> dict:
+    options = {"echo": settings.ENVIRONMENT == "development"}
+    # In-memory SQLite must keep its single StaticPool connection
+    if ":memory:" in url:
+        return options
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    return options
+
+engine = create_async_engine(
+    get_async_database_url(database_url),
+    **get_engine_options(database_url)
+)
+# expire_on_commit=False so returned objects can be serialized after commit
+# without triggering lazy loads outside the event loop
+AsyncSessionLocal = async_sessionmaker(
+    bind=engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+replica_engines = [
+    create_async_engine(get_async_database_url(url), **get_engine_options(url))
+    for url in replica_urls
+]
+ReplicaSessionLocals = [
+    async_sessionmaker(bind=replica, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    for replica in replica_engines
+]
+_replica_rotation = itertools.cycle(ReplicaSessionLocals)
+
+# Per-process record of when each user last committed a write, used to keep
+# their reads on the primary until the replicas have caught up
+_recent_writes: Dict[Any, float] = {}
+
+# Other workers (and job workers) don't see that record, so the time of the
+# request's last write is also sent to the client in this header. The client
+# echoes the latest one it has seen, which keeps its reads on the primary
+# whichever process serves them. Faking it only costs replica offloading.
+LAST_WRITE_HEADER = "X-Last-Write"
+
+# Per-request {"client": echoed write time, "written": write time to send back}
+_request_writes: ContextVar[Optional[Dict[str, Optional[float]]]] = ContextVar("request_writes", default=None)
+
+def record_write(user_id: Any) -> None:
+    now = time.time()
+    _recent_writes[user_id] = now
+    note_write(now)
+    if len(_recent_writes) > 10000:
+        cutoff = now - settings.DATABASE_REPLICA_STICKY_SECONDS
+        for key in [key for key, written_at in _recent_writes.items() if written_at < cutoff]:
+            del _recent_writes[key]
+
+def note_write(written_at: float) -> None:
+    """Send `written_at` (epoch seconds) to the client of the current request as its last write."""
+    writes = _request_writes.get()
+    if writes is not None:
+        writes["written"] = max(writes["written"] or 0, written_at)
+
+def wrote_recently(user_id: Any) -> bool:
+    written_at = _recent_writes.get(user_id)
+    writes = _request_writes.get()
+    if writes is not None and writes["client"] is not None:
+        written_at = max(written_at or 0, writes["client"])
+    return written_at is not None and time.time() - written_at < settings.DATABASE_REPLICA_STICKY_SECONDS
+
+@event.listens_for(Session, "after_commit")
+def _record_session_write(session: Session) -> None:
+    # get_current_user tags the request's session with the user it authenticated;
+    # job workers tag theirs with the job's owner
+    user_id = session.info.get("user_id")
+    if user_id is not None:
+        record_write(user_id)
+
+class LastWriteMiddleware:
+    """
+    Reads the client's echoed LAST_WRITE_HEADER for get_read_sessionmaker and
+    sets it on the response when the request committed a write. Writes made
+    after a streamed response has started are only recorded per process.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            client = float(Headers(scope=scope).get(LAST_WRITE_HEADER, ""))
+        except ValueError:
+            client = None
+        writes = {"client": client, "written": None}
+        token = _request_writes.set(writes)
+
+        async def send_with_last_write(message: Message) -> None:
+            if message["type"] == "http.response.start" and writes["written"] is not None:
+                headers = MutableHeaders(scope=message)
+                headers[LAST_WRITE_HEADER] = f"{writes['written']:.3f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_last_write)
+        finally:
+            _request_writes.reset(token)
+
+def get_read_sessionmaker(user_id: Optional[Any] = None) -> async_sessionmaker:
+    """
+    Pick the session factory for a read: the next replica in rotation, or the
+    primary when no replicas are configured or the user wrote within the
+    stickiness window (read-your-writes), as recorded by this process or
+    echoed by the client in LAST_WRITE_HEADER.
+    """
+    if not ReplicaSessionLocals:
+        return AsyncSessionLocal
+    if user_id is not None and wrote_recently(user_id):
+        return AsyncSessionLocal
+    return next(_replica_rotation)
+
+class ModelBase:
+    # Fetch server-generated columns (timestamps) in the INSERT/UPDATE itself
+    # via RETURNING, so handlers don't need a refresh() round trip after commit
+    __mapper_args__ = {"eager_defaults": True}
+
+Base = declarative_base(cls=ModelBase)
+
+def get_pool_stats() -> dict:
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return {"pool_class": type(pool).__name__, "instrumented": False}
 
-engine = create_engine(database_url, echo=settings.ENVIRONMENT == "development")
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return {
+        "pool_class": type(pool).__name__,
+        "instrumented": True,
+        "pool_size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # QueuePool reports overflow as negative until pool_size connections exist
+        "overflow": max(pool.overflow(), 0),
+        "timeout": settings.DB_POOL_TIMEOUT,
+        "recycle": settings.DB_POOL_RECYCLE,
+        "pre_ping": settings.DB_POOL_PRE_PING,
+        # Checkout wait and timeouts are shared by the primary and replica pools
+        "checkout_timeouts": pool_checkout_timeouts.value,
+        "checkout_wait_seconds": pool_checkout_wait.snapshot(),
+        "replicas": [
+            {"checked_out": replica.pool.checkedout(), "idle": replica.pool.checkedin()}
+            for replica in replica_engines
+            if isinstance(replica.pool, InstrumentedQueuePool)
+        ],
+    }
 
-Base = declarative_base()
+async def dispose_engines() -> None:
+    await engine.dispose()
+    for replica in replica_engines:
+        await replica.dispose()
 
-def get_db():
-    db = SessionLocal()
+async def get_db():
+    db = AsyncSessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        await db.close()
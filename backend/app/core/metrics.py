@@ -0,0 +1,53 @@
+import bisect
+import threading
+from typing import Dict, Sequence
+
+# Upper bounds in seconds, tuned for connection checkout and similar short waits
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Counter:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+class Histogram:
+    """Fixed-bucket histogram reported in cumulative (Prometheus-style) form."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self._bounds = tuple(sorted(buckets))
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self._bounds, counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        cumulative += counts[-1]
+        buckets["+Inf"] = cumulative
+
+        return {
+            "buckets": buckets,
+            "count": cumulative,
+            "sum": round(total_sum, 6),
+        }
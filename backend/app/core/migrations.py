@@ -0,0 +1,63 @@
+import ast
+import os
+import re
+from functools import lru_cache
+from typing import FrozenSet, Set
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+VERSIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "alembic", "versions"
+)
+REVISION_LINE = re.compile(r"^(revision|down_revision)\s*=\s*(.+)$", re.MULTILINE)
+
+class SchemaOutOfDateError(RuntimeError):
+    pass
+
+@lru_cache()
+def get_head_revisions() -> FrozenSet[str]:
+    """
+    Head revisions of the migration scripts on disk.
+
+    Reads the revision identifiers straight from the version files instead of
+    loading alembic's ScriptDirectory, which costs a few hundred milliseconds
+    of imports on every boot.
+    """
+    revisions: Set[str] = set()
+    parents: Set[str] = set()
+    for filename in os.listdir(VERSIONS_DIR):
+        if not filename.endswith(".py"):
+            continue
+        with open(os.path.join(VERSIONS_DIR, filename), encoding="utf-8") as f:
+            values = dict((name, ast.literal_eval(value.strip())) for name, value in REVISION_LINE.findall(f.read()))
+        if "revision" not in values:
+            continue
+        revisions.add(values["revision"])
+        down_revision = values.get("down_revision")
+        if isinstance(down_revision, str):
+            parents.add(down_revision)
+        elif down_revision:
+            parents.update(down_revision)
+    return frozenset(revisions - parents)
+
+async def get_current_revisions(engine: AsyncEngine) -> Set[str]:
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        except DBAPIError:
+            # No alembic_version table: the schema was never migrated
+            return set()
+        return set(result.scalars().all())
+
+async def verify_schema_version(engine: AsyncEngine) -> None:
+    """Fail fast when the database isn't migrated to the scripts' head revision."""
+    expected = get_head_revisions()
+    current = await get_current_revisions(engine)
+    if current != expected:
+        raise SchemaOutOfDateError(
+            f"Database schema is at {', '.join(sorted(current)) or 'no revision'}, "
+            f"expected {', '.join(sorted(expected))}. Run `python scripts/init_db.py` to migrate it."
+        )
\ No newline at end of file
@@ -0,0 +1,196 @@
+import logging
+import math
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from jose import JWTError, jwt
+from sqlalchemy import case
+from sqlalchemy.dialects import postgresql, sqlite
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.database import engine
+from app.models.rate_limit_bucket import RateLimitBucket
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+RATE_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+class Limit(NamedTuple):
+    capacity: float
+    rate: float  # tokens refilled per second
+
+def parse_limit(value: str) -> Limit:
+    """Parse "20/minute" into a bucket holding 20 tokens that refills 20 per minute."""
+    count, _, period = value.partition("/")
+    return Limit(float(count), float(count) / RATE_PERIODS[period.strip()])
+
+class RateLimitRule(NamedTuple):
+    prefix: str
+    user: Optional[Limit]
+    ip: Optional[Limit]
+
+    def matches(self, path: str) -> bool:
+        prefix = self.prefix.rstrip("/")
+        return path == prefix or path.startswith(prefix + "/")
+
+def load_rules(config: Dict[str, Dict[str, str]]) -> List[RateLimitRule]:
+    rules = [
+        RateLimitRule(
+            prefix=prefix,
+            user=parse_limit(limits["user"]) if limits.get("user") else None,
+            ip=parse_limit(limits["ip"]) if limits.get("ip") else None,
+        )
+        for prefix, limits in config.items()
+    ]
+    # Most specific prefix wins
+    return sorted(rules, key=lambda rule: len(rule.prefix), reverse=True)
+
+class MemoryBucketStore:
+    """
+    Per-worker buckets in a plain dict. No lock is needed: take() never awaits
+    between reading and writing a bucket, so on the event loop it is atomic.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # key -> (tokens, updated_at, time the bucket will be full again)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+
+    async def take(self, key: str, limit: Limit, now: float) -> Tuple[bool, float]:
+        tokens, updated_at, _ = self._buckets.get(key, (limit.capacity, now, now))
+        tokens = min(limit.capacity, tokens + (now - updated_at) * limit.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now, now + (limit.capacity - tokens) / limit.rate)
+        if len(self._buckets) > self.max_keys:
+            self._sweep(now)
+        return allowed, 0.0 if allowed else (1 - tokens) / limit.rate
+
+    def _sweep(self, now: float) -> None:
+        # A full bucket is the same as no bucket, so those can be forgotten
+        for key in [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+
+class DatabaseBucketStore:
+    """
+    Buckets shared by every worker in the rate_limit_buckets table. Each take is
+    a single atomic upsert, so concurrent workers can't both spend the last token.
+    """
+
+    async def take(self, key: str, limit: Limit, now: float) -> Tuple[bool, float]:
+        bucket = RateLimitBucket.__table__
+        refilled = bucket.c.tokens + (now - bucket.c.updated_at) * limit.rate
+        refilled = case((refilled > limit.capacity, limit.capacity), else_=refilled)
+        allowed = refilled >= 1
+
+        insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+        statement = insert(bucket)\
+            .values(key=key, tokens=limit.capacity - 1, updated_at=now, allowed=True)\
+            .on_conflict_do_update(
+                index_elements=[bucket.c.key],
+                set_={
+                    "tokens": case((allowed, refilled - 1), else_=refilled),
+                    "updated_at": now,
+                    "allowed": allowed,
+                }
+            )\
+            .returning(bucket.c.tokens, bucket.c.allowed)
+
+        try:
+            async with engine.begin() as conn:
+                tokens, was_allowed = (await conn.execute(statement)).one()
+        except Exception:
+            # Fail open: an unavailable limiter must not take the API down with it
+            logger.exception("Rate limit backend unavailable")
+            return True, 0.0
+        return bool(was_allowed), 0.0 if was_allowed else (1 - tokens) / limit.rate
+
+def create_bucket_store(backend: str):
+    if backend == "database":
+        return DatabaseBucketStore()
+    return MemoryBucketStore()
+
+class RateLimitMiddleware:
+    """
+    Token-bucket limits for expensive routes, per client IP and per
+    authenticated user. Requests over the limit get a 429 with Retry-After.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rules: List[RateLimitRule],
+        store,
+        forwarded_header: str = "",
+        trusted_proxies: int = 1
+    ):
+        self.app = app
+        self.rules = rules
+        self.store = store
+        self.forwarded_header = forwarded_header.lower().encode()
+        self.trusted_proxies = max(1, trusted_proxies)
+
+    def client_ip(self, scope: Scope) -> str:
+        if self.forwarded_header:
+            # Proxies may append to one header or add their own lines
+            hops = [
+                hop.strip()
+                for name, value in scope["headers"] if name == self.forwarded_header
+                for hop in value.decode("latin-1").split(",") if hop.strip()
+            ]
+            if hops:
+                # Each proxy appends the address it received the request from, so
+                # only the last trusted_proxies entries are ours; anything left of
+                # them was sent by the client and can be anything
+                return hops[-min(self.trusted_proxies, len(hops))]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def token_subject(self, scope: Scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer":
+                    return None
+                try:
+                    # Signature check only; revocation and user lookup stay in the endpoint
+                    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]).get("sub")
+                except JWTError:
+                    return None
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        rule = next((rule for rule in self.rules if rule.matches(scope["path"])), None)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        buckets = []
+        if rule.ip:
+            buckets.append((f"{rule.prefix}|ip:{self.client_ip(scope)}", rule.ip))
+        if rule.user:
+            subject = self.token_subject(scope)
+            if subject:
+                buckets.append((f"{rule.prefix}|user:{subject}", rule.user))
+
+        now = time.time()
+        for key, limit in buckets:
+            allowed, retry_after = await self.store.take(key, limit, now)
+            if not allowed:
+                response = JSONResponse(
+                    {"detail": "Too many requests"},
+                    status_code=429,
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
\ No newline at end of file
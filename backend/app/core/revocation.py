@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import logging
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.revoked_token import RevokedToken
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Re-read a little before the last seen revocation to tolerate clock skew between workers
+SYNC_OVERLAP = timedelta(seconds=60)
+# Expired rows are deleted from the table every this many sync rounds
+PRUNE_EVERY = 60
+
+class BloomFilter:
+    """Fixed-size bloom filter sized for `capacity` items at `error_rate` false positives."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterator[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+class RevocationStore:
+    """
+    In-memory view of the revoked_tokens table.
+
+    Lookups never touch the database: the bloom filter rules out almost every
+    live token, and the exact set confirms the rare positives. Each worker
+    loads the table at startup and then syncs new rows in the background.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.error_rate = error_rate
+        self._entries: Dict[str, datetime] = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._watermark: Optional[datetime] = None
+
+    def is_revoked(self, *token_ids: Optional[str]) -> bool:
+        for token_id in token_ids:
+            if token_id and token_id in self._bloom and token_id in self._entries:
+                return True
+        return False
+
+    def add(self, token_id: str, expires_at: datetime) -> None:
+        self._entries[token_id] = expires_at
+        self._bloom.add(token_id)
+        if len(self._entries) > self._bloom.capacity:
+            self._rebuild(self._bloom.capacity * 2)
+
+    def prune(self, now: datetime) -> None:
+        """Forget expired entries; bloom filters can't delete, so rebuild it."""
+        expired = [token_id for token_id, expires_at in self._entries.items() if _as_utc(expires_at) <= now]
+        if not expired:
+            return
+        for token_id in expired:
+            del self._entries[token_id]
+        self._rebuild(self._bloom.capacity)
+
+    def _rebuild(self, capacity: int) -> None:
+        bloom = BloomFilter(capacity, self.error_rate)
+        for token_id in self._entries:
+            bloom.add(token_id)
+        self._bloom = bloom
+
+    async def load(self, db: AsyncSession) -> int:
+        """Pull revocations recorded since the last load (all live ones on the first call)."""
+        query = select(RevokedToken.token_id, RevokedToken.expires_at, RevokedToken.revoked_at)\
+            .where(RevokedToken.expires_at > datetime.now(timezone.utc))
+        if self._watermark is not None:
+            query = query.where(RevokedToken.revoked_at >= self._watermark - SYNC_OVERLAP)
+
+        rows = (await db.execute(query)).all()
+        for token_id, expires_at, revoked_at in rows:
+            if token_id not in self._entries:
+                self.add(token_id, expires_at)
+            if self._watermark is None or revoked_at > self._watermark:
+                self._watermark = revoked_at
+        return len(rows)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bloom_capacity": self._bloom.capacity,
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hashes,
+        }
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes for timezone-aware columns
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+revocation_store = RevocationStore(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE
+)
+
+async def revoke(db: AsyncSession, token_id: str, expires_at: datetime) -> None:
+    """
+    Record a revocation and apply it to this worker immediately. Raises
+    IntegrityError if the id is already revoked, which makes refresh token
+    rotation single-use even across workers.
+    """
+    db.add(RevokedToken(token_id=token_id, expires_at=expires_at))
+    await db.commit()
+    revocation_store.add(token_id, expires_at)
+
+async def sync_revocations() -> None:
+    """Background loop: pick up revocations made by other workers and drop expired ones."""
+    rounds = 0
+    while True:
+        await asyncio.sleep(settings.REVOCATION_SYNC_SECONDS)
+        rounds += 1
+        try:
+            async with AsyncSessionLocal() as db:
+                await revocation_store.load(db)
+                if rounds % PRUNE_EVERY == 0:
+                    now = datetime.now(timezone.utc)
+                    await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+                    await db.commit()
+                    revocation_store.prune(now)
+        except Exception:
+            # Keep serving with the current view; the next round retries
+            logger.exception("Revocation sync failed")
+
+async def start_revocation_sync() -> asyncio.Task:
+    async with AsyncSessionLocal() as db:
+        await revocation_store.load(db)
+    return asyncio.create_task(sync_revocations())
\ No newline at end of file
@@ -1,17 +1,40 @@
+import asyncio
+import hashlib
+import hmac
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Callable, Optional, TypeVar, Union
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import get_settings
+from app.core.metrics import Counter, Histogram
 
 settings = get_settings()
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
+# bcrypt releases the GIL while hashing, so a thread pool runs hashes in parallel
+# without blocking the event loop
+_hash_executor = ThreadPoolExecutor(
+    max_workers=max(settings.PASSWORD_HASH_WORKERS, 1),
+    thread_name_prefix="password-hash"
+)
+_hash_pending = 0
+hash_queue_wait = Histogram()
+hash_duration = Histogram()
+hash_rejections = Counter()
+
+class PasswordHasherBusy(Exception):
+    """Raised when more hashes are pending than PASSWORD_HASH_MAX_PENDING allows."""
+
 def create_access_token(
-    subject: Union[str, Any], expires_delta: timedelta = None
+    subject: Union[str, Any], expires_delta: timedelta = None, family: Optional[str] = None
 ) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -19,12 +42,74 @@ def create_access_token(
         expire = datetime.utcnow() + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {"exp": expire, "sub": str(subject), "type": "access", "jti": uuid.uuid4().hex}
+    # The login session the token belongs to; revoking it logs out every token in it
+    if family:
+        to_encode["fam"] = family
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def create_refresh_token(subject: Union[str, Any], family: str) -> str:
+    expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode = {
+        "exp": expire, "sub": str(subject), "type": "refresh",
+        "jti": uuid.uuid4().hex, "fam": family
+    }
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def sign_path(path: str, expires: int) -> str:
+    """HMAC for a time-limited file URL, so browsers can load it without a bearer header."""
+    message = f"{path}\n{expires}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+def verify_path_signature(path: str, expires: Optional[int], signature: Optional[str]) -> bool:
+    if expires is None or signature is None or expires < time.time():
+        return False
+    return hmac.compare_digest(sign_path(path, expires), signature)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+async def run_password_hasher(fn: Callable[..., T], *args: Any) -> T:
+    global _hash_pending
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        # Inline on the event loop; only useful as a benchmark baseline
+        return fn(*args)
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        hash_rejections.inc()
+        raise PasswordHasherBusy()
+
+    queued_at = time.perf_counter()
+
+    def run() -> T:
+        started_at = time.perf_counter()
+        hash_queue_wait.observe(started_at - queued_at)
+        try:
+            return fn(*args)
+        finally:
+            hash_duration.observe(time.perf_counter() - started_at)
+
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, run)
+    finally:
+        _hash_pending -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_password_hasher(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await run_password_hasher(get_password_hash, password)
+
+def get_password_hasher_stats() -> dict:
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+        "pending": _hash_pending,
+        "rejected": hash_rejections.value,
+        "queue_wait_seconds": hash_queue_wait.snapshot(),
+        "duration_seconds": hash_duration.snapshot(),
+    }
\ No newline at end of file
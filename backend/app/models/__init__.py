@@ -7,6 +7,12 @@ from .photo import Photo
 from .legal_aspect import LegalAspect
 from .valuer_profile import ValuerProfile
 from .applicant import Applicant
+from .revoked_token import RevokedToken
+from .rate_limit_bucket import RateLimitBucket
+from .blob import Blob, BlobUploader
+from .upload_session import UploadSession
+from .direct_upload import DirectUpload
+from .job import Job
 
 __all__ = [
     "User",
@@ -17,5 +23,12 @@ __all__ = [
     "Photo", 
     "LegalAspect",
     "ValuerProfile",
-    "Applicant"
+    "Applicant",
+    "RevokedToken",
+    "RateLimitBucket",
+    "Blob",
+    "BlobUploader",
+    "UploadSession",
+    "DirectUpload",
+    "Job"
 ]
\ No newline at end of file
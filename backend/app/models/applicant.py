@@ -1,5 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Uuid
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
@@ -9,8 +8,8 @@ from app.core.database import Base
 class Applicant(Base):
     __tablename__ = "applicants"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    report_id = Column(UUID(as_uuid=True), ForeignKey("reports.id"), nullable=False)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    report_id = Column(Uuid(as_uuid=True), ForeignKey("reports.id"), nullable=False, index=True)
     
     name = Column(String, nullable=False)
     address = Column(String, nullable=True)
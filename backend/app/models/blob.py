@@ -0,0 +1,35 @@
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger, ForeignKey, Uuid
+from sqlalchemy.sql import func
+from datetime import datetime, timezone
+
+from app.core.database import Base
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    # Uploads are stored once per distinct content, keyed by SHA-256
+    sha256 = Column(String(64), primary_key=True)
+    # Extension of the first upload; part of the on-disk name and the URL
+    extension = Column(String(16), nullable=False, default="")
+    size = Column(BigInteger, nullable=False)
+    content_type = Column(String, nullable=True)
+    # Number of photos.file_url / reports.generated_files entries pointing here
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped on every upload and reference change; GC leaves recently touched blobs alone
+    touched_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True
+    )
+
+class BlobUploader(Base):
+    __tablename__ = "blob_uploaders"
+
+    # Who has uploaded each blob: the hash lookup and download endpoints only
+    # answer for content the caller uploaded or references, so a shared blob
+    # doesn't reveal that someone else has the same document
+    sha256 = Column(String(64), ForeignKey("blobs.sha256", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
@@ -1,5 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Float, Integer, Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, ForeignKey, Float, Integer, Uuid, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
@@ -14,9 +13,12 @@ class LocationSimilarity(str, enum.Enum):
 
 class Comparable(Base):
     __tablename__ = "comparables"
+    __table_args__ = (
+        Index("ix_comparables_report_id_sale_date", "report_id", "sale_date"),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    report_id = Column(UUID(as_uuid=True), ForeignKey("reports.id"), nullable=False)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    report_id = Column(Uuid(as_uuid=True), ForeignKey("reports.id"), nullable=False)
     
     # Basic info
     address = Column(String, nullable=False)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Uuid
+from datetime import datetime, timezone
+import uuid
+
+from app.core.database import Base
+
+class DirectUpload(Base):
+    __tablename__ = "direct_uploads"
+
+    # A presigned PUT handed out by start_direct_upload. Completing requires one,
+    # so an object someone else put in the bucket can't be claimed by its hash
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    sha256 = Column(String(64), nullable=False)
+    extension = Column(String(16), nullable=False)
+
+    # Set here rather than by the database: complete compares it with the object's LastModified
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    # Removed by scripts/gc_uploads.py once past
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
\ No newline at end of file
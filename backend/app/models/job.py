@@ -0,0 +1,44 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Enum as SQLEnum, JSON, Uuid, Index, Integer, Float, Text
+from sqlalchemy.sql import func
+import uuid
+import enum
+
+from app.core.database import Base
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers look for the oldest runnable job
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    report_id = Column(Uuid(as_uuid=True), ForeignKey("reports.id", ondelete="CASCADE"), nullable=True, index=True)
+
+    # What to run, e.g. "report_pdf"; see app.services.jobs.JOB_HANDLERS
+    kind = Column(String, nullable=False)
+    status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    progress = Column(Float, nullable=False, default=0)
+    message = Column(String, nullable=True)
+    # Artifact of a finished job (blob URL, size, filename) and the last error
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    # Not picked up before this; pushed back after a failed attempt
+    run_after = Column(DateTime(timezone=True), nullable=False)
+    # The worker running the job renews its lease; a lapsed lease means the worker died
+    locked_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
\ No newline at end of file
@@ -1,5 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Float, JSON, Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Float, JSON, Uuid, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
@@ -17,8 +16,8 @@ class DocumentType(str, enum.Enum):
 class LegalAspect(Base):
     __tablename__ = "legal_aspects"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    report_id = Column(UUID(as_uuid=True), ForeignKey("reports.id"), nullable=False)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    report_id = Column(Uuid(as_uuid=True), ForeignKey("reports.id"), nullable=False, index=True)
     
     # Document details
     document_type = Column(SQLEnum(DocumentType), nullable=False)
@@ -1,5 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, JSON, Uuid, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
@@ -15,9 +14,12 @@ class PhotoType(str, enum.Enum):
 
 class Photo(Base):
     __tablename__ = "photos"
+    __table_args__ = (
+        Index("ix_photos_report_id_sequence_order", "report_id", "sequence_order"),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    report_id = Column(UUID(as_uuid=True), ForeignKey("reports.id"), nullable=False)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    report_id = Column(Uuid(as_uuid=True), ForeignKey("reports.id"), nullable=False)
     
     file_url = Column(String, nullable=False)
     filename = Column(String, nullable=False)
@@ -25,6 +27,8 @@ class Photo(Base):
     description = Column(String, nullable=True)
     type = Column(SQLEnum(PhotoType), nullable=False)
     sequence_order = Column(Integer, default=0)
+    # Variant name -> URL (thumb, medium, print), filled in once they are rendered
+    derivatives = Column(JSON, nullable=True)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, Float, Boolean
+
+from app.core.database import Base
+
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    # "<route prefix>|user:<email>" or "<route prefix>|ip:<address>"
+    key = Column(String(255), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    # Epoch seconds of the last take; refill is computed from it
+    updated_at = Column(Float, nullable=False)
+    # Outcome of the last take, returned alongside the new token count
+    allowed = Column(Boolean, nullable=False, default=True)
\ No newline at end of file
@@ -1,9 +1,9 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Enum as SQLEnum, JSON
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, ForeignKey, Enum as SQLEnum, JSON, Uuid, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
 import enum
+from datetime import datetime, timezone
 
 from app.core.database import Base
 
@@ -23,8 +23,12 @@ class ReportStatus(str, enum.Enum):
 
 class Report(Base):
     __tablename__ = "reports"
+    __table_args__ = (
+        # Ownership checks and the per-user report listing
+        Index("ix_reports_user_id_created_at", "user_id", "created_at"),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String, nullable=False)
     reference_number = Column(String, unique=True, nullable=True)
     purpose = Column(SQLEnum(ReportPurpose), nullable=False)
@@ -37,17 +41,19 @@ class Report(Base):
     generated_files = Column(JSON, default=list)
     
     # Foreign keys
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set client-side as well so keyset cursors round-trip the exact stored value
+    # (SQLite's CURRENT_TIMESTAMP has no sub-second precision)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     user = relationship("User", back_populates="reports")
     properties = relationship("Property", back_populates="report", cascade="all, delete-orphan")
     valuations = relationship("Valuation", back_populates="report", cascade="all, delete-orphan")
-    comparables = relationship("Comparable", back_populates="report", cascade="all, delete-orphan")
-    photos = relationship("Photo", back_populates="report", cascade="all, delete-orphan")
+    comparables = relationship("Comparable", back_populates="report", cascade="all, delete-orphan", order_by="desc(Comparable.sale_date)")
+    photos = relationship("Photo", back_populates="report", cascade="all, delete-orphan", order_by="Photo.sequence_order")
     legal_aspects = relationship("LegalAspect", back_populates="report", cascade="all, delete-orphan")
     applicants = relationship("Applicant", back_populates="report", cascade="all, delete-orphan")
\ No newline at end of file
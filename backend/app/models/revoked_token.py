@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from datetime import datetime, timezone
+
+from app.core.database import Base
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    # A token's jti, or a session family id that revokes every token issued in it
+    token_id = Column(String(64), primary_key=True)
+    # Rows can be dropped once every token they cover has expired
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    # Client-side default keeps microseconds on SQLite; workers sync incrementally on it
+    revoked_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        nullable=False,
+        index=True
+    )
\ No newline at end of file
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, BigInteger, Uuid
+from sqlalchemy.sql import func
+import uuid
+
+from app.core.database import Base
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=True)
+    # Declared total size, and how many bytes from the start are safely on disk
+    size = Column(BigInteger, nullable=False)
+    received = Column(BigInteger, nullable=False, default=0)
+    # Optional client-side hash, checked when the upload is completed
+    sha256 = Column(String(64), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Pushed back by every chunk; expired sessions are removed by scripts/gc_uploads.py
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    # Set while a complete request hashes and stores the file, so a second one waits its turn
+    completing_at = Column(DateTime(timezone=True), nullable=True)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from .user import User, UserCreate, UserUpdate
-from .auth import Token, TokenData
-from .report import Report, ReportCreate, ReportUpdate
+from .auth import Token, TokenData, RefreshRequest
+from .report import Report, ReportCreate, ReportUpdate, ReportPage, ReportFull
 from .property import Property, PropertyCreate, PropertyUpdate
 from .valuation import Valuation, ValuationCreate, ValuationUpdate
 from .comparable import Comparable, ComparableCreate, ComparableUpdate
@@ -8,16 +8,22 @@ from .photo import Photo, PhotoCreate
 from .legal_aspect import LegalAspect, LegalAspectCreate, LegalAspectUpdate
 from .valuer_profile import ValuerProfile, ValuerProfileCreate, ValuerProfileUpdate
 from .applicant import Applicant, ApplicantCreate
+from .upload_session import UploadSession, UploadSessionCreate
+from .direct_upload import DirectUploadCreate, DirectUploadComplete
+from .job import Job
 
 __all__ = [
     "User", "UserCreate", "UserUpdate",
-    "Token", "TokenData",
-    "Report", "ReportCreate", "ReportUpdate",
+    "Token", "TokenData", "RefreshRequest",
+    "Report", "ReportCreate", "ReportUpdate", "ReportPage", "ReportFull",
     "Property", "PropertyCreate", "PropertyUpdate", 
     "Valuation", "ValuationCreate", "ValuationUpdate",
     "Comparable", "ComparableCreate", "ComparableUpdate",
     "Photo", "PhotoCreate",
     "LegalAspect", "LegalAspectCreate", "LegalAspectUpdate",
     "ValuerProfile", "ValuerProfileCreate", "ValuerProfileUpdate",
-    "Applicant", "ApplicantCreate"
+    "Applicant", "ApplicantCreate",
+    "UploadSession", "UploadSessionCreate",
+    "DirectUploadCreate", "DirectUploadComplete",
+    "Job"
 ]
\ No newline at end of file
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class DirectUploadCreate(BaseModel):
+    filename: str
+    size: int = Field(..., gt=0)
+    sha256: str = Field(..., pattern="^[0-9a-f]{64}$")
+    content_type: Optional[str] = None
+
+class DirectUploadComplete(BaseModel):
+    filename: str
+    sha256: str = Field(..., pattern="^[0-9a-f]{64}$")
\ No newline at end of file
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, Optional
+import uuid
+
+from app.models.job import JobStatus
+
+class Job(BaseModel):
+    id: uuid.UUID
+    report_id: Optional[uuid.UUID] = None
+    kind: str
+    status: JobStatus
+    progress: float
+    message: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # Signed (or presigned) link to the artifact once the job has succeeded
+    download_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 from enum import Enum
 import uuid
 
@@ -24,6 +24,8 @@ class PhotoCreate(PhotoBase):
 
 class Photo(PhotoBase):
     id: uuid.UUID
+    # Missing until rendered, and for documents; fall back to file_url
+    derivatives: Optional[Dict[str, str]] = None
     created_at: datetime
 
     class Config:
@@ -4,6 +4,13 @@ from typing import Optional, List
 from enum import Enum
 import uuid
 
+from .property import Property
+from .valuation import Valuation
+from .comparable import Comparable
+from .photo import Photo
+from .legal_aspect import LegalAspect
+from .applicant import Applicant
+
 class ReportPurpose(str, Enum):
     MORTGAGE = "mortgage"
     SALE = "sale"
@@ -51,4 +58,19 @@ class Report(ReportBase):
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ReportPage(BaseModel):
+    items: List[Report]
+    next_cursor: Optional[str] = None
+    limit: int
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+
+class ReportFull(Report):
+    properties: List[Property] = []
+    valuations: List[Valuation] = []
+    comparables: List[Comparable] = []
+    photos: List[Photo] = []
+    legal_aspects: List[LegalAspect] = []
+    applicants: List[Applicant] = []
\ No newline at end of file
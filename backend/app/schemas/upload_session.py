@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+import uuid
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int = Field(..., gt=0)
+    content_type: Optional[str] = None
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-f]{64}$")
+
+class UploadSession(BaseModel):
+    id: uuid.UUID
+    filename: str
+    content_type: Optional[str] = None
+    size: int
+    received: int
+    expires_at: datetime
+
+    class Config:
+        from_attributes = True
\ No newline at end of file
@@ -0,0 +1,261 @@
+import os
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import String, cast, delete, event, exists, inspect, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import engine
+from app.models.blob import Blob, BlobUploader
+from app.models.photo import Photo
+from app.models.report import Report
+from app.services.images import DERIVATIVES, derivative_key
+from app.services.storage import get_storage
+
+settings = get_settings()
+
+# Uploads are streamed here first and moved into place once their hash is known
+INCOMING_DIR = os.path.join(settings.UPLOAD_DIR, ".incoming")
+
+BLOB_URL_PATTERN = re.compile(r"^/uploads/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})[^/]*$")
+# Photo derivatives, named after their source blob (see images.derivative_key)
+DERIVATIVE_URL_PATTERN = re.compile(r"^/uploads/derivatives/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})/[^/]+$")
+
+def blob_key(sha256: str, extension: str) -> str:
+    # Two levels of 256-way sharding keep directories small
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+
+def blob_url(sha256: str, extension: str) -> str:
+    # Stable whatever the storage backend; this is what photos and reports store
+    return f"/uploads/{blob_key(sha256, extension)}"
+
+def sha256_from_url(url: Optional[str]) -> Optional[str]:
+    """Hash of the blob behind a file URL, or None for anything else (e.g. pre-dedup uploads)."""
+    match = BLOB_URL_PATTERN.match(url) if isinstance(url, str) else None
+    return match.group(1) if match else None
+
+def blob_info(blob: Blob) -> dict:
+    return {
+        "file_url": blob_url(blob.sha256, blob.extension),
+        "file_size": blob.size,
+        "file_type": blob.content_type,
+        "sha256": blob.sha256,
+    }
+
+async def _touch(db: AsyncSession, sha256: str) -> Optional[Blob]:
+    # Bumping touched_at also protects the blob from a concurrent GC run
+    statement = update(Blob)\
+        .where(Blob.sha256 == sha256)\
+        .values(touched_at=datetime.now(timezone.utc))\
+        .returning(Blob)
+    return (await db.execute(statement)).scalar_one_or_none()
+
+async def blob_accessible(db: AsyncSession, sha256: str, user_id: Any) -> bool:
+    """
+    Whether the user may see the blob: they uploaded it, or one of their photos
+    or generated report files points at it. Identical content uploaded by
+    someone else is none of their business.
+    """
+    prefix = f"/uploads/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+    photo = select(Photo.id)\
+        .join(Report, Photo.report_id == Report.id)\
+        .where(Report.user_id == user_id, Photo.file_url.like(f"{prefix}%"))
+    generated = select(Report.id)\
+        .where(Report.user_id == user_id, cast(Report.generated_files, String).contains(prefix, autoescape=True))
+    uploaded = select(BlobUploader.sha256)\
+        .where(BlobUploader.sha256 == sha256, BlobUploader.user_id == user_id)
+    return bool(await db.scalar(select(or_(exists(uploaded), exists(photo), exists(generated)))))
+
+async def file_accessible(db: AsyncSession, url: str, user_id: Any) -> bool:
+    """Whether the user may read the /uploads/... file at `url`: a blob, a derivative of one, or a pre-dedup upload."""
+    derivative = DERIVATIVE_URL_PATTERN.match(url)
+    sha256 = derivative.group(1) if derivative else sha256_from_url(url)
+    if sha256:
+        return await blob_accessible(db, sha256, user_id)
+    # Pre-dedup uploads: only through the user's own photos and reports
+    photo = select(Photo.id)\
+        .join(Report, Photo.report_id == Report.id)\
+        .where(Report.user_id == user_id, Photo.file_url == url)
+    generated = select(Report.id)\
+        .where(Report.user_id == user_id, cast(Report.generated_files, String).contains(f'"{url}"', autoescape=True))
+    return bool(await db.scalar(select(or_(exists(photo), exists(generated)))))
+
+async def find_blob(db: AsyncSession, sha256: str, user_id: Any) -> Optional[Blob]:
+    """Stored blob for a hash, if the user may see it, so clients can skip uploading content they already have."""
+    if not await blob_accessible(db, sha256, user_id):
+        return None
+    blob = await _touch(db, sha256)
+    await db.commit()
+    if blob is None or not await get_storage().exists(blob_key(blob.sha256, blob.extension)):
+        return None
+    return blob
+
+async def link_uploader(db: AsyncSession, sha256: str, user_id: Any) -> bool:
+    """Record that the user uploaded the blob. Returns whether they hadn't before. Not committed."""
+    insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+    result = await db.execute(
+        insert(BlobUploader.__table__)
+        .values(sha256=sha256, user_id=user_id)
+        .on_conflict_do_nothing(index_elements=[BlobUploader.sha256, BlobUploader.user_id])
+    )
+    return result.rowcount == 1
+
+async def register_blob(
+    db: AsyncSession,
+    sha256: str,
+    size: int,
+    extension: str,
+    content_type: Optional[str]
+) -> Blob:
+    """Row for the given content, touched if it exists and inserted otherwise. Not committed."""
+    blob = await _touch(db, sha256)
+    if blob is None:
+        insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+        await db.execute(
+            insert(Blob.__table__)
+            .values(
+                sha256=sha256,
+                extension=extension,
+                size=size,
+                content_type=content_type,
+                ref_count=0,
+                touched_at=datetime.now(timezone.utc)
+            )
+            .on_conflict_do_nothing(index_elements=[Blob.sha256])
+        )
+        # Another request may have inserted the same content first
+        blob = await db.scalar(select(Blob).where(Blob.sha256 == sha256))
+    return blob
+
+async def store_blob(
+    db: AsyncSession,
+    incoming_path: str,
+    sha256: str,
+    size: int,
+    extension: str,
+    content_type: Optional[str],
+    user_id: Any
+) -> Tuple[Blob, bool]:
+    """
+    Move a fully received upload into content-addressed storage, recording
+    `user_id` as an uploader. Returns the blob and whether it was new to that
+    user; content already stored is not written again either way.
+    """
+    blob = await register_blob(db, sha256, size, extension, content_type)
+    linked = await link_uploader(db, blob.sha256, user_id)
+
+    storage = get_storage()
+    key = blob_key(blob.sha256, blob.extension)
+    created = not await storage.exists(key)
+    if created:
+        # The file is in place before the row is committed and visible to others
+        await storage.save(incoming_path, key, blob.content_type)
+    else:
+        os.remove(incoming_path)
+    await db.commit()
+    return blob, created or linked
+
+# Reference counting. Photos and report generated_files point at blobs by URL;
+# the counts are adjusted in the same transaction as the referencing row.
+
+def _adjust_ref_counts(connection, added: Iterable[str], removed: Iterable[str]) -> None:
+    deltas = Counter(filter(None, map(sha256_from_url, added)))
+    deltas.subtract(filter(None, map(sha256_from_url, removed)))
+    now = datetime.now(timezone.utc)
+    blobs = Blob.__table__
+    for sha256, delta in deltas.items():
+        if delta:
+            connection.execute(
+                update(blobs)
+                .where(blobs.c.sha256 == sha256)
+                .values(ref_count=blobs.c.ref_count + delta, touched_at=now)
+            )
+
+def _file_lists(history_values: Iterable) -> List[str]:
+    return [url for files in history_values if files for url in files]
+
+@event.listens_for(Photo, "after_insert")
+def _photo_inserted(mapper, connection, target: Photo) -> None:
+    _adjust_ref_counts(connection, [target.file_url], [])
+
+@event.listens_for(Photo, "after_update")
+def _photo_updated(mapper, connection, target: Photo) -> None:
+    history = inspect(target).attrs.file_url.history
+    if history.has_changes():
+        _adjust_ref_counts(connection, history.added, history.deleted)
+
+@event.listens_for(Photo, "after_delete")
+def _photo_deleted(mapper, connection, target: Photo) -> None:
+    _adjust_ref_counts(connection, [], [target.file_url])
+
+@event.listens_for(Report, "after_insert")
+def _report_inserted(mapper, connection, target: Report) -> None:
+    _adjust_ref_counts(connection, target.generated_files or [], [])
+
+@event.listens_for(Report, "after_update")
+def _report_updated(mapper, connection, target: Report) -> None:
+    # JSON columns only register reassignment, not in-place appends
+    history = inspect(target).attrs.generated_files.history
+    if history.has_changes():
+        _adjust_ref_counts(connection, _file_lists(history.added), _file_lists(history.deleted))
+
+@event.listens_for(Report, "after_delete")
+def _report_deleted(mapper, connection, target: Report) -> None:
+    _adjust_ref_counts(connection, [], target.generated_files or [])
+
+async def recount_references(db: AsyncSession) -> Dict[str, int]:
+    """Rebuild every ref_count from the referencing tables. Returns the new non-zero counts."""
+    counts: Counter = Counter()
+    for (file_url,) in await db.execute(select(Photo.file_url)):
+        counts[sha256_from_url(file_url)] += 1
+    for (generated_files,) in await db.execute(select(Report.generated_files)):
+        for url in generated_files or []:
+            counts[sha256_from_url(url)] += 1
+    counts.pop(None, None)
+
+    await db.execute(update(Blob).values(ref_count=0))
+    for sha256, count in counts.items():
+        await db.execute(update(Blob).where(Blob.sha256 == sha256).values(ref_count=count))
+    await db.commit()
+    return dict(counts)
+
+async def collect_garbage(db: AsyncSession, grace: timedelta, dry_run: bool = False) -> List[str]:
+    """
+    Delete blobs that nothing references and nobody has touched within `grace`,
+    plus abandoned incoming files. Returns the URLs of the removed blobs.
+    """
+    cutoff = datetime.now(timezone.utc) - grace
+    candidates = (await db.execute(
+        select(Blob.sha256, Blob.extension).where(Blob.ref_count <= 0, Blob.touched_at < cutoff)
+    )).all()
+
+    removed = []
+    for sha256, extension in candidates:
+        if not dry_run:
+            # Conditions are re-checked by the delete itself, so a blob referenced or
+            # re-uploaded since the select survives. The file goes while the row lock
+            # is held; an upload of the same content waits and then writes it afresh.
+            result = await db.execute(
+                delete(Blob).where(Blob.sha256 == sha256, Blob.ref_count <= 0, Blob.touched_at < cutoff)
+            )
+            if result.rowcount == 1:
+                # Cascades on PostgreSQL; SQLite doesn't enforce foreign keys here
+                await db.execute(delete(BlobUploader).where(BlobUploader.sha256 == sha256))
+                await get_storage().delete(blob_key(sha256, extension))
+                for name in DERIVATIVES:
+                    await get_storage().delete(derivative_key(sha256, name))
+            await db.commit()
+            if result.rowcount != 1:
+                continue
+        removed.append(blob_url(sha256, extension))
+
+    if not dry_run and os.path.isdir(INCOMING_DIR):
+        for name in os.listdir(INCOMING_DIR):
+            path = os.path.join(INCOMING_DIR, name)
+            if datetime.fromtimestamp(os.path.getmtime(path), timezone.utc) < cutoff:
+                os.remove(path)
+    return removed
@@ -0,0 +1,215 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import anyio
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.comparable import Comparable
+from app.schemas.comparable import ComparableCreate
+from app.services.uploads import UPLOAD_CHUNK_SIZE, MultipartEvent, PartData, PartEnd, UploadError
+
+SUPPORTED_FORMATS = ("csv", "xlsx", "ndjson")
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# XLSX is a zip and needs a seekable file; spooled copies past this size go to disk
+XLSX_SPOOL_SIZE = 8 * 1024 * 1024
+
+# Columns that usually arrive as dates in spreadsheets rather than full timestamps
+DATETIME_FIELDS = ("sale_date",)
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension == ".csv" or content_type == "text/csv":
+        return "csv"
+    if extension == ".xlsx" or content_type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet":
+        return "xlsx"
+    if extension in (".ndjson", ".jsonl") or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+class MultipartFileReader(io.RawIOBase):
+    """
+    Blocking file over the data of the current part of a streamed multipart
+    request, for the row readers running in a worker thread. Each read pulls
+    the next chunk from the request on the event loop, so rows are parsed as
+    the body arrives. Raises UploadError(413) once more than max_size bytes
+    have been read.
+    """
+
+    def __init__(self, events: AsyncIterator[MultipartEvent], max_size: int):
+        self._events = events
+        self._pending = b""
+        self._done = False
+        self.max_size = max_size
+        self.size = 0
+
+    def readable(self) -> bool:
+        return True
+
+    async def _next_chunk(self) -> bytes:
+        async for event in self._events:
+            if isinstance(event, PartData):
+                return event.data
+            if isinstance(event, PartEnd):
+                break
+        self._done = True
+        return b""
+
+    def readinto(self, buffer) -> int:
+        while not self._pending and not self._done:
+            self._pending = anyio.from_thread.run(self._next_chunk)
+            self.size += len(self._pending)
+            if self.size > self.max_size:
+                raise UploadError(413, "File too large")
+        count = min(len(buffer), len(self._pending))
+        buffer[:count] = self._pending[:count]
+        self._pending = self._pending[count:]
+        return count
+
+def open_upload(reader: MultipartFileReader, format: str) -> BinaryIO:
+    """Buffered file for iter_rows; runs in a worker thread, as XLSX is copied out first."""
+    file = io.BufferedReader(reader, UPLOAD_CHUNK_SIZE)
+    if format != "xlsx":
+        return file
+    spooled = tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_SIZE)
+    shutil.copyfileobj(file, spooled, UPLOAD_CHUNK_SIZE)
+    spooled.seek(0)
+    return spooled
+
+def normalize_header(name: Any) -> str:
+    return str(name or "").strip().lower().replace(" ", "_")
+
+def normalize_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    values = {}
+    for key, value in row.items():
+        if isinstance(value, str):
+            value = value.strip()
+            if value == "":
+                continue
+        if value is None:
+            continue
+        values[key] = value
+    for field in DATETIME_FIELDS:
+        value = values.get(field)
+        # Accept plain dates ("2024-11-15"), which pydantic rejects for datetime fields
+        if isinstance(value, str) and len(value) == 10:
+            try:
+                values[field] = datetime.fromisoformat(value)
+            except ValueError:
+                pass
+    return values
+
+def iter_csv(file: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    header = [normalize_header(name) for name in next(reader, [])]
+    for row_number, values in enumerate(reader, start=2):
+        if not any(values):
+            continue
+        yield row_number, dict(zip(header, values))
+
+def iter_ndjson(file: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    text = io.TextIOWrapper(file, encoding="utf-8-sig")
+    for row_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, ValueError(f"Invalid JSON: {e.msg}")
+
+def iter_xlsx(file: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("XLSX import requires openpyxl")
+
+    # read_only mode streams rows from the sheet XML instead of loading the workbook
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [normalize_header(name) for name in next(rows, ())]
+        for row_number, values in enumerate(rows, start=2):
+            if not any(value not in (None, "") for value in values):
+                continue
+            yield row_number, {key: value for key, value in zip(header, values) if key}
+    finally:
+        workbook.close()
+
+ROW_READERS = {"csv": iter_csv, "xlsx": iter_xlsx, "ndjson": iter_ndjson}
+
+def iter_rows(file: BinaryIO, format: str) -> Iterator[Tuple[int, Any]]:
+    return ROW_READERS[format](file)
+
+def read_batch(
+    rows: Iterator[Tuple[int, Any]],
+    report_id: uuid.UUID,
+    size: int = BATCH_SIZE
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], bool]:
+    """
+    Pull up to `size` rows from the reader and validate them against
+    ComparableCreate. Returns (valid rows ready for insert, row errors, exhausted).
+    """
+    valid, errors = [], []
+    for _ in range(size):
+        try:
+            row_number, row = next(rows)
+        except StopIteration:
+            return valid, errors, True
+
+        if isinstance(row, Exception):
+            errors.append({"row": row_number, "errors": [str(row)]})
+            continue
+        if not isinstance(row, dict):
+            errors.append({"row": row_number, "errors": ["Row must be an object"]})
+            continue
+
+        try:
+            comparable = ComparableCreate(**{**normalize_row(row), "report_id": report_id})
+        except ValidationError as e:
+            errors.append({
+                "row": row_number,
+                "errors": [f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()]
+            })
+            continue
+
+        values = comparable.model_dump()
+        for field in DATETIME_FIELDS:
+            # sale_date is a naive timestamp column; store offsets as UTC
+            if values[field].tzinfo is not None:
+                values[field] = values[field].astimezone(timezone.utc).replace(tzinfo=None)
+        valid.append({"id": uuid.uuid4(), **values})
+    return valid, errors, False
+
+async def copy_comparables(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    columns = list(rows[0].keys())
+    # SQLAlchemy persists Enum columns by member name
+    records = [
+        tuple(value.name if isinstance(value, Enum) else value for value in (row[column] for column in columns))
+        for row in rows
+    ]
+    await raw.driver_connection.copy_records_to_table(
+        Comparable.__tablename__, records=records, columns=columns
+    )
+
+async def insert_comparables(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    connection = await db.connection()
+    if connection.dialect.name == "postgresql":
+        await copy_comparables(db, rows)
+    else:
+        # executemany; SQLAlchemy batches these into multi-row INSERTs
+        await db.execute(insert(Comparable), rows)
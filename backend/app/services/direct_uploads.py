@@ -0,0 +1,137 @@
+import base64
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.blob import Blob
+from app.models.direct_upload import DirectUpload
+from app.services.blob_store import blob_info, blob_key, find_blob, link_uploader, register_blob
+from app.services.storage import get_storage
+from app.services.uploads import SNIFF_BYTES, UploadError, sniff_content_type
+
+settings = get_settings()
+
+# Time to call complete after the presigned URL itself has expired
+COMPLETE_GRACE = timedelta(hours=1)
+# Allowance for the bucket's clock (and its whole-second LastModified) against ours
+CLOCK_SKEW = timedelta(seconds=5)
+
+def _direct_storage():
+    storage = get_storage()
+    if not storage.direct_uploads:
+        raise UploadError(400, "Direct uploads need the S3 storage backend")
+    return storage
+
+def _extension(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in settings.ALLOWED_EXTENSIONS:
+        raise UploadError(400, "File type not allowed")
+    return extension
+
+async def _discard_object(db: AsyncSession, key: str, sha256: str, extension: str) -> None:
+    # A stored blob of this content lives at the same key; a bad PUT or a bogus
+    # complete must not delete another user's file
+    stored = await db.scalar(select(Blob.sha256).where(Blob.sha256 == sha256, Blob.extension == extension))
+    if stored is None:
+        await get_storage().delete(key)
+
+async def start_direct_upload(
+    db: AsyncSession,
+    user_id: Any,
+    filename: str,
+    size: int,
+    sha256: str,
+    content_type: Optional[str] = None
+) -> dict:
+    """
+    Presigned PUT straight to the bucket for content the client has hashed.
+    Content the user already has comes back as a finished upload instead.
+    """
+    storage = _direct_storage()
+    extension = _extension(filename)
+    if size > settings.RESUMABLE_MAX_FILE_SIZE:
+        raise UploadError(413, "File too large")
+
+    blob = await find_blob(db, sha256, user_id)
+    if blob is not None:
+        return {**blob_info(blob), "filename": filename, "deduplicated": True, "upload": None}
+
+    upload = storage.upload_url(blob_key(sha256, extension), content_type or "application/octet-stream", sha256)
+    db.add(DirectUpload(
+        user_id=user_id,
+        sha256=sha256,
+        extension=extension,
+        expires_at=datetime.now(timezone.utc) + timedelta(seconds=settings.PRESIGNED_URL_EXPIRE_SECONDS) + COMPLETE_GRACE
+    ))
+    await db.commit()
+    return {"sha256": sha256, "filename": filename, "deduplicated": False, "upload": upload}
+
+async def complete_direct_upload(db: AsyncSession, user_id: Any, filename: str, sha256: str) -> Tuple[Blob, bool]:
+    """Record an object the client has PUT to the bucket, with a URL from start_direct_upload, as an upload of `user_id`."""
+    storage = _direct_storage()
+    extension = _extension(filename)
+    key = blob_key(sha256, extension)
+
+    started = await db.scalar(
+        select(DirectUpload.created_at)
+        .where(
+            DirectUpload.user_id == user_id,
+            DirectUpload.sha256 == sha256,
+            DirectUpload.extension == extension,
+            DirectUpload.expires_at > datetime.now(timezone.utc)
+        )
+        .order_by(DirectUpload.created_at.desc())
+        .limit(1)
+    )
+    if started is None:
+        raise UploadError(404, "No direct upload was started for this file")
+
+    head = await storage.head(key)
+    # An object older than the user's start was put there by someone else
+    if head is None or head["LastModified"] < started.replace(tzinfo=started.tzinfo or timezone.utc) - CLOCK_SKEW:
+        raise UploadError(404, "Upload not found in storage")
+    if head["ContentLength"] > settings.RESUMABLE_MAX_FILE_SIZE:
+        await _discard_object(db, key, sha256, extension)
+        raise UploadError(413, "File too large")
+    # The presigned PUT has S3 verify the body against the checksum. Backends
+    # that don't report one (some S3 stand-ins) get the object hashed here
+    checksum = head.get("ChecksumSHA256")
+    if checksum:
+        matches = base64.b64decode(checksum).hex() == sha256
+    else:
+        matches = await storage.sha256(key) == sha256
+    if not matches:
+        await _discard_object(db, key, sha256, extension)
+        raise UploadError(422, "Uploaded content does not match the declared SHA-256")
+
+    # Only the first bytes cross the API, for the same content check as other uploads
+    try:
+        content_type = sniff_content_type(await storage.read_range(key, SNIFF_BYTES), extension)
+    except UploadError:
+        await _discard_object(db, key, sha256, extension)
+        raise
+
+    blob = await register_blob(db, sha256, head["ContentLength"], extension, content_type)
+    linked = await link_uploader(db, blob.sha256, user_id)
+    await db.execute(delete(DirectUpload).where(DirectUpload.user_id == user_id, DirectUpload.sha256 == sha256))
+    await db.commit()
+    # A blob first stored under another extension keeps its own object
+    if blob.extension != extension:
+        await storage.delete(key)
+        return blob, linked
+    return blob, True
+
+async def expire_direct_uploads(db: AsyncSession) -> List[UUID]:
+    """Drop direct uploads that were started but never completed. Returns their ids."""
+    expired = (await db.execute(
+        delete(DirectUpload)
+        .where(DirectUpload.expires_at <= datetime.now(timezone.utc))
+        .returning(DirectUpload.id)
+    )).scalars().all()
+    await db.commit()
+    return list(expired)
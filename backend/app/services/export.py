@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, AsyncIterator, List
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.sql import Select
+
+from app.core.database import AsyncSessionLocal
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+YIELD_PER = 500
+
+def format_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+async def stream_rows(
+    statement: Select,
+    columns: List[str],
+    format: str,
+    session_factory: async_sessionmaker = AsyncSessionLocal
+) -> AsyncIterator[str]:
+    """
+    Stream the statement's rows as CSV or NDJSON, one chunk per fetched partition.
+
+    Runs on its own session because the response body is produced after the
+    request's dependencies may have been torn down; callers pass a replica
+    factory to keep exports off the primary. Rows come through a
+    server-side cursor (yield_per), so memory stays flat regardless of row count.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if format == "csv" else None
+    if writer:
+        writer.writerow(columns)
+
+    async with session_factory() as db:
+        result = await db.stream(statement.execution_options(yield_per=YIELD_PER))
+        async for partition in result.mappings().partitions():
+            for row in partition:
+                values = [format_value(row[column]) for column in columns]
+                if writer:
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, values))))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
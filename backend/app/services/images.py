@@ -0,0 +1,73 @@
+import io
+import os
+from typing import Dict, NamedTuple
+
+from PIL import Image, ImageOps
+
+# Imported by the image worker processes; keep this module free of app
+# imports (settings, database) so workers start quickly.
+
+class Variant(NamedTuple):
+    max_side: int
+    format: str
+    extension: str
+    quality: int
+
+# Largest first: each variant is downscaled from the previous one
+DERIVATIVES: Dict[str, Variant] = {
+    # Report pages: JPEG, which PDF embeds as-is without re-encoding
+    "print": Variant(2400, "JPEG", ".jpg", 85),
+    # Photo viewer and report preview
+    "medium": Variant(1280, "WEBP", ".webp", 80),
+    # Grids
+    "thumb": Variant(320, "WEBP", ".webp", 75),
+}
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+def derivative_key(sha256: str, name: str) -> str:
+    # Outside the blob layout, so derivative URLs are never taken for blob references
+    return f"derivatives/{sha256[:2]}/{sha256[2:4]}/{sha256}/{name}{DERIVATIVES[name].extension}"
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        # Transparent areas become white rather than whatever colour hides under alpha 0
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB") if image.mode != "RGB" else image
+
+def render_derivatives(source_path: str, output_dir: str) -> Dict[str, str]:
+    """
+    Decode an image once and write every derivative into output_dir, upright
+    (EXIF orientation applied) and stripped of metadata. Returns name -> path.
+    """
+    paths = {}
+    with Image.open(source_path) as original:
+        largest = max(variant.max_side for variant in DERIVATIVES.values())
+        # JPEG can decode at 1/2, 1/4 or 1/8 scale directly; far cheaper for 12MP photos
+        original.draft("RGB", (largest, largest))
+        icc_profile = original.info.get("icc_profile")
+        image = _to_rgb(ImageOps.exif_transpose(original))
+
+        for name, variant in DERIVATIVES.items():
+            image.thumbnail((variant.max_side, variant.max_side), Image.LANCZOS, reducing_gap=3.0)
+            path = os.path.join(output_dir, f"{name}{variant.extension}")
+            options = {"quality": variant.quality, "icc_profile": icc_profile}
+            if variant.format == "JPEG":
+                options.update(optimize=True, progressive=True)
+            image.save(path, variant.format, **options)
+            paths[name] = path
+    return paths
+
+def print_copy(data: bytes) -> bytes:
+    """The print derivative of an image held in memory, for photos rendered before it existed."""
+    variant = DERIVATIVES["print"]
+    with Image.open(io.BytesIO(data)) as original:
+        original.draft("RGB", (variant.max_side, variant.max_side))
+        image = _to_rgb(ImageOps.exif_transpose(original))
+        image.thumbnail((variant.max_side, variant.max_side), Image.LANCZOS, reducing_gap=3.0)
+        buffer = io.BytesIO()
+        image.save(buffer, variant.format, quality=variant.quality)
+        return buffer.getvalue()
@@ -0,0 +1,367 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID
+
+import anyio
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.job import Job, JobStatus
+from app.models.report import Report
+from app.schemas.job import Job as JobSchema
+from app.services.blob_store import INCOMING_DIR, blob_info, blob_key, sha256_from_url, store_blob
+from app.services.report_documents import load_report_document
+from app.services.report_docx import DOCX_MEDIA_TYPE, TemplateError, render_report_docx
+from app.services.report_pdf import render_report_pdf
+from app.services.storage import get_storage
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+FINISHED = (JobStatus.SUCCEEDED, JobStatus.FAILED)
+# Progress is written to the table (renewing the lease) at most this often
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+class JobError(Exception):
+    """A failure that retrying won't fix (missing report, broken template); the job fails at once."""
+
+class LeaseLost(Exception):
+    """Another worker took the job over after this one's lease lapsed."""
+
+Progress = Callable[[float, Optional[str]], None]
+JobHandler = Callable[[Job, Progress], Awaitable[dict]]
+
+async def enqueue_job(db: AsyncSession, user_id: UUID, kind: str, report_id: Optional[UUID] = None) -> Job:
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind {kind}")
+    job = Job(
+        user_id=user_id,
+        report_id=report_id,
+        kind=kind,
+        status=JobStatus.QUEUED,
+        progress=0,
+        attempts=0,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        run_after=datetime.now(timezone.utc)
+    )
+    db.add(job)
+    await db.commit()
+    _wakeup.set()
+    return job
+
+async def get_job(db: AsyncSession, job_id: UUID, user_id: UUID) -> Optional[Job]:
+    return await db.scalar(select(Job).where(Job.id == job_id, Job.user_id == user_id))
+
+async def describe_job(job: Job) -> dict:
+    """The API view of a job, with a download link to a finished job's file."""
+    data = JobSchema.model_validate(job).model_dump(mode="json")
+    result = job.result or {}
+    sha256 = sha256_from_url(result.get("file_url"))
+    if job.status == JobStatus.SUCCEEDED and sha256:
+        extension = os.path.splitext(result["file_url"])[1]
+        url = await get_storage().download_url(blob_key(sha256, extension), result.get("filename"))
+        data["download_url"] = url or result["file_url"]
+    return data
+
+# Report files
+
+REPORT_FORMATS = {
+    # kind: (extension, media type)
+    "report_pdf": (".pdf", "application/pdf"),
+    "report_docx": (".docx", DOCX_MEDIA_TYPE),
+}
+
+async def generate_report_file(job: Job, progress: Progress) -> dict:
+    """Render the report into a blob. The caller appends it to the report's generated_files."""
+    extension, media_type = REPORT_FORMATS[job.kind]
+    # The primary, not a replica: the user has usually just saved the report
+    async with AsyncSessionLocal() as db:
+        document = await load_report_document(db, job.report_id, job.user_id)
+    if document is None:
+        raise JobError("Report not found")
+
+    def report_progress(fraction: float) -> None:
+        progress(fraction * 0.95, "Rendering")
+
+    if job.kind == "report_pdf":
+        chunks = render_report_pdf(document, progress=report_progress)
+    else:
+        chunks = render_report_docx(document, progress=report_progress)
+
+    os.makedirs(INCOMING_DIR, exist_ok=True)
+    path = os.path.join(INCOMING_DIR, f"job-{job.id}{extension}")
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, "wb") as file:
+            async for chunk in chunks:
+                sha256.update(chunk)
+                size += len(chunk)
+                await anyio.to_thread.run_sync(file.write, chunk)
+        progress(0.95, "Saving")
+        async with AsyncSessionLocal() as db:
+            blob, _ = await store_blob(db, path, sha256.hexdigest(), size, extension, media_type, job.user_id)
+    except TemplateError as e:
+        raise JobError(f"Report template is invalid: {e}")
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M")
+    filename = f"{document.report.reference_number or 'report'}-{stamp}{extension}".replace("/", "-")
+    return {**blob_info(blob), "filename": filename}
+
+JOB_HANDLERS: Dict[str, JobHandler] = {
+    "report_pdf": generate_report_file,
+    "report_docx": generate_report_file,
+}
+
+# Queue mechanics. Any number of workers, in the API processes and in
+# scripts/run_job_worker.py, share the table; claims are conditional updates,
+# so a job goes to exactly one of them.
+
+# Set when this process queues a job, so an idle worker here starts it at once
+_wakeup = asyncio.Event()
+
+def _runnable(now: datetime):
+    return or_(
+        and_(Job.status == JobStatus.QUEUED, Job.run_after <= now),
+        # The worker died (or hung) without finishing; its lease lapsed
+        and_(Job.status == JobStatus.RUNNING, Job.lease_expires_at < now),
+    )
+
+async def claim_job(db: AsyncSession, worker_id: str) -> Optional[Job]:
+    now = datetime.now(timezone.utc)
+    query = select(Job.id).where(_runnable(now)).order_by(Job.run_after).limit(1)
+    if db.bind.dialect.name == "postgresql":
+        # Concurrent workers skip each other's candidates instead of queueing on the row lock
+        query = query.with_for_update(skip_locked=True)
+    job_id = await db.scalar(query)
+    if job_id is None:
+        await db.rollback()
+        return None
+
+    # Re-checked by the update, so a job claimed in the meantime is left alone
+    claimed = await db.execute(
+        update(Job)
+        .where(Job.id == job_id, _runnable(now))
+        .values(
+            status=JobStatus.RUNNING,
+            attempts=Job.attempts + 1,
+            locked_by=worker_id,
+            lease_expires_at=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+            started_at=now,
+            progress=0,
+            message=None
+        )
+        .returning(Job)
+    )
+    job = claimed.scalar_one_or_none()
+    await db.commit()
+    return job
+
+async def _update_owned(job: Job, worker_id: str, **values) -> None:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(Job).where(Job.id == job.id, Job.locked_by == worker_id).values(**values)
+        )
+        await db.commit()
+    if result.rowcount != 1:
+        raise LeaseLost()
+
+async def _complete(job: Job, worker_id: str, result: dict) -> None:
+    async with AsyncSessionLocal() as db:
+        # Keeps the owner's reads on the primary in this process; other processes
+        # learn of the write through the finished job (see get_job_status)
+        db.info["user_id"] = job.user_id
+        # The file goes onto the report in the same transaction that finishes the job
+        if job.report_id is not None and result.get("file_url"):
+            report = await db.scalar(select(Report).where(Report.id == job.report_id).with_for_update())
+            if report is None:
+                raise JobError("Report not found")
+            # Reassigned, not appended: JSON columns only track reassignment
+            report.generated_files = [*(report.generated_files or []), result["file_url"]]
+        finished = await db.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.locked_by == worker_id)
+            .values(
+                status=JobStatus.SUCCEEDED,
+                progress=1.0,
+                message=None,
+                result=result,
+                error=None,
+                locked_by=None,
+                lease_expires_at=None,
+                finished_at=datetime.now(timezone.utc)
+            )
+        )
+        if finished.rowcount != 1:
+            await db.rollback()
+            raise LeaseLost()
+        await db.commit()
+
+async def _fail(job: Job, worker_id: str, error: str, retry: bool) -> None:
+    now = datetime.now(timezone.utc)
+    if retry:
+        delay = settings.JOB_RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1)
+        values = dict(status=JobStatus.QUEUED, run_after=now + timedelta(seconds=delay), message="Retrying")
+    else:
+        values = dict(status=JobStatus.FAILED, finished_at=now, message=None)
+    await _update_owned(job, worker_id, error=error, locked_by=None, lease_expires_at=None, **values)
+
+async def _report_progress(job: Job, worker_id: str, state: dict) -> None:
+    """Write the latest progress every interval; each write also renews the lease."""
+    while True:
+        await asyncio.sleep(PROGRESS_INTERVAL_SECONDS)
+        try:
+            await _update_owned(
+                job, worker_id,
+                progress=state["progress"],
+                message=state["message"],
+                lease_expires_at=datetime.now(timezone.utc) + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+            )
+        except LeaseLost:
+            raise
+        except Exception:
+            # A missed update is harmless as long as the lease hasn't lapsed
+            logger.exception("Could not record progress of job %s", job.id)
+
+async def run_job(job: Job, worker_id: str) -> None:
+    state = {"progress": 0.0, "message": "Starting"}
+
+    def progress(fraction: float, message: Optional[str] = None) -> None:
+        state["progress"] = round(min(max(fraction, 0.0), 1.0), 3)
+        state["message"] = message
+
+    handler = JOB_HANDLERS.get(job.kind)
+    reporter = asyncio.create_task(_report_progress(job, worker_id, state))
+    work = None
+    try:
+        if handler is None:
+            raise JobError(f"Unknown job kind {job.kind}")
+        if job.attempts > job.max_attempts:
+            # Reclaimed after its worker died on the last attempt
+            raise JobError("Worker stopped while running the job")
+        work = asyncio.create_task(handler(job, progress))
+        # Whichever ends first: the job, or the reporter finding the lease taken over
+        await asyncio.wait((work, reporter), timeout=settings.JOB_TIMEOUT_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+        if reporter.done():
+            reporter.result()
+        if not work.done():
+            raise asyncio.TimeoutError()
+        result = work.result()
+        reporter.cancel()
+        await _complete(job, worker_id, result)
+        logger.info("Job %s (%s) succeeded on attempt %d", job.id, job.kind, job.attempts)
+    except LeaseLost:
+        logger.warning("Job %s was taken over by another worker", job.id)
+    except asyncio.CancelledError:
+        # Shutting down: hand the job back without counting this attempt
+        try:
+            await _update_owned(
+                job, worker_id, status=JobStatus.QUEUED, attempts=Job.attempts - 1, locked_by=None,
+                lease_expires_at=None, message=None
+            )
+        except LeaseLost:
+            pass
+        raise
+    except Exception as e:
+        retry = not isinstance(e, JobError) and job.attempts < job.max_attempts
+        if isinstance(e, JobError):
+            error = str(e)
+        elif isinstance(e, asyncio.TimeoutError):
+            error = f"Timed out after {settings.JOB_TIMEOUT_SECONDS:g}s"
+        else:
+            error = f"{type(e).__name__}: {e}"
+        logger.exception("Job %s (%s) failed on attempt %d%s", job.id, job.kind, job.attempts, ", retrying" if retry else "")
+        try:
+            await _fail(job, worker_id, error, retry)
+        except LeaseLost:
+            pass
+    finally:
+        reporter.cancel()
+        if work is not None:
+            work.cancel()
+
+async def prune_jobs(db: AsyncSession) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.JOB_RETENTION_HOURS)
+    result = await db.execute(delete(Job).where(Job.status.in_(FINISHED), Job.finished_at < cutoff))
+    await db.commit()
+    return result.rowcount
+
+async def job_worker(worker_id: str) -> None:
+    """Background loop: run jobs until cancelled, sleeping while the queue is empty."""
+    last_prune = 0.0
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                job = await claim_job(db, worker_id)
+                if job is None and time.monotonic() - last_prune > 3600:
+                    last_prune = time.monotonic()
+                    await prune_jobs(db)
+        except Exception:
+            # Database unavailable; try again after the poll interval
+            logger.exception("Job worker %s could not claim a job", worker_id)
+            job = None
+
+        if job is not None:
+            await run_job(job, worker_id)
+            continue
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.JOB_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+def start_job_workers(count: int) -> List[asyncio.Task]:
+    prefix = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    return [asyncio.create_task(job_worker(f"{prefix}:{index}")) for index in range(count)]
+
+async def stop_job_workers(workers: List[asyncio.Task]) -> None:
+    for worker in workers:
+        worker.cancel()
+    # Running jobs are handed back to the queue as the workers unwind
+    await asyncio.gather(*workers, return_exceptions=True)
+
+# Server-sent events
+
+EVENTS_POLL_SECONDS = 0.5
+EVENTS_KEEPALIVE_SECONDS = 15
+
+async def job_events(job_id: UUID) -> AsyncIterator[bytes]:
+    """
+    SSE stream of a job's state: an event whenever it changes, ending with
+    the finished job. Polls the table, since the job may run in any process.
+    """
+    yield b"retry: 2000\n\n"
+    last = None
+    last_sent = time.monotonic()
+    while True:
+        # A session per poll, so an open stream doesn't hold a pooled connection
+        async with AsyncSessionLocal() as db:
+            job = await db.get(Job, job_id)
+        if job is None:
+            return
+        data = await describe_job(job)
+        if data != last:
+            event = "done" if job.status in FINISHED else "progress"
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+            last = data
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent > EVENTS_KEEPALIVE_SECONDS:
+            # Comment line; keeps proxies from closing an idle stream
+            yield b": keepalive\n\n"
+            last_sent = time.monotonic()
+        if job.status in FINISHED:
+            return
+        await asyncio.sleep(EVENTS_POLL_SECONDS)
@@ -0,0 +1,155 @@
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+# A4 in points
+PAGE_WIDTH = 595.28
+PAGE_HEIGHT = 841.89
+
+# Advance widths (1/1000 em) of the standard Helvetica faces for ASCII 32-126.
+# Standard 14 fonts need no embedding, which keeps every PDF small and fast to write.
+_HELVETICA = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+_HELVETICA_BOLD = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+
+# Resource name -> (base font, widths)
+FONTS = {
+    "F1": ("Helvetica", _HELVETICA),
+    "F2": ("Helvetica-Bold", _HELVETICA_BOLD),
+}
+
+def text_width(text: str, font: str, size: float) -> float:
+    widths = FONTS[font][1]
+    total = 0
+    for char in text:
+        code = ord(char)
+        # Accented Latin-1 letters are close enough to the average glyph
+        total += widths[code - 32] if 32 <= code <= 126 else 556
+    return total * size / 1000
+
+def escape_text(text: str) -> bytes:
+    """A PDF string literal body in WinAnsiEncoding; unsupported characters become '?'."""
+    encoded = text.encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+class PdfImage(NamedTuple):
+    """A baseline JPEG, embedded as-is (DCTDecode) without decoding it."""
+    data: bytes
+    width: int
+    height: int
+    components: int = 3
+
+class PdfWriter:
+    """
+    Writes a PDF front to back. Each page and its images are returned as bytes
+    the moment they are added, so a response can stream them; only the byte
+    offsets of written objects are kept, not the objects themselves. The page
+    tree is written last, which PDF readers handle through the xref table.
+    """
+
+    CATALOG, PAGES, FIRST_FONT = 1, 2, 3
+
+    def __init__(self):
+        self.position = 0
+        self.offsets: Dict[int, int] = {}
+        self.page_ids: List[int] = []
+        self.next_id = self.FIRST_FONT + len(FONTS)
+
+    def _allocate(self) -> int:
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    def _emit(self, chunks: List[bytes], data: bytes) -> None:
+        chunks.append(data)
+        self.position += len(data)
+
+    def _object(self, chunks: List[bytes], object_id: int, body: bytes, stream: Optional[bytes] = None) -> None:
+        self.offsets[object_id] = self.position
+        if stream is None:
+            self._emit(chunks, b"%d 0 obj\n%s\nendobj\n" % (object_id, body))
+        else:
+            self._emit(chunks, b"%d 0 obj\n%s\nstream\n" % (object_id, body))
+            self._emit(chunks, stream)
+            self._emit(chunks, b"\nendstream\nendobj\n")
+
+    def start(self) -> bytes:
+        chunks: List[bytes] = []
+        # The binary comment tells transfer tools not to treat the file as text
+        self._emit(chunks, b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        for index, (name, (base_font, _)) in enumerate(FONTS.items()):
+            self._object(
+                chunks, self.FIRST_FONT + index,
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % base_font.encode()
+            )
+        return b"".join(chunks)
+
+    def add_page(self, content: bytes, images: Optional[Dict[str, PdfImage]] = None) -> bytes:
+        """One page from its content stream and the images it draws by name (/Im1 Do)."""
+        chunks: List[bytes] = []
+        xobjects = []
+        for name, image in (images or {}).items():
+            image_id = self._allocate()
+            color_space = {1: b"/DeviceGray", 4: b"/DeviceCMYK"}.get(image.components, b"/DeviceRGB")
+            self._object(
+                chunks, image_id,
+                b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s "
+                b"/BitsPerComponent 8 /Filter /DCTDecode /Length %d >>"
+                % (image.width, image.height, color_space, len(image.data)),
+                image.data
+            )
+            xobjects.append(b"/%s %d 0 R" % (name.encode(), image_id))
+
+        compressed = zlib.compress(content, 6)
+        content_id = self._allocate()
+        self._object(chunks, content_id, b"<< /Length %d /Filter /FlateDecode >>" % len(compressed), compressed)
+
+        fonts = b" ".join(b"/%s %d 0 R" % (name.encode(), self.FIRST_FONT + index) for index, name in enumerate(FONTS))
+        resources = b"/Font << %s >>" % fonts
+        if xobjects:
+            resources += b" /XObject << %s >>" % b" ".join(xobjects)
+        page_id = self._allocate()
+        self._object(
+            chunks, page_id,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] /Resources << %s >> /Contents %d 0 R >>"
+            % (self.PAGES, PAGE_WIDTH, PAGE_HEIGHT, resources, content_id)
+        )
+        self.page_ids.append(page_id)
+        return b"".join(chunks)
+
+    def finish(self, title: str = "", author: str = "") -> bytes:
+        chunks: List[bytes] = []
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        self._object(chunks, self.PAGES, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids)))
+        self._object(chunks, self.CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES)
+        info_id = self._allocate()
+        created = datetime.now(timezone.utc).strftime("D:%Y%m%d%H%M%SZ").encode()
+        self._object(
+            chunks, info_id,
+            b"<< /Title (%s) /Author (%s) /Producer (ValuerPro) /CreationDate (%s) >>"
+            % (escape_text(title), escape_text(author), created)
+        )
+
+        xref_position = self.position
+        entries = [b"xref\n0 %d\n0000000000 65535 f \n" % self.next_id]
+        entries += [b"%010d 00000 n \n" % self.offsets[object_id] for object_id in range(1, self.next_id)]
+        self._emit(chunks, b"".join(entries))
+        self._emit(
+            chunks,
+            b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (self.next_id, self.CATALOG, info_id, xref_position)
+        )
+        return b"".join(chunks)
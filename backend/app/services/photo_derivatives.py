@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Set
+
+import anyio
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.photo import Photo
+from app.services.blob_store import INCOMING_DIR, sha256_from_url
+from app.services.images import DERIVATIVES, IMAGE_EXTENSIONS, derivative_key, render_derivatives
+from app.services.storage import LocalStorage, get_storage
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Strong references, so scheduled tasks aren't garbage-collected mid-run
+_tasks: Set[asyncio.Task] = set()
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Decoding is CPU-bound and holds the GIL; a process pool keeps it off the API's core.
+        # Spawned rather than forked, since the parent has an event loop and DB connections.
+        _pool = ProcessPoolExecutor(
+            max_workers=max(settings.IMAGE_WORKERS, 1),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+def shutdown_image_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def derivative_urls(sha256: str) -> Dict[str, str]:
+    return {name: f"/uploads/{derivative_key(sha256, name)}" for name in DERIVATIVES}
+
+def has_derivatives(file_url: Optional[str]) -> bool:
+    """Whether derivatives can be made: an image stored as a content-addressed blob."""
+    return sha256_from_url(file_url) is not None and os.path.splitext(file_url)[1].lower() in IMAGE_EXTENSIONS
+
+async def _render(sha256: str, source_key: str) -> None:
+    storage = get_storage()
+    os.makedirs(INCOMING_DIR, exist_ok=True)
+    workdir = tempfile.mkdtemp(dir=INCOMING_DIR)
+    try:
+        if isinstance(storage, LocalStorage):
+            source_path = storage.path(source_key)
+        else:
+            source_path = os.path.join(workdir, "source")
+            await storage.download(source_key, source_path)
+
+        loop = asyncio.get_running_loop()
+        paths = await loop.run_in_executor(_get_pool(), render_derivatives, source_path, workdir)
+        for name, path in paths.items():
+            content_type = f"image/{DERIVATIVES[name].format.lower()}"
+            await storage.save(path, derivative_key(sha256, name), content_type)
+    finally:
+        await anyio.to_thread.run_sync(shutil.rmtree, workdir, True)
+
+async def generate_derivatives(
+    file_url: str,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+) -> Optional[Dict[str, str]]:
+    """
+    Make the derivatives of an uploaded photo, unless another photo of the same
+    content already did, and record their URLs on every photo using it.
+    """
+    if not has_derivatives(file_url):
+        return None
+    sha256 = sha256_from_url(file_url)
+    storage = get_storage()
+    # Keys are per content, so re-uploads and copies of a photo reuse the same files
+    existing = [await storage.exists(derivative_key(sha256, name)) for name in DERIVATIVES]
+    if not all(existing):
+        await _render(sha256, file_url.removeprefix("/uploads/"))
+
+    urls = derivative_urls(sha256)
+    async with session_factory() as db:
+        await db.execute(
+            update(Photo)
+            .where(Photo.file_url == file_url, Photo.derivatives.is_(None))
+            .values(derivatives=urls)
+        )
+        await db.commit()
+    return urls
+
+async def _generate_logged(file_url: str) -> None:
+    try:
+        await generate_derivatives(file_url)
+    except Exception:
+        # The photo stays usable; clients fall back to file_url until derivatives exist
+        logger.exception("Derivative generation failed for %s", file_url)
+
+def schedule_derivatives(file_url: str) -> None:
+    """Generate derivatives in the background once the photo row is committed."""
+    if not has_derivatives(file_url):
+        return
+    task = asyncio.create_task(_generate_logged(file_url))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
@@ -0,0 +1,320 @@
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models.report import Report
+from app.models.valuer_profile import ValuerProfile
+
+# Content shared by the PDF and DOCX renderers: the report aggregate, and the
+# bank-format sections built from it.
+
+class ReportDocument(NamedTuple):
+    report: Report
+    valuer: Optional[ValuerProfile]
+
+class Section(NamedTuple):
+    title: str
+    # ("fields", [(label, value)]), ("paragraph", text), ("list", [items]),
+    # ("table", (headers, rows)) or ("subheading", text)
+    blocks: List[Tuple[str, Any]]
+
+async def load_report_document(db: AsyncSession, report_id: UUID, user_id: UUID) -> Optional[ReportDocument]:
+    """The report with everything a generated document shows, or None if it isn't the user's."""
+    result = await db.scalars(
+        select(Report)
+        .where(Report.id == report_id, Report.user_id == user_id)
+        .options(
+            joinedload(Report.properties),
+            joinedload(Report.valuations),
+            selectinload(Report.comparables),
+            selectinload(Report.photos),
+            selectinload(Report.legal_aspects),
+            selectinload(Report.applicants),
+        )
+    )
+    report = result.unique().first()
+    if report is None:
+        return None
+    valuer = await db.scalar(select(ValuerProfile).where(ValuerProfile.user_id == user_id))
+    return ReportDocument(report, valuer)
+
+def format_value(value: Any) -> str:
+    if value is None or value == "" or value == []:
+        return "-"
+    if isinstance(value, bool):
+        return "Yes" if value else "No"
+    if isinstance(value, Enum):
+        return value.value.replace("_", " ").title()
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%d %B %Y")
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    if isinstance(value, (list, tuple)):
+        return ", ".join(format_value(item) for item in value)
+    if isinstance(value, dict):
+        return ", ".join(f"{key}: {format_value(item)}" for key, item in value.items())
+    return str(value)
+
+def format_money(value: Optional[float]) -> str:
+    return "-" if value is None else f"Rs. {value:,.2f}"
+
+def _items(values: Optional[Iterable]) -> List[str]:
+    return [format_value(value) for value in values or []]
+
+def report_title(document: ReportDocument) -> str:
+    report = document.report
+    return f"Valuation Report {report.reference_number}" if report.reference_number else report.title
+
+def valuer_name(document: ReportDocument) -> str:
+    valuer = document.valuer
+    if valuer is None:
+        return ""
+    return " ".join(part for part in (valuer.title, valuer.full_name) if part)
+
+def cover_fields(document: ReportDocument) -> List[Tuple[str, str]]:
+    report = document.report
+    return [
+        ("Report", report.title),
+        ("Reference number", format_value(report.reference_number)),
+        ("Prepared for", format_value(", ".join(filter(None, (report.bank_name, report.bank_branch))))),
+        ("Purpose of valuation", format_value(report.purpose)),
+        ("Date of inspection", format_value(report.inspection_date)),
+        ("Date of valuation", format_value(report.valuation_date)),
+        ("Date of report", format_value(report.report_date)),
+        ("Valuer", format_value(valuer_name(document))),
+    ]
+
+# Placeholders a DOCX template can use as {{ name }}; {{ body }} and {{ photos }}
+# stand alone in a paragraph and expand to the sections and the photographs
+CONTEXT_FIELDS = (
+    "report.title", "report.reference_number", "report.purpose", "report.bank_name", "report.bank_branch",
+    "report.inspection_date", "report.valuation_date", "report.report_date",
+    "applicant.name", "applicant.address", "applicant.nic_number",
+    "property.address", "property.lot_number", "property.plan_number", "property.district", "property.total_extent",
+    "valuation.total_market_value", "valuation.forced_sale_value", "valuation.insurance_value",
+    "valuer.name", "valuer.qualifications", "valuer.registration_number", "valuer.email", "valuer.telephone",
+    "today",
+)
+
+def report_context(document: ReportDocument) -> Dict[str, str]:
+    """Values for CONTEXT_FIELDS. Multi-valued records (applicants, properties) contribute their first entry."""
+    report = document.report
+    applicant = report.applicants[0] if report.applicants else None
+    prop = report.properties[0] if report.properties else None
+    valuation = report.valuations[0] if report.valuations else None
+    valuer = document.valuer
+
+    def attribute(record: Any, name: str) -> str:
+        return format_value(getattr(record, name, None)) if record is not None else "-"
+
+    return {
+        "report.title": report.title,
+        **{f"report.{name}": attribute(report, name) for name in (
+            "reference_number", "purpose", "bank_name", "bank_branch", "inspection_date", "valuation_date", "report_date"
+        )},
+        **{f"applicant.{name}": attribute(applicant, name) for name in ("name", "address", "nic_number")},
+        **{f"property.{name}": attribute(prop, name) for name in (
+            "address", "lot_number", "plan_number", "district", "total_extent"
+        )},
+        **{f"valuation.{name}": format_money(getattr(valuation, name, None)) for name in (
+            "total_market_value", "forced_sale_value", "insurance_value"
+        )},
+        "valuer.name": format_value(valuer_name(document)),
+        "valuer.qualifications": attribute(valuer, "qualifications"),
+        "valuer.registration_number": attribute(valuer, "registration_number"),
+        "valuer.email": attribute(valuer, "email"),
+        "valuer.telephone": attribute(valuer, "telephone_numbers"),
+        "today": format_value(date.today()),
+    }
+
+def report_sections(document: ReportDocument) -> List[Section]:
+    """The body of the report, in the order banks expect it."""
+    report = document.report
+    sections = []
+
+    blocks = []
+    for applicant in report.applicants:
+        if len(report.applicants) > 1:
+            blocks.append(("subheading", applicant.name))
+        blocks.append(("fields", [
+            ("Name", applicant.name),
+            ("Address", format_value(applicant.address)),
+            ("NIC number", format_value(applicant.nic_number)),
+            ("Contact numbers", format_value(applicant.contact_numbers)),
+            ("Email", format_value(applicant.email)),
+            ("Business", format_value(applicant.business_name)),
+            ("Business registration", format_value(applicant.business_registration)),
+        ]))
+    sections.append(Section("Applicant", blocks or [("paragraph", "No applicant recorded.")]))
+
+    for index, prop in enumerate(report.properties):
+        suffix = f" ({index + 1})" if len(report.properties) > 1 else ""
+        sections.append(Section(f"Identification of the Property{suffix}", [
+            ("fields", [
+                ("Lot number", format_value(prop.lot_number)),
+                ("Plan number", format_value(prop.plan_number)),
+                ("Plan date", format_value(prop.plan_date)),
+                ("Surveyor", format_value(prop.surveyor_name)),
+                ("Deed numbers", format_value(prop.deed_numbers)),
+            ]),
+        ]))
+        sections.append(Section(f"Location and Access{suffix}", [
+            ("fields", [
+                ("Address", format_value(prop.address)),
+                ("Village", format_value(prop.village)),
+                ("Grama Niladhari division", format_value(prop.gn_division)),
+                ("District", format_value(prop.district)),
+                ("Province", format_value(prop.province)),
+                ("Coordinates", f"{prop.latitude:.6f}, {prop.longitude:.6f}" if prop.latitude is not None and prop.longitude is not None else "-"),
+                ("Motorable road access", format_value(prop.road_access)),
+                ("Access", format_value(prop.access_description)),
+            ]),
+            *([("paragraph", f"Directions: {prop.directions_text}")] if prop.directions_text else []),
+        ]))
+        sections.append(Section(f"Description of the Property{suffix}", [
+            ("fields", [
+                ("Property type", format_value(prop.property_type)),
+                ("Extent", format_value(prop.total_extent)),
+                ("Extent (sq.ft)", format_value(prop.total_extent_sqft)),
+                ("Shape", format_value(prop.land_shape)),
+                ("Elevation", format_value(prop.elevation)),
+                ("Soil", format_value(prop.soil_type)),
+                ("Water table", format_value(prop.water_table)),
+                ("Subject to flooding", format_value(prop.flood_risk)),
+            ]),
+            ("subheading", "Buildings"),
+            ("fields", [
+                ("Floor area (sq.ft)", format_value(prop.building_area)),
+                ("Construction", format_value(prop.building_structure)),
+                ("Year built", format_value(prop.year_built)),
+                ("Condition", format_value(prop.building_condition)),
+                ("Depreciation rate", f"{prop.depreciation_rate:g}%" if prop.depreciation_rate is not None else "-"),
+            ]),
+            ("subheading", "Services"),
+            ("fields", [
+                ("Electricity", format_value(prop.electricity)),
+                ("Water supply", format_value(prop.water_supply)),
+                ("Sewerage", format_value(prop.sewerage)),
+                ("Telephone", format_value(prop.telephone)),
+                ("Internet", format_value(prop.internet)),
+            ]),
+            ("subheading", "Locality"),
+            ("fields", [
+                ("Market activity", format_value(prop.market_activity)),
+                ("Development potential", format_value(prop.development_potential)),
+                ("Restrictions", format_value(prop.restrictions)),
+            ]),
+        ]))
+
+    blocks = []
+    for aspect in report.legal_aspects:
+        blocks.append(("subheading", f"{format_value(aspect.document_type)} {aspect.document_number or ''}".strip()))
+        blocks.append(("fields", [
+            ("Date", format_value(aspect.document_date)),
+            ("Issuing authority", format_value(aspect.issuing_authority)),
+            ("Current owner", format_value(aspect.current_owner)),
+            ("Previous owners", format_value(aspect.previous_owners)),
+            ("Ownership", format_value(aspect.ownership_type)),
+            ("Share", f"{aspect.ownership_percentage:g}%" if aspect.ownership_percentage is not None else "-"),
+            ("Title clear", format_value(aspect.title_clear)),
+            ("Encumbrances", format_value(aspect.encumbrances)),
+            ("Mortgages", format_value(aspect.mortgages)),
+            ("Liens", format_value(aspect.liens)),
+            ("Easements", format_value(aspect.easements)),
+            ("Approvals and permits", format_value(aspect.approvals_permits)),
+            ("Zoning", format_value(aspect.zoning_classification)),
+            ("Development restrictions", format_value(aspect.development_restrictions)),
+            ("Registration", format_value(aspect.registration_details)),
+            ("Legal issues", format_value(aspect.legal_issues)),
+            ("Remarks", format_value(aspect.remarks)),
+        ]))
+    sections.append(Section("Title and Legal Aspects", blocks or [("paragraph", "No title documents recorded.")]))
+
+    # Whole rupees and short dates keep the table's number columns narrow
+    amount = lambda value: "-" if value is None else f"{value:,.0f}"
+    rows = [
+        [
+            comparable.address,
+            comparable.sale_date.strftime("%d %b %Y") if comparable.sale_date else "-",
+            amount(comparable.sale_price),
+            "-" if comparable.land_extent_perches is None else f"{comparable.land_extent_perches:g}",
+            amount(comparable.price_per_perch),
+            amount(comparable.adjusted_price),
+        ]
+        for comparable in report.comparables
+    ]
+    sections.append(Section("Market Evidence", [
+        ("table", (["Property", "Sale date", "Price (Rs.)", "Extent (P)", "Rate per P", "Adjusted (Rs.)"], rows))
+    ] if rows else [("paragraph", "No comparable sales recorded.")]))
+
+    for valuation in report.valuations:
+        computation = [("Basis of valuation", format_value(valuation.primary_method))]
+        if valuation.secondary_methods:
+            computation.append(("Supporting methods", format_value(valuation.secondary_methods)))
+        if valuation.land_rate_per_perch is not None and valuation.land_extent_perches is not None:
+            computation.append((
+                "Land",
+                f"{valuation.land_extent_perches:g} perches at {format_money(valuation.land_rate_per_perch)} = "
+                f"{format_money(valuation.land_rate_per_perch * valuation.land_extent_perches)}"
+            ))
+        if valuation.building_area is not None and valuation.building_rate_per_sqft is not None:
+            computation.append((
+                "Buildings",
+                f"{valuation.building_area:g} sq.ft at {format_money(valuation.building_rate_per_sqft)} = "
+                f"{format_money(valuation.building_value_before_depreciation)}"
+            ))
+        if valuation.depreciation_percentage is not None:
+            computation.append((
+                "Less depreciation",
+                f"{valuation.depreciation_percentage:g}%, giving {format_money(valuation.building_value_after_depreciation)}"
+            ))
+        if valuation.other_improvements_value is not None:
+            computation.append((
+                f"Other improvements{': ' + valuation.other_improvements_description if valuation.other_improvements_description else ''}",
+                format_money(valuation.other_improvements_value)
+            ))
+        blocks = [("fields", computation)]
+        if valuation.methodology_explanation:
+            blocks.append(("paragraph", valuation.methodology_explanation))
+        blocks.append(("subheading", "Opinion of Value"))
+        blocks.append(("fields", [
+            ("Market value", format_money(valuation.total_market_value)),
+            ("Forced sale value", format_money(valuation.forced_sale_value)),
+            ("Insurance value", format_money(valuation.insurance_value)),
+            ("Monthly rental value", format_money(valuation.rental_value_monthly)),
+        ]))
+        if valuation.market_trend_analysis:
+            blocks += [("subheading", "Market Trends"), ("paragraph", valuation.market_trend_analysis)]
+        for title, values in (
+            ("Assumptions", valuation.assumptions),
+            ("Limitations", valuation.limitations),
+            ("Risk Factors", valuation.risk_factors),
+        ):
+            if values:
+                blocks += [("subheading", title), ("list", _items(values))]
+        sections.append(Section("Valuation", blocks))
+
+    certificate = (
+        "I certify that I have personally inspected the property described in this report, "
+        "that I have no present or prospective interest in it, and that the opinion of value "
+        "stated above is my independent professional opinion given as at the date of valuation."
+    )
+    blocks = [("paragraph", certificate)]
+    valuer = document.valuer
+    if valuer:
+        blocks.append(("fields", [
+            ("Valuer", valuer_name(document)),
+            ("Qualifications", format_value(valuer.qualifications)),
+            ("Memberships", format_value(valuer.memberships)),
+            ("Registration number", format_value(valuer.registration_number)),
+            ("Address", format_value(valuer.address)),
+            ("Telephone", format_value(valuer.telephone_numbers)),
+            ("Email", format_value(valuer.email)),
+        ]))
+    sections.append(Section("Certificate", blocks))
+    return sections
@@ -0,0 +1,377 @@
+import asyncio
+import io
+import os
+import re
+import zipfile
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+from xml.sax.saxutils import escape
+
+from app.core.config import get_settings
+from app.services.pdf import PdfImage
+from app.services.report_documents import (
+    CONTEXT_FIELDS, ReportDocument, Section, format_value, report_context, report_sections
+)
+from app.services.report_pdf import load_photo_image
+
+settings = get_settings()
+
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+NAMESPACES = {
+    "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "wp": "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing",
+}
+IMAGE_RELATIONSHIP = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"
+BLOCK_FIELDS = ("body", "photos")
+
+# A placeholder may be split over several runs by Word (spell-check marks,
+# formatting changes), so tags between the braces are allowed and dropped
+PLACEHOLDER_SPAN = re.compile(r"\{\{(?:[^{}<]|<[^>]*>)*?\}\}")
+PLACEHOLDER = re.compile(r"\{\{\s*([\w.]+)\s*\}\}")
+TAG = re.compile(r"<[^>]*>")
+# Characters XML 1.0 doesn't allow, e.g. from pasted OCR text
+INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+class Field(NamedTuple):
+    name: str
+
+class Block(NamedTuple):
+    name: str
+
+class CompiledTemplate(NamedTuple):
+    """A DOCX template taken apart once: its static parts and document.xml as literal/placeholder segments."""
+    static_parts: List[Tuple[str, bytes]]
+    document: List[Union[bytes, Field, Block]]
+    # Relationships and content types, split where generated entries are inserted
+    relationships: Tuple[bytes, bytes]
+    content_types: bytes
+
+class TemplateError(Exception):
+    pass
+
+def _compile_document(xml: str) -> List[Union[bytes, Field, Block]]:
+    xml = PLACEHOLDER_SPAN.sub(lambda match: TAG.sub("", match.group()), xml)
+    # Generated drawings need these prefixes; declare any the template lacks
+    root = re.search(r"<w:document\b[^>]*>", xml)
+    if root is None:
+        raise TemplateError("word/document.xml has no w:document element")
+    declarations = "".join(
+        f' xmlns:{prefix}="{uri}"' for prefix, uri in NAMESPACES.items() if f"xmlns:{prefix}=" not in root.group()
+    )
+    xml = xml[:root.end() - 1] + declarations + xml[root.end() - 1:]
+
+    segments: List[Union[bytes, Field, Block]] = []
+    position = 0
+    for match in PLACEHOLDER.finditer(xml):
+        name = match.group(1)
+        if name in BLOCK_FIELDS:
+            # Blocks replace their whole paragraph with generated paragraphs and tables
+            start = max(xml.rfind("<w:p>", 0, match.start()), xml.rfind("<w:p ", 0, match.start()))
+            end = xml.find("</w:p>", match.end())
+            if start < position or end < 0:
+                raise TemplateError(f"{{{{ {name} }}}} must be in a paragraph of its own")
+            segments += [xml[position:start].encode(), Block(name)]
+            position = end + len("</w:p>")
+        elif name in CONTEXT_FIELDS:
+            segments += [xml[position:match.start()].encode(), Field(name)]
+            position = match.end()
+        else:
+            raise TemplateError(f"Unknown placeholder {{{{ {name} }}}}")
+    segments.append(xml[position:].encode())
+    return [segment for segment in segments if segment != b""]
+
+def compile_template(data: bytes) -> CompiledTemplate:
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        parts = {name: package.read(name) for name in package.namelist()}
+    try:
+        document = parts.pop("word/document.xml").decode("utf-8")
+        relationships = parts.pop("word/_rels/document.xml.rels").decode("utf-8")
+        content_types = parts.pop("[Content_Types].xml").decode("utf-8")
+    except KeyError as e:
+        raise TemplateError(f"Template is missing {e.args[0]}")
+
+    if 'Extension="jpg"' not in content_types:
+        content_types = content_types.replace(
+            "</Types>", '<Default Extension="jpg" ContentType="image/jpeg"/></Types>'
+        )
+    split = relationships.rindex("</Relationships>")
+    return CompiledTemplate(
+        static_parts=sorted(parts.items()),
+        document=_compile_document(document),
+        relationships=(relationships[:split].encode(), relationships[split:].encode()),
+        content_types=content_types.encode(),
+    )
+
+@lru_cache(maxsize=32)
+def _compiled_file(path: str, modified: int) -> CompiledTemplate:
+    # Keyed on mtime too, so replacing a template file takes effect without a restart
+    with open(path, "rb") as file:
+        return compile_template(file.read())
+
+@lru_cache()
+def _compiled_default() -> CompiledTemplate:
+    return compile_template(default_template())
+
+def template_slug(bank_name: Optional[str]) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", (bank_name or "").lower()).strip("-")
+
+def get_template(bank_name: Optional[str]) -> CompiledTemplate:
+    """The bank's template from DOCX_TEMPLATE_DIR if there is one, else the built-in layout. Compiled once."""
+    for name in (template_slug(bank_name), "default"):
+        path = os.path.join(settings.DOCX_TEMPLATE_DIR, f"{name}.docx")
+        if name and os.path.isfile(path):
+            return _compiled_file(path, os.stat(path).st_mtime_ns)
+    return _compiled_default()
+
+# WordprocessingML for the generated blocks. Direct formatting only, so the
+# output looks the same whatever styles a bank's template defines.
+
+def _text(value: str) -> str:
+    value = escape(INVALID_XML_CHARS.sub("", str(value)))
+    return value.replace("\n", '</w:t><w:br/><w:t xml:space="preserve">')
+
+def _run(text: str, bold: bool = False, size: Optional[int] = None) -> str:
+    properties = ("<w:b/>" if bold else "") + (f'<w:sz w:val="{size}"/>' if size else "")
+    properties = f"<w:rPr>{properties}</w:rPr>" if properties else ""
+    return f'<w:r>{properties}<w:t xml:space="preserve">{_text(text)}</w:t></w:r>'
+
+def _paragraph(text: str, bold: bool = False, size: Optional[int] = None, shaded: bool = False, indent: int = 0) -> str:
+    properties = '<w:spacing w:after="80"/>'
+    if shaded:
+        properties += '<w:shd w:val="clear" w:color="auto" w:fill="E8E8E8"/><w:spacing w:before="240" w:after="120"/>'
+    if indent:
+        properties += f'<w:ind w:left="{indent}" w:hanging="240"/>'
+    return f"<w:p><w:pPr>{properties}</w:pPr>{_run(text, bold, size)}</w:p>"
+
+def _table(rows: Sequence[Sequence[str]], widths: Sequence[int], header: bool = False, borders: bool = True) -> str:
+    border = '<w:{0} w:val="single" w:sz="4" w:space="0" w:color="999999"/>' if borders else '<w:{0} w:val="nil"/>'
+    table_borders = "".join(border.format(edge) for edge in ("top", "left", "bottom", "right", "insideH", "insideV"))
+    parts = [
+        f'<w:tbl><w:tblPr><w:tblW w:w="{sum(widths)}" w:type="dxa"/><w:tblBorders>{table_borders}</w:tblBorders>'
+        '<w:tblLayout w:type="fixed"/></w:tblPr><w:tblGrid>',
+        "".join(f'<w:gridCol w:w="{width}"/>' for width in widths),
+        "</w:tblGrid>",
+    ]
+    for index, row in enumerate(rows):
+        is_header = header and index == 0
+        parts.append("<w:tr>" + ("<w:trPr><w:tblHeader/></w:trPr>" if is_header else ""))
+        for column, (cell, width) in enumerate(zip(row, widths)):
+            bold = is_header or (not header and column == 0)
+            shading = '<w:shd w:val="clear" w:color="auto" w:fill="E8E8E8"/>' if is_header else ""
+            parts.append(
+                f'<w:tc><w:tcPr><w:tcW w:w="{width}" w:type="dxa"/>{shading}</w:tcPr>'
+                f"<w:p>{_run(cell, bold, 18 if header else None)}</w:p></w:tc>"
+            )
+        parts.append("</w:tr>")
+    parts.append("</w:tbl>")
+    return "".join(parts)
+
+# A4 with 2cm margins leaves 9638 twips of text width
+TEXT_WIDTH = 9638
+
+def section_xml(section: Section) -> str:
+    parts = [_paragraph(section.title.upper(), bold=True, size=22, shaded=True)]
+    for kind, value in section.blocks:
+        if kind == "fields":
+            parts.append(_table(value, (3200, TEXT_WIDTH - 3200), borders=False))
+        elif kind == "paragraph":
+            parts.append(_paragraph(value))
+        elif kind == "list":
+            parts += [_paragraph(f"-\t{item}", indent=240) for item in value]
+        elif kind == "table":
+            headers, rows = value
+            numbers = 1300
+            widths = [TEXT_WIDTH - numbers * (len(headers) - 1)] + [numbers] * (len(headers) - 1)
+            parts.append(_table([headers, *rows], widths, header=True))
+        elif kind == "subheading":
+            parts.append(_paragraph(value, bold=True))
+    return "".join(parts)
+
+EMU_PER_TWIP = 635
+
+def photo_xml(number: int, caption: str, relationship_id: str, image: PdfImage) -> str:
+    # Full text width, capped so two photos fit on a page
+    width = TEXT_WIDTH * EMU_PER_TWIP
+    height = int(width * image.height / image.width)
+    max_height = 5800 * EMU_PER_TWIP
+    if height > max_height:
+        width, height = int(width * max_height / height), max_height
+    return (
+        '<w:p><w:pPr><w:keepNext/><w:jc w:val="center"/></w:pPr><w:r><w:drawing>'
+        f'<wp:inline distT="0" distB="0" distL="0" distR="0"><wp:extent cx="{width}" cy="{height}"/>'
+        f'<wp:docPr id="{1000 + number}" name="Photo {number}"/>'
+        '<a:graphic xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
+        '<a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+        '<pic:pic xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+        f'<pic:nvPicPr><pic:cNvPr id="{1000 + number}" name="photo{number}.jpg"/><pic:cNvPicPr/></pic:nvPicPr>'
+        f'<pic:blipFill><a:blip r:embed="{relationship_id}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+        f'<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{width}" cy="{height}"/></a:xfrm>'
+        '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr></pic:pic>'
+        "</a:graphicData></a:graphic></wp:inline></w:drawing></w:r></w:p>"
+        + _paragraph(caption)
+    )
+
+class _ChunkSink:
+    """Write-only file for ZipFile; what it receives is handed to the response in chunks."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+async def render_report_docx(
+    document: ReportDocument,
+    template: Optional[CompiledTemplate] = None,
+    progress: Optional[Callable[[float], None]] = None
+) -> AsyncIterator[bytes]:
+    """
+    The report as a DOCX from its bank's compiled template, written straight
+    into a streamed ZIP. Photos go in first, one at a time, so only their
+    sizes are kept for the document part that references them. `progress`
+    is called with the fraction done after each photo and section.
+    """
+    template = template or get_template(document.report.bank_name)
+    context = report_context(document)
+    sink = _ChunkSink()
+    # The sink can't seek, so entries are written with trailing data descriptors
+    package = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6)
+
+    package.writestr("[Content_Types].xml", template.content_types)
+    for name, data in template.static_parts:
+        package.writestr(name, data)
+    yield sink.drain()
+
+    report_photos = list(document.report.photos) if Block("photos") in template.document else []
+    sections = report_sections(document) if Block("body") in template.document else []
+    steps = max(len(report_photos) + len(sections), 1)
+    photos = []
+    pending = asyncio.ensure_future(load_photo_image(report_photos[0])) if report_photos else None
+    try:
+        for index, photo in enumerate(report_photos):
+            image = await pending
+            # The next photo is fetched while this one is written
+            pending = asyncio.ensure_future(load_photo_image(report_photos[index + 1])) if index + 1 < len(report_photos) else None
+            number = index + 1
+            if image is not None:
+                # Print copies are JPEG and don't deflate; stored as they are
+                package.writestr(f"word/media/valuerpro-photo{number}.jpg", image.data, compress_type=zipfile.ZIP_STORED)
+                photos.append((number, photo, f"rIdValuerProPhoto{number}", image._replace(data=b"")))
+                yield sink.drain()
+            if progress:
+                progress(number / steps)
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+    with package.open("word/document.xml", "w") as part:
+        for segment in template.document:
+            if isinstance(segment, bytes):
+                part.write(segment)
+            elif isinstance(segment, Field):
+                part.write(_text(context[segment.name]).encode())
+            elif segment.name == "body":
+                for index, section in enumerate(sections):
+                    part.write(section_xml(section).encode())
+                    yield sink.drain()
+                    if progress:
+                        progress((len(report_photos) + index + 1) / steps)
+            else:
+                for number, photo, relationship_id, image in photos:
+                    caption = f"Photo {number}: {photo.caption or photo.filename} ({format_value(photo.type)})"
+                    part.write(photo_xml(number, caption, relationship_id, image).encode())
+                if not photos:
+                    part.write(_paragraph("No photographs.").encode())
+    yield sink.drain()
+
+    head, tail = template.relationships
+    generated = "".join(
+        f'<Relationship Id="{relationship_id}" Type="{IMAGE_RELATIONSHIP}" Target="media/valuerpro-photo{number}.jpg"/>'
+        for number, _, relationship_id, _ in photos
+    )
+    package.writestr("word/_rels/document.xml.rels", head + generated.encode() + tail)
+    package.close()
+    yield sink.drain()
+
+def default_template() -> bytes:
+    """The built-in layout, used for banks without a template of their own. Also a starting point for new ones."""
+    paragraph = lambda text, extra="": (
+        f'<w:p><w:pPr>{extra}</w:pPr><w:r><w:t xml:space="preserve">{text}</w:t></w:r></w:p>'
+    )
+    fields = [
+        ("Report", "report.title"),
+        ("Reference number", "report.reference_number"),
+        ("Prepared for", "report.bank_name"),
+        ("Branch", "report.bank_branch"),
+        ("Purpose of valuation", "report.purpose"),
+        ("Date of inspection", "report.inspection_date"),
+        ("Date of valuation", "report.valuation_date"),
+        ("Market value", "valuation.total_market_value"),
+        ("Forced sale value", "valuation.forced_sale_value"),
+        ("Valuer", "valuer.name"),
+    ]
+    body = "".join([
+        '<w:p><w:pPr><w:jc w:val="center"/><w:spacing w:before="1200" w:after="600"/></w:pPr>'
+        '<w:r><w:rPr><w:b/><w:sz w:val="44"/></w:rPr><w:t>VALUATION REPORT</w:t></w:r></w:p>',
+        *(paragraph(f"{label}: {{{{ {name} }}}}") for label, name in fields),
+        '<w:p><w:r><w:br w:type="page"/></w:r></w:p>',
+        paragraph("{{ body }}"),
+        '<w:p><w:r><w:br w:type="page"/></w:r></w:p>',
+        paragraph("PHOTOGRAPHS", '<w:shd w:val="clear" w:color="auto" w:fill="E8E8E8"/>'),
+        paragraph("{{ photos }}"),
+        '<w:sectPr><w:pgSz w:w="11906" w:h="16838"/>'
+        '<w:pgMar w:top="1134" w:right="1134" w:bottom="1134" w:left="1134" w:header="567" w:footer="567" w:gutter="0"/>'
+        "</w:sectPr>",
+    ])
+    namespaces = " ".join(f'xmlns:{prefix}="{uri}"' for prefix, uri in NAMESPACES.items())
+    parts = {
+        "[Content_Types].xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '<Override PartName="/word/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+            "</Types>"
+        ),
+        "_rels/.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+            "</Relationships>"
+        ),
+        "word/_rels/document.xml.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+            "</Relationships>"
+        ),
+        "word/styles.xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<w:styles xmlns:w="{NAMESPACES["w"]}"><w:docDefaults><w:rPrDefault><w:rPr>'
+            '<w:rFonts w:ascii="Arial" w:hAnsi="Arial" w:cs="Arial"/><w:sz w:val="20"/></w:rPr></w:rPrDefault>'
+            "</w:docDefaults>"
+            '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>'
+            "</w:styles>"
+        ),
+        "word/document.xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f"<w:document {namespaces}><w:body>{body}</w:body></w:document>"
+        ),
+    }
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as package:
+        for name, content in parts.items():
+            package.writestr(name, content)
+    return buffer.getvalue()
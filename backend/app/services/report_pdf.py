@@ -0,0 +1,305 @@
+import asyncio
+import io
+import logging
+import os
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+import anyio
+from PIL import Image
+
+from app.models.photo import Photo
+from app.services.images import IMAGE_EXTENSIONS, print_copy
+from app.services.pdf import PAGE_HEIGHT, PAGE_WIDTH, PdfImage, PdfWriter, escape_text, text_width
+from app.services.report_documents import (
+    ReportDocument, Section, cover_fields, format_value, report_sections, report_title, valuer_name
+)
+from app.services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+MARGIN = 50
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+TOP = PAGE_HEIGHT - 70
+BOTTOM = 60
+LABEL_WIDTH = 170
+BODY_SIZE = 10
+LEADING = 13.5
+
+def wrap(text: str, font: str, size: float, width: float) -> List[str]:
+    lines = []
+    for paragraph in str(text).splitlines() or [""]:
+        line = ""
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if text_width(candidate, font, size) <= width:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            # Words wider than the column (long reference numbers, URLs) are split anywhere
+            while text_width(word, font, size) > width:
+                cut = len(word) - 1
+                while cut > 1 and text_width(word[:cut], font, size) > width:
+                    cut -= 1
+                lines.append(word[:cut])
+                word = word[cut:]
+            line = word
+        lines.append(line)
+    return lines
+
+class Page:
+    def __init__(self, number: int):
+        self.number = number
+        self.ops: List[bytes] = []
+        self.images: Dict[str, PdfImage] = {}
+        self.y = TOP
+
+    def text(self, x: float, y: float, text: str, font: str = "F1", size: float = BODY_SIZE) -> None:
+        self.ops.append(b"BT /%s %g Tf %.2f %.2f Td (%s) Tj ET" % (font.encode(), size, x, y, escape_text(text)))
+
+    def line(self, x1: float, y1: float, x2: float, y2: float, width: float = 0.5) -> None:
+        self.ops.append(b"%g w %.2f %.2f m %.2f %.2f l S" % (width, x1, y1, x2, y2))
+
+    def shade(self, x: float, y: float, width: float, height: float, gray: float = 0.92) -> None:
+        self.ops.append(b"q %g g %.2f %.2f %.2f %.2f re f Q" % (gray, x, y, width, height))
+
+    def image(self, image: PdfImage, x: float, y: float, width: float, height: float) -> None:
+        name = f"Im{len(self.images) + 1}"
+        self.images[name] = image
+        self.ops.append(b"q %.2f 0 0 %.2f %.2f %.2f cm /%s Do Q" % (width, height, x, y, name.encode()))
+
+    def content(self, header: str) -> bytes:
+        self.text(MARGIN, PAGE_HEIGHT - 40, header, size=8)
+        self.line(MARGIN, PAGE_HEIGHT - 46, PAGE_WIDTH - MARGIN, PAGE_HEIGHT - 46)
+        # Pages go out as they're made, so the total isn't known for "page x of y"
+        footer = f"Page {self.number}"
+        self.text(PAGE_WIDTH - MARGIN - text_width(footer, "F1", 8), 35, footer, size=8)
+        return b"\n".join(self.ops)
+
+class FlowLayout:
+    """Lays sections out top to bottom; full pages are collected for the writer as they fill."""
+
+    def __init__(self):
+        self.page_count = 0
+        self.page = self._new_page()
+        self.full_pages: List[Page] = []
+
+    def _new_page(self) -> Page:
+        self.page_count += 1
+        return Page(self.page_count)
+
+    def break_page(self) -> None:
+        self.full_pages.append(self.page)
+        self.page = self._new_page()
+
+    def ensure(self, height: float) -> None:
+        if self.page.y - height < BOTTOM and self.page.y < TOP:
+            self.break_page()
+
+    def take_pages(self) -> List[Page]:
+        pages, self.full_pages = self.full_pages, []
+        return pages
+
+    def heading(self, title: str) -> None:
+        # Keep a heading with at least a few lines of what follows
+        self.ensure(24 + 4 * LEADING)
+        self.page.y -= 10
+        self.page.shade(MARGIN, self.page.y - 5, CONTENT_WIDTH, 18)
+        self.page.text(MARGIN + 4, self.page.y, title.upper(), font="F2", size=11)
+        self.page.y -= 20
+
+    def subheading(self, title: str) -> None:
+        self.ensure(LEADING + 3 * LEADING)
+        self.page.y -= 4
+        self.page.text(MARGIN, self.page.y, title, font="F2")
+        self.page.y -= LEADING
+
+    def paragraph(self, text: str) -> None:
+        for line in wrap(text, "F1", BODY_SIZE, CONTENT_WIDTH):
+            self.ensure(LEADING)
+            self.page.text(MARGIN, self.page.y, line)
+            self.page.y -= LEADING
+        self.page.y -= 4
+
+    def bullets(self, items: Sequence[str]) -> None:
+        for item in items:
+            for index, line in enumerate(wrap(item, "F1", BODY_SIZE, CONTENT_WIDTH - 14)):
+                self.ensure(LEADING)
+                if index == 0:
+                    self.page.text(MARGIN + 2, self.page.y, "-")
+                self.page.text(MARGIN + 14, self.page.y, line)
+                self.page.y -= LEADING
+        self.page.y -= 4
+
+    def fields(self, rows: Sequence[Tuple[str, str]]) -> None:
+        for label, value in rows:
+            label_lines = wrap(label, "F2", BODY_SIZE, LABEL_WIDTH - 10)
+            value_lines = wrap(value, "F1", BODY_SIZE, CONTENT_WIDTH - LABEL_WIDTH)
+            for index in range(max(len(label_lines), len(value_lines))):
+                self.ensure(LEADING)
+                if index < len(label_lines):
+                    self.page.text(MARGIN, self.page.y, label_lines[index], font="F2")
+                if index < len(value_lines):
+                    self.page.text(MARGIN + LABEL_WIDTH, self.page.y, value_lines[index])
+                self.page.y -= LEADING
+        self.page.y -= 4
+
+    def table(self, headers: Sequence[str], rows: Sequence[Sequence[str]]) -> None:
+        size = 8.5
+        # First column (the property) takes the slack; the rest are numbers and dates
+        widths = [CONTENT_WIDTH - 68 * (len(headers) - 1)] + [68] * (len(headers) - 1)
+
+        def prepare(cells: Sequence[str], font: str) -> Tuple[List[List[str]], float]:
+            wrapped = [wrap(cell, font, size, width - 6) for cell, width in zip(cells, widths)]
+            return wrapped, max(map(len, wrapped)) * 11 + 4
+
+        def draw(wrapped: List[List[str]], height: float, font: str) -> None:
+            if font == "F2":
+                self.page.shade(MARGIN, self.page.y - height + 9, CONTENT_WIDTH, height)
+            x = MARGIN
+            for index, (lines, width) in enumerate(zip(wrapped, widths)):
+                for offset, line in enumerate(lines):
+                    # Numeric columns are right-aligned
+                    left = x + 3 if index == 0 else x + width - 3 - text_width(line, font, size)
+                    self.page.text(left, self.page.y - offset * 11, line, font=font, size=size)
+                x += width
+            self.page.y -= height
+            self.page.line(MARGIN, self.page.y + 9, MARGIN + CONTENT_WIDTH, self.page.y + 9, 0.25)
+
+        header, header_height = prepare(headers, "F2")
+        self.ensure(header_height + 3 * 11)
+        draw(header, header_height, "F2")
+        for row in rows:
+            cells, height = prepare(row, "F1")
+            if self.page.y - height < BOTTOM:
+                # The header is repeated at the top of each continued page
+                self.break_page()
+                draw(header, header_height, "F2")
+            draw(cells, height, "F1")
+        self.page.y -= 6
+
+    def section(self, section: Section) -> None:
+        self.heading(section.title)
+        for kind, value in section.blocks:
+            if kind == "fields":
+                self.fields(value)
+            elif kind == "paragraph":
+                self.paragraph(value)
+            elif kind == "list":
+                self.bullets(value)
+            elif kind == "table":
+                self.table(*value)
+            elif kind == "subheading":
+                self.subheading(value)
+
+def _photo_image_key(photo: Photo) -> Tuple[Optional[str], bool]:
+    """Storage key of the best image to print, and whether it is already a print derivative."""
+    derivatives = photo.derivatives or {}
+    if derivatives.get("print"):
+        return derivatives["print"].removeprefix("/uploads/"), True
+    if os.path.splitext(photo.file_url)[1].lower() in IMAGE_EXTENSIONS:
+        return photo.file_url.removeprefix("/uploads/"), False
+    return None, False
+
+async def load_photo_image(photo: Photo) -> Optional[PdfImage]:
+    key, is_print_copy = _photo_image_key(photo)
+    if key is None:
+        return None
+    try:
+        data = await get_storage().read(key)
+        if not is_print_copy:
+            # Not rendered yet: scale the original down rather than embed 10MB
+            data = await anyio.to_thread.run_sync(print_copy, data)
+        with Image.open(io.BytesIO(data)) as image:
+            # Header only; the JPEG goes into the PDF undecoded
+            return PdfImage(data, image.width, image.height, len(image.getbands()))
+    except Exception:
+        logger.exception("Could not load photo %s for the PDF", photo.id)
+        return None
+
+PHOTOS_PER_PAGE = 2
+PHOTO_BOX_HEIGHT = (TOP - BOTTOM - PHOTOS_PER_PAGE * 40) / PHOTOS_PER_PAGE
+
+def photo_page(page: Page, photos: Sequence[Tuple[int, Photo, Optional[PdfImage]]]) -> None:
+    y = TOP
+    for number, photo, image in photos:
+        box_top = y
+        if image is not None:
+            scale = min(CONTENT_WIDTH / image.width, PHOTO_BOX_HEIGHT / image.height)
+            width, height = image.width * scale, image.height * scale
+            page.image(image, MARGIN + (CONTENT_WIDTH - width) / 2, box_top - height, width, height)
+        else:
+            page.text(MARGIN, box_top - 20, "Image not available")
+        caption = f"Photo {number}: {photo.caption or photo.filename} ({format_value(photo.type)})"
+        for index, line in enumerate(wrap(caption, "F1", 9, CONTENT_WIDTH)[:2]):
+            page.text(MARGIN, box_top - PHOTO_BOX_HEIGHT - 14 - index * 11, line, size=9)
+        y -= PHOTO_BOX_HEIGHT + 40
+
+async def render_report_pdf(
+    document: ReportDocument,
+    progress: Optional[Callable[[float], None]] = None
+) -> AsyncIterator[bytes]:
+    """
+    The report as a PDF, yielded page by page. Text pages are laid out as the
+    sections are reached; photo pages embed the print derivatives' JPEG bytes
+    directly, and the next page's photos are fetched while the current one is
+    sent. At most two pages of images are held in memory. `progress` is
+    called with the fraction done after each section and photo page.
+    """
+    report = document.report
+    header = " | ".join(filter(None, (report_title(document), report.bank_name, report.bank_branch)))
+    writer = PdfWriter()
+    yield writer.start()
+
+    layout = FlowLayout()
+    cover = layout.page
+    cover.y = TOP - 60
+    title = "VALUATION REPORT"
+    cover.text((PAGE_WIDTH - text_width(title, "F2", 22)) / 2, cover.y, title, font="F2", size=22)
+    cover.y -= 50
+    layout.fields(cover_fields(document))
+    layout.break_page()
+
+    sections = report_sections(document)
+    photos = list(report.photos)
+    groups = [photos[start:start + PHOTOS_PER_PAGE] for start in range(0, len(photos), PHOTOS_PER_PAGE)]
+    steps = max(len(sections) + len(groups), 1)
+
+    for index, section in enumerate(sections):
+        layout.section(section)
+        for page in layout.take_pages():
+            yield writer.add_page(page.content(header), page.images)
+        if progress:
+            progress((index + 1) / steps)
+
+    if photos:
+        layout.heading("Photographs")
+        layout.paragraph(f"{len(photos)} photographs taken at the inspection follow.")
+    layout.break_page()
+    for page in layout.take_pages():
+        yield writer.add_page(page.content(header), page.images)
+
+    def fetch(group: List[Photo]) -> asyncio.Future:
+        return asyncio.ensure_future(asyncio.gather(*(load_photo_image(photo) for photo in group)))
+
+    pending = fetch(groups[0]) if groups else None
+    try:
+        for index, group in enumerate(groups):
+            images = await pending
+            pending = fetch(groups[index + 1]) if index + 1 < len(groups) else None
+            page = layout.page
+            numbered = [
+                (index * PHOTOS_PER_PAGE + offset + 1, photo, image)
+                for offset, (photo, image) in enumerate(zip(group, images))
+            ]
+            photo_page(page, numbered)
+            layout.break_page()
+            layout.take_pages()
+            yield writer.add_page(page.content(header), page.images)
+            if progress:
+                progress((len(sections) + index + 1) / steps)
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+    yield writer.finish(title=report_title(document), author=valuer_name(document))
@@ -0,0 +1,198 @@
+import base64
+import hashlib
+import os
+import time
+from functools import lru_cache
+from typing import Optional
+from urllib.parse import urlencode
+
+import anyio
+
+from app.core.config import get_settings
+from app.core.security import sign_path
+
+settings = get_settings()
+
+def _move_into_place(source: str, destination: str) -> None:
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.replace(source, destination)
+
+class LocalStorage:
+    """Files under UPLOAD_DIR, served by the API itself. Fine for a single container."""
+
+    direct_uploads = False
+
+    def __init__(self, root: str, url_expires_in: int = 900):
+        self.root = root
+        self.url_expires_in = url_expires_in
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    async def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    async def save(self, source_path: str, key: str, content_type: Optional[str] = None) -> None:
+        """Move a finished local file into storage."""
+        await anyio.to_thread.run_sync(_move_into_place, source_path, self.path(key))
+
+    async def read(self, key: str) -> bytes:
+        async with await anyio.open_file(self.path(key), "rb") as file:
+            return await file.read()
+
+    async def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    async def download_url(self, key: str, filename: Optional[str] = None) -> Optional[str]:
+        """Signed /uploads URL, usable without a bearer header (e.g. <img> or a PDF viewer)."""
+        path = f"/uploads/{key}"
+        # Rounded to the window, so repeated requests get the same URL and browsers cache it
+        expires = (int(time.time()) // self.url_expires_in + 2) * self.url_expires_in
+        params = {"expires": expires, "signature": sign_path(path, expires)}
+        if filename:
+            params["filename"] = filename
+        return f"{path}?{urlencode(params)}"
+
+class S3Storage:
+    """
+    Files in an S3-compatible bucket, shared by every container. Large files
+    go up as multipart uploads, and presigned URLs let clients move bytes
+    to and from the bucket without passing through the API.
+    """
+
+    direct_uploads = True
+
+    def __init__(
+        self,
+        bucket: str,
+        region: str,
+        endpoint_url: str = "",
+        access_key_id: str = "",
+        secret_access_key: str = "",
+        multipart_chunk_size: int = 8 * 1024 * 1024,
+        url_expires_in: int = 900
+    ):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config
+        except ImportError:
+            raise RuntimeError("S3 storage requires boto3")
+
+        if not bucket:
+            raise RuntimeError("S3 storage requires AWS_S3_BUCKET")
+        self.bucket = bucket
+        self.url_expires_in = url_expires_in
+        # Empty credentials fall through to boto3's own chain (env, instance role)
+        self.client = boto3.client(
+            "s3",
+            region_name=region,
+            endpoint_url=endpoint_url or None,
+            aws_access_key_id=access_key_id or None,
+            aws_secret_access_key=secret_access_key or None,
+            config=Config(signature_version="s3v4")
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_chunk_size,
+            multipart_chunksize=multipart_chunk_size,
+            max_concurrency=4
+        )
+
+    def _is_missing(self, error: Exception) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    async def head(self, key: str) -> Optional[dict]:
+        from botocore.exceptions import ClientError
+
+        try:
+            return await anyio.to_thread.run_sync(
+                lambda: self.client.head_object(Bucket=self.bucket, Key=key, ChecksumMode="ENABLED")
+            )
+        except ClientError as e:
+            if self._is_missing(e):
+                return None
+            raise
+
+    async def exists(self, key: str) -> bool:
+        return await self.head(key) is not None
+
+    async def read_range(self, key: str, length: int) -> bytes:
+        """First `length` bytes of an object, e.g. for content sniffing."""
+        def read() -> bytes:
+            response = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes=0-{length - 1}")
+            return response["Body"].read()
+
+        return await anyio.to_thread.run_sync(read)
+
+    async def read(self, key: str) -> bytes:
+        """Whole object in memory; for small files such as photo derivatives."""
+        return await anyio.to_thread.run_sync(
+            lambda: self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+        )
+
+    async def download(self, key: str, path: str) -> None:
+        """Copy an object to a local file, e.g. for image processing."""
+        await anyio.to_thread.run_sync(lambda: self.client.download_file(self.bucket, key, path))
+
+    async def sha256(self, key: str) -> str:
+        """Hash an object by streaming it; for backends that don't report checksums."""
+        def read() -> str:
+            digest = hashlib.sha256()
+            for chunk in self.client.get_object(Bucket=self.bucket, Key=key)["Body"].iter_chunks(1024 * 1024):
+                digest.update(chunk)
+            return digest.hexdigest()
+
+        return await anyio.to_thread.run_sync(read)
+
+    async def save(self, source_path: str, key: str, content_type: Optional[str] = None) -> None:
+        """Upload a finished local file (multipart above the chunk size), then remove it."""
+        extra_args = {"ContentType": content_type} if content_type else {}
+        await anyio.to_thread.run_sync(lambda: self.client.upload_file(
+            source_path, self.bucket, key, ExtraArgs=extra_args, Config=self.transfer_config
+        ))
+        os.remove(source_path)
+
+    async def delete(self, key: str) -> None:
+        await anyio.to_thread.run_sync(lambda: self.client.delete_object(Bucket=self.bucket, Key=key))
+
+    async def download_url(self, key: str, filename: Optional[str] = None) -> Optional[str]:
+        params = {"Bucket": self.bucket, "Key": key}
+        if filename:
+            params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
+        # Signing is local; no request is made here
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=self.url_expires_in)
+
+    def upload_url(self, key: str, content_type: str, sha256: str) -> dict:
+        """
+        Presigned PUT for one object. The SHA-256 checksum header is part of the
+        signature, so S3 rejects a body whose hash differs from the key's.
+        """
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": self.bucket, "Key": key, "ContentType": content_type, "ChecksumSHA256": checksum},
+            ExpiresIn=self.url_expires_in
+        )
+        return {
+            "url": url,
+            "method": "PUT",
+            "headers": {"Content-Type": content_type, "x-amz-checksum-sha256": checksum},
+            "expires_in": self.url_expires_in,
+        }
+
+@lru_cache()
+def get_storage():
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=settings.AWS_S3_BUCKET,
+            region=settings.AWS_REGION,
+            endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+            access_key_id=settings.AWS_ACCESS_KEY_ID,
+            secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            multipart_chunk_size=settings.S3_MULTIPART_CHUNK_SIZE,
+            url_expires_in=settings.PRESIGNED_URL_EXPIRE_SECONDS
+        )
+    return LocalStorage(settings.UPLOAD_DIR, url_expires_in=settings.PRESIGNED_URL_EXPIRE_SECONDS)
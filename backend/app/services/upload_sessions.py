@@ -0,0 +1,251 @@
+import hashlib
+import os
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+import anyio
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import ClientDisconnect, Request
+
+from app.core.config import get_settings
+from app.models.blob import Blob
+from app.models.upload_session import UploadSession
+from app.services.blob_store import INCOMING_DIR, store_blob
+from app.services.uploads import SNIFF_BYTES, UPLOAD_CHUNK_SIZE, UploadError, sniff_content_type
+
+settings = get_settings()
+
+# Partial files of open sessions, one per session, written in place at each chunk's offset
+SESSIONS_DIR = os.path.join(settings.UPLOAD_DIR, ".sessions")
+
+CONTENT_RANGE_PATTERN = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+# A complete that hasn't finished or let go of its claim by then is taken to have died
+COMPLETE_CLAIM_SECONDS = 600
+
+def session_path(session_id: UUID) -> str:
+    return os.path.join(SESSIONS_DIR, f"{session_id}.part")
+
+def session_expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+
+def parse_content_range(value: Optional[str], size: int) -> Tuple[int, int]:
+    """Parse "bytes 0-1048575/5242880" into (start, end exclusive)."""
+    match = CONTENT_RANGE_PATTERN.match(value or "")
+    if not match:
+        raise UploadError(400, "Content-Range header required, e.g. bytes 0-1048575/5242880")
+    start, last, total = match.groups()
+    start, end = int(start), int(last) + 1
+    if end <= start or end > size or (total != "*" and int(total) != size):
+        raise UploadError(416, "Content-Range does not fit the upload")
+    return start, end
+
+def _create_file(path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+
+async def create_session(
+    db: AsyncSession,
+    user_id: UUID,
+    filename: str,
+    size: int,
+    content_type: Optional[str] = None,
+    sha256: Optional[str] = None
+) -> UploadSession:
+    if os.path.splitext(filename)[1].lower() not in settings.ALLOWED_EXTENSIONS:
+        raise UploadError(400, "File type not allowed")
+    if size > settings.RESUMABLE_MAX_FILE_SIZE:
+        raise UploadError(413, "File too large")
+
+    upload = UploadSession(
+        user_id=user_id,
+        filename=filename,
+        size=size,
+        content_type=content_type,
+        sha256=sha256,
+        received=0,
+        expires_at=session_expiry()
+    )
+    db.add(upload)
+    await db.flush()
+    await anyio.to_thread.run_sync(_create_file, session_path(upload.id))
+    await db.commit()
+    return upload
+
+async def get_session(db: AsyncSession, session_id: UUID, user_id: UUID) -> UploadSession:
+    upload = await db.scalar(
+        select(UploadSession).where(
+            UploadSession.id == session_id,
+            UploadSession.user_id == user_id,
+            UploadSession.expires_at > datetime.now(timezone.utc)
+        )
+    )
+    if upload is None:
+        raise UploadError(404, "Upload session not found")
+    return upload
+
+async def _write_body(request: Request, path: str, start: int, end: int) -> int:
+    """
+    Write the request body into `path` at `start`, in UPLOAD_CHUNK_SIZE pieces.
+    Returns how many bytes reached the disk. If the client drops mid-chunk that
+    is whatever arrived before the drop, so the next attempt resumes from there.
+    """
+    file = await anyio.to_thread.run_sync(open, path, "r+b")
+    written = 0
+    buffer = bytearray()
+
+    def flush() -> None:
+        file.seek(start + written)
+        file.write(buffer)
+
+    def sync() -> None:
+        file.flush()
+        os.fsync(file.fileno())
+
+    try:
+        try:
+            async for data in request.stream():
+                if start + written + len(buffer) + len(data) > end:
+                    raise UploadError(400, "Body is longer than its Content-Range")
+                buffer += data
+                if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                    await anyio.to_thread.run_sync(flush)
+                    written += len(buffer)
+                    buffer.clear()
+        except ClientDisconnect:
+            pass
+        if buffer:
+            await anyio.to_thread.run_sync(flush)
+            written += len(buffer)
+        # Bytes are only acknowledged once they would survive a crash
+        await anyio.to_thread.run_sync(sync)
+    finally:
+        await anyio.to_thread.run_sync(file.close)
+    return written
+
+async def write_chunk(db: AsyncSession, upload: UploadSession, request: Request) -> int:
+    """Store one PUT chunk and return the new offset."""
+    start, end = parse_content_range(request.headers.get("content-range"), upload.size)
+    if start > upload.received:
+        # Gaps aren't tracked; the client must continue from the acknowledged offset
+        raise UploadError(409, f"Chunk starts past the received offset {upload.received}")
+
+    # Don't hold a pooled connection while the body trickles in over a slow link
+    await db.commit()
+    written = await _write_body(request, session_path(upload.id), start, end)
+
+    # Only ever moves forward, so retried or concurrent chunks can't lose progress
+    await db.execute(
+        update(UploadSession)
+        .where(
+            UploadSession.id == upload.id,
+            UploadSession.received >= start,
+            UploadSession.received < start + written
+        )
+        .values(received=start + written)
+    )
+    upload.expires_at = session_expiry()
+    await db.commit()
+    await db.refresh(upload)
+    return upload.received
+
+def _copy_and_hash(path: str, destination: str) -> Tuple[str, bytes]:
+    """
+    Copy the file, returning the SHA-256 of the copy and its leading bytes for
+    sniffing. The copy is what gets stored, so a chunk retried while this runs
+    can't change the content after it was hashed.
+    """
+    sha256 = hashlib.sha256()
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    with open(path, "rb") as source, open(destination, "wb") as copy:
+        head = source.read(SNIFF_BYTES)
+        sha256.update(head)
+        copy.write(head)
+        for block in iter(lambda: source.read(UPLOAD_CHUNK_SIZE), b""):
+            sha256.update(block)
+            copy.write(block)
+    return sha256.hexdigest(), head
+
+async def complete_session(db: AsyncSession, upload: UploadSession) -> Tuple[Blob, bool]:
+    """
+    Turn a fully received session into a stored blob. The session and its
+    partial file are only removed once the blob is stored; if anything fails
+    before that, the session is left as it was and complete can be retried.
+    """
+    if upload.received < upload.size:
+        raise UploadError(409, f"Upload incomplete: {upload.received} of {upload.size} bytes received")
+
+    # Claim the session, so a repeated complete can't race this one
+    claimed_at = datetime.now(timezone.utc)
+    result = await db.execute(
+        update(UploadSession)
+        .where(
+            UploadSession.id == upload.id,
+            or_(
+                UploadSession.completing_at.is_(None),
+                UploadSession.completing_at < claimed_at - timedelta(seconds=COMPLETE_CLAIM_SECONDS)
+            )
+        )
+        .values(completing_at=claimed_at)
+        # The session object isn't used for this; SQLite returns naive datetimes
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if result.rowcount != 1:
+        raise UploadError(409, "Upload is already being completed")
+
+    path = session_path(upload.id)
+    extension = os.path.splitext(upload.filename)[1].lower()
+    incoming_path = os.path.join(INCOMING_DIR, f"{uuid.uuid4()}{extension}")
+    try:
+        sha256, head = await anyio.to_thread.run_sync(_copy_and_hash, path, incoming_path)
+        if upload.sha256 and sha256 != upload.sha256:
+            raise UploadError(422, "Uploaded content does not match the declared SHA-256")
+        content_type = sniff_content_type(head, extension)
+        stored = await store_blob(db, incoming_path, sha256, upload.size, extension, content_type, upload.user_id)
+    except BaseException:
+        # store_blob consumes the copy only once it succeeds
+        if os.path.exists(incoming_path):
+            os.remove(incoming_path)
+        try:
+            await db.rollback()
+            await db.execute(
+                update(UploadSession)
+                .where(UploadSession.id == upload.id, UploadSession.completing_at == claimed_at)
+                .values(completing_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        except Exception:
+            # Don't hide the original error; the claim lapses after COMPLETE_CLAIM_SECONDS
+            pass
+        raise
+
+    await db.execute(delete(UploadSession).where(UploadSession.id == upload.id))
+    await db.commit()
+    if os.path.exists(path):
+        os.remove(path)
+    return stored
+
+async def abort_session(db: AsyncSession, upload: UploadSession) -> None:
+    await db.delete(upload)
+    await db.commit()
+    if os.path.exists(session_path(upload.id)):
+        os.remove(session_path(upload.id))
+
+async def expire_sessions(db: AsyncSession) -> List[UUID]:
+    """Drop expired sessions and their partial files. Returns the expired ids."""
+    expired = (await db.execute(
+        delete(UploadSession)
+        .where(UploadSession.expires_at <= datetime.now(timezone.utc))
+        .returning(UploadSession.id)
+    )).scalars().all()
+    await db.commit()
+    for session_id in expired:
+        if os.path.exists(session_path(session_id)):
+            os.remove(session_path(session_id))
+    return list(expired)
@@ -0,0 +1,358 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional, Tuple, Union
+
+import anyio
+from multipart.multipart import MultipartParser, parse_options_header
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.requests import Request
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.services.blob_store import INCOMING_DIR, blob_info, store_blob
+
+settings = get_settings()
+
+# Bytes buffered per file before each disk write
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Room for boundaries and part headers when checking Content-Length up front
+MULTIPART_OVERHEAD = 64 * 1024
+# Chunks queued per file between the request parser and that file's writer
+FILE_QUEUE_CHUNKS = 8
+# Leading bytes kept for content sniffing
+SNIFF_BYTES = 1024
+
+# Magic numbers per allowed extension; .doc is OLE2, .docx is a zip container
+FILE_SIGNATURES = {
+    ".jpg": (b"\xff\xd8\xff", "image/jpeg"),
+    ".jpeg": (b"\xff\xd8\xff", "image/jpeg"),
+    ".png": (b"\x89PNG\r\n\x1a\n", "image/png"),
+    ".pdf": (b"%PDF-", "application/pdf"),
+    ".doc": (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/msword"),
+    ".docx": (b"PK\x03\x04", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+}
+
+class UploadError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+@dataclass
+class PartStart:
+    field_name: str
+    filename: Optional[str]
+    content_type: Optional[str]
+
+@dataclass
+class PartData:
+    data: bytes
+
+class PartEnd:
+    pass
+
+MultipartEvent = Union[PartStart, PartData, PartEnd]
+
+class StreamingMultipartParser:
+    """
+    Push parser over python-multipart that turns callbacks into events, so
+    file data can be consumed (and awaited) chunk by chunk as it arrives
+    instead of being spooled like Starlette's form parser does.
+    """
+
+    def __init__(self, content_type: str):
+        _, params = parse_options_header(content_type)
+        if b"boundary" not in params:
+            raise UploadError(400, "Expected a multipart/form-data body")
+        self._events: List[MultipartEvent] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_name = b""
+        self._header_value = b""
+        self._parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        filename = options.get(b"filename")
+        content_type = self._headers.get(b"content-type")
+        self._events.append(PartStart(
+            field_name=options.get(b"name", b"").decode("utf-8", "replace"),
+            filename=filename.decode("utf-8", "replace") if filename is not None else None,
+            content_type=content_type.decode("latin-1") if content_type else None,
+        ))
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        self._events.append(PartData(data[start:end]))
+
+    def _on_part_end(self) -> None:
+        self._events.append(PartEnd())
+
+    def feed(self, chunk: bytes) -> List[MultipartEvent]:
+        self._parser.write(chunk)
+        events, self._events = self._events, []
+        return events
+
+    def finish(self) -> List[MultipartEvent]:
+        self._parser.finalize()
+        events, self._events = self._events, []
+        return events
+
+async def iter_multipart(request: Request) -> AsyncIterator[MultipartEvent]:
+    parser = StreamingMultipartParser(request.headers.get("content-type", ""))
+    async for chunk in request.stream():
+        for event in parser.feed(chunk):
+            yield event
+    for event in parser.finish():
+        yield event
+
+class UploadWriter:
+    """
+    Writes one upload to disk in UPLOAD_CHUNK_SIZE pieces, hashing in the same
+    pass. Size is enforced per incoming chunk, so an oversized upload is cut off
+    as soon as it crosses the limit.
+    """
+
+    def __init__(self, path: str, max_size: int, chunk_size: int = UPLOAD_CHUNK_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.size = 0
+        self.head = b""
+        self._sha256 = hashlib.sha256()
+        self._buffer = bytearray()
+        self._file: Optional[BinaryIO] = None
+
+    async def open(self) -> None:
+        self._file = await anyio.to_thread.run_sync(open, self.path, "wb")
+
+    def _write_chunk(self, chunk: bytes) -> None:
+        # Runs in a worker thread: hashing and disk I/O both stay off the event loop
+        self._sha256.update(chunk)
+        self._file.write(chunk)
+
+    async def _flush(self) -> None:
+        if self._buffer:
+            chunk = bytes(self._buffer)
+            self._buffer.clear()
+            await anyio.to_thread.run_sync(self._write_chunk, chunk)
+
+    async def write(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise UploadError(413, "File too large")
+        if len(self.head) < SNIFF_BYTES:
+            self.head += data[:SNIFF_BYTES - len(self.head)]
+        self._buffer += data
+        if len(self._buffer) >= self.chunk_size:
+            await self._flush()
+
+    async def close(self) -> Tuple[int, str]:
+        await self._flush()
+        await anyio.to_thread.run_sync(self._file.close)
+        return self.size, self._sha256.hexdigest()
+
+    def _discard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    async def discard(self) -> None:
+        """Close and delete the partial file. Safe to call more than once."""
+        await anyio.to_thread.run_sync(self._discard)
+
+def sniff_content_type(head: bytes, extension: str) -> str:
+    """Content type from the file's leading bytes; rejects content that isn't what its extension claims."""
+    signature, content_type = FILE_SIGNATURES.get(extension, (b"", None))
+    # Some PDF producers put junk before the header; readers accept it within the first 1KB
+    found = signature in head if extension == ".pdf" else head.startswith(signature)
+    if content_type is None or not found:
+        raise UploadError(400, "File content does not match its type")
+    return content_type
+
+def check_content_length(request: Request, max_files: int) -> None:
+    # Reject obviously oversized bodies before reading a single byte
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        if int(content_length) > max_files * (settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD):
+            raise UploadError(413, "File too large")
+
+class FileJob:
+    """
+    One file of a multipart request. The request parser feeds its chunks into
+    a short queue and moves on; writing, hashing, sniffing and storing the file
+    happen in this job's task, overlapping with the files after it.
+    """
+
+    def __init__(self, part: PartStart, extension: str, user_id: Any, session_factory: async_sessionmaker):
+        self.part = part
+        self.extension = extension
+        self.user_id = user_id
+        self.session_factory = session_factory
+        self.writer = UploadWriter(os.path.join(INCOMING_DIR, f"{uuid.uuid4()}{extension}"), settings.MAX_FILE_SIZE)
+        self.chunks: asyncio.Queue = asyncio.Queue(maxsize=FILE_QUEUE_CHUNKS)
+        # Set as soon as the file is known to have failed, so the parser can stop early
+        self.error: Optional[Exception] = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def feed(self, data: Optional[bytes]) -> None:
+        """Queue a chunk (None ends the file) for the writer, without waiting on a job that has ended."""
+        if not self.chunks.full():
+            self.chunks.put_nowait(data)
+            return
+        put = asyncio.ensure_future(self.chunks.put(data))
+        await asyncio.wait({put, self.task}, return_when=asyncio.FIRST_COMPLETED)
+        put.cancel()
+
+    async def run(self) -> dict:
+        try:
+            while (data := await self.chunks.get()) is not None:
+                # After a failure keep draining, so the parser never blocks on a full queue
+                if self.error is None:
+                    try:
+                        await self.writer.write(data)
+                    except Exception as e:
+                        # Disk full, permissions, storage errors as well as rejections
+                        self.error = e
+            if self.error is not None:
+                raise self.error
+
+            file_size, sha256 = await self.writer.close()
+            content_type = sniff_content_type(self.writer.head, self.extension)
+            # A session of its own: jobs run concurrently and sessions can't be shared
+            async with self.session_factory() as db:
+                blob, created = await store_blob(
+                    db, self.writer.path, sha256, file_size, self.extension, content_type, self.user_id
+                )
+            return {**blob_info(blob), "filename": self.part.filename, "deduplicated": not created}
+        except BaseException:
+            await self.writer.discard()
+            raise
+
+async def receive_uploads(
+    request: Request,
+    field_name: str,
+    max_files: int,
+    user_id: Any,
+    collect_errors: bool = False,
+    session_factory: async_sessionmaker = AsyncSessionLocal
+) -> List[dict]:
+    """
+    Stream the files sent under `field_name` into content-addressed storage,
+    processing up to UPLOAD_CONCURRENCY files at once, as uploads of `user_id`.
+    Content we already have is not stored again; the result's `deduplicated`
+    flag says when the user had uploaded it before. Results are in the order
+    the files were sent.
+
+    With collect_errors, a rejected file (type, size, content) or one that
+    failed to store becomes an error entry and the rest of the request is still
+    processed; otherwise the first problem is raised. Other form fields are
+    ignored.
+    """
+    check_content_length(request, max_files)
+
+    # Each entry is a finished result (early rejections) or a running job
+    entries: List[Union[dict, FileJob]] = []
+    jobs: List[FileJob] = []
+    job: Optional[FileJob] = None
+    slots = asyncio.Semaphore(max(1, settings.UPLOAD_CONCURRENCY))
+
+    async def run_job(current: FileJob) -> dict:
+        try:
+            return await current.run()
+        finally:
+            slots.release()
+
+    try:
+        async for event in iter_multipart(request):
+            if isinstance(event, PartStart):
+                if event.filename is None or event.field_name != field_name:
+                    continue
+                if len(jobs) >= max_files:
+                    raise UploadError(400, "Too many files")
+
+                file_extension = os.path.splitext(event.filename)[1].lower()
+                if file_extension not in settings.ALLOWED_EXTENSIONS:
+                    if not collect_errors:
+                        raise UploadError(400, "File type not allowed")
+                    entries.append({"error": "File type not allowed", "filename": event.filename})
+                    continue
+
+                # Waiting for a slot pauses reading the request, which is the backpressure
+                await slots.acquire()
+                job = FileJob(event, file_extension, user_id, session_factory)
+                await job.writer.open()
+                job.task = asyncio.create_task(run_job(job))
+                jobs.append(job)
+                entries.append(job)
+
+            elif isinstance(event, PartData) and job is not None:
+                await job.feed(event.data)
+                if job.error is not None and not collect_errors:
+                    raise job.error
+
+            elif isinstance(event, PartEnd) and job is not None:
+                await job.feed(None)
+                job = None
+
+        # The body ended inside a file part (no closing boundary): that file's
+        # job would wait for its end marker forever
+        if job is not None:
+            raise UploadError(400, "Incomplete multipart body")
+
+        results: List[dict] = []
+        for entry in entries:
+            if isinstance(entry, dict):
+                results.append(entry)
+                continue
+            try:
+                results.append(await entry.task)
+            except UploadError as e:
+                if not collect_errors:
+                    raise
+                detail = f"File {entry.part.filename} too large" if e.status_code == 413 else e.detail
+                results.append({"error": detail, "filename": entry.part.filename})
+            except Exception as e:
+                if not collect_errors:
+                    raise
+                results.append({"error": f"Upload failed: {str(e)}", "filename": entry.part.filename})
+    except BaseException:
+        # Blobs already stored stay unreferenced until GC collects them
+        for pending in jobs:
+            pending.task.cancel()
+        await asyncio.gather(*(pending.task for pending in jobs), return_exceptions=True)
+        # A job cancelled before it started never ran its own cleanup; whatever
+        # cut the body off (disconnect, truncation, a rejected file), no partial
+        # file is left for GC to find
+        for pending in jobs:
+            await pending.writer.discard()
+        raise
+
+    return results
\ No newline at end of file
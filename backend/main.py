@@ -6,17 +6,41 @@ import uvicorn
 import os
 
 from app.core.config import get_settings
-from app.core.database import engine, Base
+from app.core.database import LAST_WRITE_HEADER, LastWriteMiddleware, engine, dispose_engines
+from app.core.migrations import verify_schema_version
+from app.api.auth.user_cache import listen_for_invalidations
+from app.core.revocation import start_revocation_sync
+from app.core.rate_limit import RateLimitMiddleware, create_bucket_store, load_rules
 from app.api.v1.api import api_router
 from app.api.auth.routes import auth_router
+from app.api.files import files_router
+from app.services.photo_derivatives import shutdown_image_pool
+from app.services.jobs import start_job_workers, stop_job_workers
 
 settings = get_settings()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
-    yield
+    stop_listener = None
+    revocation_sync = None
+    job_workers = []
+    try:
+        # Schema is created/migrated by scripts/init_db.py; startup only checks the revision
+        if settings.DB_SCHEMA_CHECK:
+            await verify_schema_version(engine)
+        stop_listener = await listen_for_invalidations(engine)
+        revocation_sync = await start_revocation_sync()
+        job_workers = start_job_workers(settings.JOB_WORKERS)
+        yield
+    finally:
+        # Jobs still running are returned to the queue for the next worker
+        await stop_job_workers(job_workers)
+        if revocation_sync:
+            revocation_sync.cancel()
+        if stop_listener:
+            await stop_listener()
+        shutdown_image_pool()
+        await dispose_engines()
 
 app = FastAPI(
     title="ValuerPro API",
@@ -25,6 +49,19 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Rate limits for expensive endpoints; registered before CORS so 429s still carry CORS headers
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        rules=load_rules(settings.RATE_LIMITS),
+        store=create_bucket_store(settings.RATE_LIMIT_BACKEND),
+        forwarded_header=settings.RATE_LIMIT_FORWARDED_HEADER,
+        trusted_proxies=settings.RATE_LIMIT_TRUSTED_PROXIES
+    )
+
+# Read-your-writes across workers when reads go to replicas
+app.add_middleware(LastWriteMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -32,6 +69,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[LAST_WRITE_HEADER],
 )
 
 # Trusted host middleware for production
@@ -44,6 +82,7 @@ if settings.ENVIRONMENT == "production":
 # Include routers
 app.include_router(auth_router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(api_router, prefix="/api/v1")
+app.include_router(files_router, prefix="/uploads", tags=["Files"])
 
 @app.get("/")
 async def root():
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Script to measure non-auth latency during a login storm
+Starts the API on a scratch SQLite database, then probes GET /health while
+a pool of clients hammers POST /api/v1/auth/login. Runs once with bcrypt on
+the event loop (PASSWORD_HASH_WORKERS=0, the old behaviour) and once with
+the hashing pool, and prints probe latency percentiles for both.
+
+Usage:
+    python scripts/benchmark_login_storm.py
+    python scripts/benchmark_login_storm.py --clients 50 --seconds 15 --workers 4
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from sqlalchemy import create_engine, insert
+
+EMAIL = "storm@example.com"
+PASSWORD = "storm-password"
+
+def create_database(path: str) -> None:
+    from app.core.database import Base
+    from app.core.security import get_password_hash
+    from app.models import User
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"email": EMAIL, "hashed_password": get_password_hash(PASSWORD)}])
+    engine.dispose()
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(database: str, workers: int) -> tuple:
+    port = free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{database}",
+        "DB_SCHEMA_CHECK": "false",
+        "ENVIRONMENT": "benchmark",
+        "PASSWORD_HASH_WORKERS": str(workers),
+        # Measure queueing, not rejection
+        "PASSWORD_HASH_MAX_PENDING": "100000",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=backend_dir, env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(f"{base_url}/health", timeout=1)
+            return server, base_url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("Server did not start")
+
+def probe(base_url: str, seconds: float) -> list:
+    latencies = []
+    session = requests.Session()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        session.get(f"{base_url}/health")
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.01)
+    return latencies
+
+def storm(base_url: str, clients: int, stop: threading.Event, results: dict) -> list:
+    def login():
+        session = requests.Session()
+        while not stop.is_set():
+            response = session.post(
+                f"{base_url}/api/v1/auth/login",
+                data={"username": EMAIL, "password": PASSWORD}
+            )
+            results[response.status_code] = results.get(response.status_code, 0) + 1
+
+    threads = [threading.Thread(target=login, daemon=True) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+def run(database: str, workers: int, clients: int, seconds: float) -> None:
+    server, base_url = start_server(database, workers)
+    try:
+        idle = probe(base_url, 2)
+        stop = threading.Event()
+        results = {}
+        threads = storm(base_url, clients, stop, results)
+        busy = probe(base_url, seconds)
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=30)
+    finally:
+        server.terminate()
+        server.wait()
+
+    label = "inline (event loop)" if workers <= 0 else f"pool ({workers} threads)"
+    print(f"\n{label}")
+    print(f"  logins: {sum(results.values())} in {seconds:.0f}s  status counts: {results}")
+    for name, samples in (("idle", idle), ("storm", busy)):
+        print(
+            f"  /health {name:<5}  n={len(samples):<5} p50 {percentile(samples, 0.5):8.1f} ms"
+            f"  p95 {percentile(samples, 0.95):8.1f} ms  p99 {percentile(samples, 0.99):8.1f} ms"
+            f"  max {max(samples) * 1000:8.1f} ms"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent login clients")
+    parser.add_argument("--seconds", type=float, default=10, help="Storm duration")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Hashing pool size")
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(), "login_storm.db")
+    create_database(database)
+    print(f"{args.clients} login clients for {args.seconds:.0f}s, probing GET /health")
+
+    run(database, 0, args.clients, args.seconds)
+    run(database, args.workers, args.clients, args.seconds)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
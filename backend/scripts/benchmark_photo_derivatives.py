@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Script to measure what photo derivatives save for grids and report rendering
+Uploads a set of synthetic 12MP phone photos (about 8MB each, half of them
+rotated through EXIF) to a scratch server, attaches them to a report and
+waits for the background workers to render their derivatives. Then compares
+loading a photo grid from the originals and from the thumbnails, and
+preparing report images from the originals and from the print copies.
+
+Usage:
+    python scripts/benchmark_photo_derivatives.py
+    python scripts/benchmark_photo_derivatives.py --photos 30 --workers 2
+"""
+
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import requests
+from PIL import Image
+
+from benchmark_uploads import login, start_server
+
+def synthetic_photos(count: int) -> list:
+    # Noise over a gradient compresses about like a detailed phone photo
+    width, height = 4032, 3024
+    noise = Image.merge("RGB", [Image.effect_noise((width, height), sigma) for sigma in (30, 40, 50)])
+    base = Image.blend(noise, Image.linear_gradient("L").resize((width, height)).convert("RGB"), 0.5)
+    photos = []
+    for i in range(count):
+        # A distinct corner per photo so deduplication doesn't collapse them
+        base.paste((i * 37 % 256, i * 91 % 256, i * 53 % 256), (0, 0, 64, 64))
+        exif = Image.Exif()
+        exif[0x0112] = 6 if i % 2 else 1  # Orientation: rotate 90 for portrait shots
+        buffer = io.BytesIO()
+        base.save(buffer, "JPEG", quality=95, exif=exif)
+        photos.append(buffer.getvalue())
+    return photos
+
+def fetch_all(base_url: str, urls: list, headers: dict) -> tuple:
+    start = time.perf_counter()
+    total = 0
+    for url in urls:
+        response = requests.get(f"{base_url}{url}", headers=headers)
+        response.raise_for_status()
+        total += len(response.content)
+    return time.perf_counter() - start, total
+
+def decode_all(base_url: str, urls: list, headers: dict, fit: int = 0) -> float:
+    """Download and decode each image, like a browser or the report renderer would."""
+    start = time.perf_counter()
+    for url in urls:
+        image = Image.open(io.BytesIO(requests.get(f"{base_url}{url}", headers=headers).content))
+        if fit:
+            image.thumbnail((fit, fit))
+        image.load()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--photos", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=min(2, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    print(f"Generating {args.photos} synthetic photos")
+    photos = synthetic_photos(args.photos)
+    print(f"  {sum(map(len, photos)) / len(photos) / 1024 / 1024:.1f}MB each, {os.cpu_count()} CPUs, IMAGE_WORKERS={args.workers}")
+
+    workdir = tempfile.mkdtemp()
+    server, base_url = start_server(workdir, IMAGE_WORKERS=str(args.workers))
+    try:
+        headers = login(base_url)
+        api = f"{base_url}/api/v1"
+        report = requests.post(f"{api}/reports/", json={"title": "Derivatives", "purpose": "mortgage"}, headers=headers).json()
+
+        start = time.perf_counter()
+        for i, photo in enumerate(photos):
+            uploaded = requests.post(
+                f"{api}/upload/single", files={"file": (f"IMG_{i:04d}.jpg", photo, "image/jpeg")}, headers=headers
+            ).json()
+            requests.post(f"{api}/photos/", json={
+                "report_id": report["id"], "file_url": uploaded["file_url"], "filename": f"IMG_{i:04d}.jpg",
+                "type": "exterior", "sequence_order": i
+            }, headers=headers).raise_for_status()
+        uploaded_at = time.perf_counter()
+
+        while True:
+            listed = requests.get(f"{api}/photos/", params={"report_id": report["id"]}, headers=headers).json()
+            if all(photo["derivatives"] for photo in listed):
+                break
+            if time.perf_counter() - uploaded_at > 60 + args.photos * 10:
+                raise RuntimeError("Derivatives were not rendered")
+            time.sleep(0.1)
+        rendered_at = time.perf_counter()
+        print(f"Upload and attach: {uploaded_at - start:.1f}s; derivatives ready {rendered_at - uploaded_at:.1f}s later "
+              f"({(rendered_at - start) / args.photos * 1000:.0f} ms per photo end to end)")
+
+        originals = [photo["file_url"] for photo in listed]
+        print("Photo grid (download and decode every image)")
+        for label, urls in (("originals", originals), ("thumbnails", [p["derivatives"]["thumb"] for p in listed])):
+            elapsed, total = fetch_all(base_url, urls, headers)
+            decoded = decode_all(base_url, urls, headers)
+            print(f"  {label:<11} {total / 1024:8.0f}KB  download {elapsed * 1000:6.0f} ms  with decode {decoded * 1000:6.0f} ms")
+
+        print("Report images (each photo at print size)")
+        print(f"  {'originals':<11} decode and downscale {decode_all(base_url, originals, headers, fit=2400) * 1000:6.0f} ms")
+        prints = [p["derivatives"]["print"] for p in listed]
+        print(f"  {'print':<11} decode              {decode_all(base_url, prints, headers) * 1000:6.0f} ms")
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Script to measure DOCX report throughput
+Builds a typical mortgage report in memory (a handful of comparables and
+title documents, photos with print derivatives on local storage, no
+database) and renders it repeatedly from the compiled bank template.
+Prints the one-off template compile time against the cached lookup and
+reports per second. Exits non-zero below --min-reports-per-second.
+
+Usage:
+    python scripts/benchmark_report_docx.py
+    python scripts/benchmark_report_docx.py --photos 12 --comparables 10 --seconds 10 --output /tmp/report.docx
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+sys.path.append(os.path.join(backend_dir, "scripts"))
+
+# Also moves into a scratch directory, where UPLOAD_DIR and DOCX_TEMPLATE_DIR resolve
+from benchmark_report_pdf import make_document, workdir
+
+from app.services import report_docx
+from app.services.report_docx import get_template, render_report_docx
+
+async def render(document, output: str = "") -> int:
+    size = 0
+    with open(output or os.devnull, "wb") as file:
+        async for chunk in render_report_docx(document):
+            size += len(chunk)
+            file.write(chunk)
+    return size
+
+async def run(document, seconds: float) -> tuple:
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        await render(document)
+        count += 1
+    return count, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--photos", type=int, default=12)
+    parser.add_argument("--comparables", type=int, default=10)
+    parser.add_argument("--legal-documents", type=int, default=3)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--min-reports-per-second", type=float, default=10.0)
+    parser.add_argument("--output", default="")
+    args = parser.parse_args()
+
+    try:
+        document = make_document(args.photos, args.comparables, args.legal_documents)
+
+        start = time.perf_counter()
+        report_docx._compiled_default.cache_clear()
+        get_template(document.report.bank_name)
+        compile_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(1000):
+            get_template(document.report.bank_name)
+        lookup_time = (time.perf_counter() - start) / 1000
+        print(f"template: compile {compile_time * 1000:.2f} ms once, cached lookup {lookup_time * 1000000:.1f} us")
+
+        size = asyncio.run(render(document, args.output))
+        count, elapsed = asyncio.run(run(document, args.seconds))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    rate = count / elapsed
+    print(f"{count} reports ({args.photos} photos, {size / 1024 / 1024:.1f}MB each) in {elapsed:.1f}s: "
+          f"{rate:.1f} reports/s, {elapsed / count * 1000:.0f} ms each on {os.cpu_count()} CPUs")
+    return 0 if rate >= args.min_reports_per_second else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Script to measure report PDF rendering time and memory
+Builds a large mortgage report in memory (comparables, title documents,
+assumptions and photos with print derivatives on local storage, no
+database) and renders it with the streaming PDF renderer. Prints time to
+the first byte, total time, page count, size and peak Python memory.
+Exits non-zero when the render exceeds --budget-seconds.
+
+Usage:
+    python scripts/benchmark_report_pdf.py
+    python scripts/benchmark_report_pdf.py --photos 30 --comparables 700 --output /tmp/report.pdf
+"""
+
+import argparse
+import asyncio
+import hashlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+# UPLOAD_DIR is relative; render from a scratch directory
+workdir = tempfile.mkdtemp()
+os.chdir(workdir)
+
+from PIL import Image
+
+from app.models import Applicant, Comparable, LegalAspect, Photo, Property, Report, Valuation, ValuerProfile
+from app.models.legal_aspect import DocumentType
+from app.models.photo import PhotoType
+from app.models.report import ReportPurpose
+from app.models.valuation import ValuationMethod
+from app.services.images import derivative_key, render_derivatives
+from app.services.report_documents import ReportDocument
+from app.services.report_pdf import render_report_pdf
+from app.services.storage import get_storage
+
+WORDS = "the land is flat and well drained with a motorable road frontage and all services available nearby".split()
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def make_photos(count: int) -> list:
+    """Photos whose print derivatives exist on local storage, as after upload."""
+    storage = get_storage()
+    source = os.path.join(workdir, "source.jpg")
+    noise = Image.merge("RGB", [Image.effect_noise((4032, 3024), sigma) for sigma in (30, 40, 50)])
+    noise.save(source, quality=90)
+    output = tempfile.mkdtemp(dir=workdir)
+    paths = render_derivatives(source, output)
+
+    photos = []
+    for i in range(count):
+        sha256 = hashlib.sha256(f"photo-{i}".encode()).hexdigest()
+        for name, path in paths.items():
+            destination = storage.path(derivative_key(sha256, name))
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.copyfile(path, destination)
+        photos.append(Photo(
+            file_url=f"/uploads/{sha256[:2]}/{sha256[2:4]}/{sha256}.jpg",
+            filename=f"IMG_{i:04d}.jpg",
+            caption=f"View {i + 1} of the property",
+            type=PhotoType.EXTERIOR if i % 3 else PhotoType.INTERIOR,
+            sequence_order=i,
+            derivatives={name: f"/uploads/{derivative_key(sha256, name)}" for name in paths},
+        ))
+    return photos
+
+def make_document(photos: int, comparables: int, legal_documents: int) -> ReportDocument:
+    rng = random.Random(1)
+    today = datetime(2026, 10, 1)
+    report = Report(
+        title="Valuation of land and building at Kandy Road, Kadawatha",
+        reference_number="VR/2026/0412",
+        purpose=ReportPurpose.MORTGAGE,
+        bank_name="Commercial Bank of Ceylon PLC",
+        bank_branch="Kadawatha",
+        inspection_date=today - timedelta(days=3),
+        valuation_date=today,
+        report_date=today,
+    )
+    report.applicants = [Applicant(name="A. B. Perera", address="12, Temple Road, Kadawatha", nic_number="198512345678", contact_numbers=["0771234567"])]
+    report.properties = [Property(
+        lot_number="2", plan_number="4521", plan_date=datetime(2015, 3, 2), surveyor_name="K. Silva, LS",
+        deed_numbers=["1234", "5678"], address="Kandy Road, Kadawatha", village="Kadawatha", gn_division="Kadawatha North",
+        district="Gampaha", province="Western", latitude=7.0012, longitude=79.9521, road_access=True,
+        directions_text=sentence(rng, 60), property_type="Residential", total_extent="20 perches", land_shape="Rectangular",
+        building_area=2400, building_structure="Brick and cement", year_built=2012, building_condition="Good",
+        depreciation_rate=12, electricity=True, water_supply=True, telephone=True,
+    )]
+    report.legal_aspects = [
+        LegalAspect(
+            document_type=DocumentType.DEED, document_number=f"{1000 + i}", document_date=today - timedelta(days=900 * i),
+            issuing_authority="Land Registry, Gampaha", current_owner="A. B. Perera", previous_owners=["C. D. Fernando"],
+            ownership_type="Freehold", ownership_percentage=100, title_clear=True, encumbrances=[], remarks=sentence(rng, 40),
+        )
+        for i in range(legal_documents)
+    ]
+    report.comparables = [
+        Comparable(
+            address=f"Lot {i}, {rng.choice(['Kandy Road', 'Temple Road', 'Station Road'])}, Kadawatha",
+            sale_date=today - timedelta(days=rng.randrange(30, 1500)), sale_price=rng.randrange(3, 30) * 1_000_000.0,
+            land_extent_perches=rng.randrange(8, 40), price_per_perch=rng.randrange(400, 1200) * 1000.0,
+            adjusted_price=rng.randrange(3, 30) * 1_000_000.0,
+        )
+        for i in range(comparables)
+    ]
+    report.valuations = [Valuation(
+        primary_method=ValuationMethod.COMPARATIVE, secondary_methods=["cost"], methodology_explanation=sentence(rng, 200),
+        land_rate_per_perch=850000, land_extent_perches=20, building_rate_per_sqft=6500, building_area=2400,
+        building_value_before_depreciation=15_600_000, depreciation_percentage=12, building_value_after_depreciation=13_728_000,
+        total_market_value=30_728_000, forced_sale_value=24_500_000, insurance_value=16_000_000,
+        market_trend_analysis=sentence(rng, 300),
+        assumptions=[sentence(rng, 25) for _ in range(15)], limitations=[sentence(rng, 25) for _ in range(15)],
+        risk_factors=[sentence(rng, 25) for _ in range(10)],
+    )]
+    report.photos = make_photos(photos)
+    valuer = ValuerProfile(
+        title="Mr.", full_name="S. Jayawardena", qualifications=["BSc (Estate Management)", "FIV (Sri Lanka)"],
+        email="valuer@example.com", registration_number="IVSL/0123",
+    )
+    return ReportDocument(report, valuer)
+
+async def render(document: ReportDocument, output: str) -> tuple:
+    size = 0
+    first_byte = None
+    start = time.perf_counter()
+    with open(output, "wb") as file:
+        async for chunk in render_report_pdf(document):
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(chunk)
+            file.write(chunk)
+    return first_byte, time.perf_counter() - start, size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--photos", type=int, default=30)
+    parser.add_argument("--comparables", type=int, default=700)
+    parser.add_argument("--legal-documents", type=int, default=12)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--budget-seconds", type=float, default=2.0)
+    parser.add_argument("--output", default="")
+    args = parser.parse_args()
+
+    try:
+        document = make_document(args.photos, args.comparables, args.legal_documents)
+        output = args.output or os.path.join(workdir, "report.pdf")
+        timings = []
+        for round_number in range(args.rounds):
+            tracemalloc.start()
+            first_byte, elapsed, size = asyncio.run(render(document, output))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            timings.append(elapsed)
+            with open(output, "rb") as file:
+                pages = file.read().count(b"/Type /Page ")
+            print(f"  round {round_number + 1}: {pages} pages, {size / 1024 / 1024:.1f}MB, first byte {first_byte * 1000:.0f} ms, "
+                  f"total {elapsed * 1000:.0f} ms, peak Python memory {peak / 1024 / 1024:.1f}MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    best = min(timings)
+    print(f"best {best * 1000:.0f} ms on {os.cpu_count()} CPUs (budget {args.budget_seconds:g}s)")
+    return 0 if best <= args.budget_seconds else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Script to measure API cold start time
+Each run starts a fresh interpreter, imports the app and enters its lifespan,
+timing the import and the startup phase separately. For comparison it also
+times the old boot path (metadata.create_all against an existing schema).
+
+Usage:
+    python scripts/benchmark_startup.py                   # uses DATABASE_URL
+    python scripts/benchmark_startup.py --runs 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a child interpreter so every measurement is a true cold start
+CHILD = """
+import asyncio, json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def boot():
+    if {create_all!r}:
+        from app.core.database import Base, engine
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await engine.dispose()
+    else:
+        async with main.lifespan(main.app):
+            pass
+
+asyncio.run(boot())
+done = time.perf_counter()
+print(json.dumps({{"import": imported - start, "startup": done - imported}}))
+"""
+
+def run(create_all: bool) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(create_all=create_all)],
+        cwd=backend_dir, capture_output=True, text=True,
+        env={**os.environ, "ENVIRONMENT": "benchmark"}
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def summarize(label: str, samples: list) -> None:
+    for phase in ("import", "startup"):
+        values = sorted(sample[phase] * 1000 for sample in samples)
+        print(
+            f"{label:<22} {phase:<8} median {statistics.median(values):8.1f} ms"
+            f"   min {values[0]:8.1f} ms   max {values[-1]:8.1f} ms"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    try:
+        check = [run(create_all=False) for _ in range(args.runs)]
+        create_all = [run(create_all=True) for _ in range(args.runs)]
+    except RuntimeError as e:
+        print(f"Startup failed: {e}")
+        print("Run `python scripts/init_db.py` against the database first.")
+        return 1
+
+    print(f"{args.runs} cold starts each\n")
+    summarize("revision check", check)
+    summarize("create_all (old)", create_all)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Script to measure a multi-file upload batch at different concurrency levels
+Posts an inspection batch of photos to /api/v1/upload/multiple against a
+scratch server, once per UPLOAD_CONCURRENCY value, and prints the median
+wall-clock time per batch. Every round uses fresh content so deduplication
+doesn't short-circuit the work.
+
+Usage:
+    python scripts/benchmark_upload_batch.py
+    python scripts/benchmark_upload_batch.py --files 10 --size-mb 4 --concurrency 1 4
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmark_uploads import login, start_server
+
+def run(concurrency: int, files: int, size: int, rounds: int) -> list:
+    workdir = tempfile.mkdtemp()
+    server, base_url = start_server(workdir, UPLOAD_CONCURRENCY=str(concurrency))
+    try:
+        headers = login(base_url)
+        timings = []
+        for _ in range(rounds):
+            photos = [
+                ("files", (f"photo-{i}.jpg", b"\xff\xd8\xff\xe0" + os.urandom(size), "image/jpeg"))
+                for i in range(files)
+            ]
+            start = time.perf_counter()
+            response = requests.post(f"{base_url}/api/v1/upload/multiple", files=photos, headers=headers)
+            timings.append(time.perf_counter() - start)
+            response.raise_for_status()
+            assert all("file_url" in result for result in response.json()), response.json()
+        return timings
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--size-mb", type=float, default=4)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    size = int(args.size_mb * 1024 * 1024)
+    print(f"{args.files} x {args.size_mb:g}MB photos per batch, {args.rounds} rounds, {os.cpu_count()} CPUs")
+    for concurrency in args.concurrency:
+        timings = run(concurrency, args.files, size, args.rounds)
+        print(f"  UPLOAD_CONCURRENCY={concurrency}: median {statistics.median(timings) * 1000:7.0f} ms  best {min(timings) * 1000:7.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Script to measure server memory while receiving concurrent uploads
+Starts the API on a scratch SQLite database and posts concurrent ~10MB PDFs
+to /api/v1/upload/single, then reports the server's peak RSS before and
+after. Linux only (reads VmHWM from /proc).
+
+Usage:
+    python scripts/benchmark_uploads.py
+    python scripts/benchmark_uploads.py --concurrency 10 --rounds 3
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from sqlalchemy import create_engine
+
+EMAIL = "uploads@example.com"
+PASSWORD = "uploads-password"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def start_server(workdir: str, **extra_env: str) -> tuple:
+    from app.core.database import Base
+    import app.models  # registers the tables on Base.metadata
+
+    database = os.path.join(workdir, "uploads.db")
+    engine = create_engine(f"sqlite:///{database}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    port = free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{database}",
+        "DB_SCHEMA_CHECK": "false",
+        "ENVIRONMENT": "benchmark",
+        "RATE_LIMIT_ENABLED": "false",
+        "PYTHONPATH": backend_dir,
+        **extra_env,
+    }
+    # Run from the scratch directory so UPLOAD_DIR (relative) lands there
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(f"{base_url}/health", timeout=1)
+            return server, base_url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("Server did not start")
+
+def login(base_url: str) -> dict:
+    requests.post(f"{base_url}/api/v1/auth/register", json={"email": EMAIL, "password": PASSWORD, "full_name": "Bench"})
+    token = requests.post(
+        f"{base_url}/api/v1/auth/login", data={"username": EMAIL, "password": PASSWORD}
+    ).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--size-mb", type=float, default=9.9)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    server, base_url = start_server(workdir)
+    try:
+        headers = login(base_url)
+        payload = b"%PDF-1.4\n" + os.urandom(int(args.size_mb * 1024 * 1024))
+
+        def upload(i: int) -> int:
+            response = requests.post(
+                f"{base_url}/api/v1/upload/single",
+                files={"file": (f"survey-plan-{i}.pdf", payload, "application/pdf")},
+                headers=headers
+            )
+            return response.status_code
+
+        baseline = peak_rss_mb(server.pid)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            statuses = list(pool.map(upload, range(args.concurrency * args.rounds)))
+        elapsed = time.perf_counter() - start
+        peak = peak_rss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    total_mb = len(statuses) * len(payload) / 1024 / 1024
+    print(f"{len(statuses)} uploads of {args.size_mb}MB, {args.concurrency} at a time: {elapsed:.1f}s ({total_mb / elapsed:.0f} MB/s)")
+    print(f"status codes: {sorted(set(statuses))}")
+    print(f"server peak RSS: {baseline:.0f} MB before, {peak:.0f} MB after (+{peak - baseline:.0f} MB)")
+    return 0 if set(statuses) == {200} else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
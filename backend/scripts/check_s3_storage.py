@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Script to check the S3 storage backend end to end
+Runs the API with STORAGE_BACKEND=s3 against an S3-compatible endpoint and
+exercises streamed uploads (multipart to the bucket), deduplication,
+presigned direct uploads with checksum enforcement, presigned downloads and
+garbage collection. Without --endpoint-url an in-process moto server is
+used (pip install "moto[server]").
+
+Usage:
+    python scripts/check_s3_storage.py
+    python scripts/check_s3_storage.py --endpoint-url http://localhost:9000 --bucket valuerpro-test \\
+        --access-key minioadmin --secret-key minioadmin
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import boto3
+import requests
+
+from benchmark_uploads import login, start_server
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def check(label: str, condition: bool) -> bool:
+    print(f"  {'ok  ' if condition else 'FAIL'} {label}")
+    return condition
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--endpoint-url", default="")
+    parser.add_argument("--bucket", default="valuerpro-check")
+    parser.add_argument("--access-key", default="testing")
+    parser.add_argument("--secret-key", default="testing")
+    args = parser.parse_args()
+
+    moto_server = None
+    endpoint_url = args.endpoint_url
+    if not endpoint_url:
+        from moto.server import ThreadedMotoServer
+
+        moto_server = ThreadedMotoServer(port=0)
+        moto_server.start()
+        host, port = moto_server.get_host_and_port()
+        endpoint_url = f"http://{host}:{port}"
+
+    s3 = boto3.client(
+        "s3", endpoint_url=endpoint_url, region_name="us-east-1",
+        aws_access_key_id=args.access_key, aws_secret_access_key=args.secret_key
+    )
+    s3.create_bucket(Bucket=args.bucket)
+    storage_env = {
+        "STORAGE_BACKEND": "s3",
+        "AWS_S3_BUCKET": args.bucket,
+        "AWS_S3_ENDPOINT_URL": endpoint_url,
+        "AWS_REGION": "us-east-1",
+        "AWS_ACCESS_KEY_ID": args.access_key,
+        "AWS_SECRET_ACCESS_KEY": args.secret_key,
+        "S3_MULTIPART_CHUNK_SIZE": str(5 * 1024 * 1024),
+    }
+
+    workdir = tempfile.mkdtemp()
+    server, base_url = start_server(workdir, **storage_env)
+    results = []
+    try:
+        headers = login(base_url)
+        api = f"{base_url}/api/v1/upload"
+
+        print("streamed upload")
+        document = b"%PDF-1.4\n" + os.urandom(9 * 1024 * 1024)
+        sha = hashlib.sha256(document).hexdigest()
+        first = requests.post(f"{api}/single", files={"file": ("deed.pdf", document, "application/pdf")}, headers=headers).json()
+        key = first["file_url"].removeprefix("/uploads/")
+        head = s3.head_object(Bucket=args.bucket, Key=key)
+        results.append(check("stored in the bucket under its hash", first["sha256"] == sha and head["ContentLength"] == len(document)))
+        results.append(check("sent as a multipart upload", "-" in head["ETag"]))
+        results.append(check("nothing kept on local disk", not os.path.exists(os.path.join(workdir, "uploads", key))))
+        again = requests.post(f"{api}/single", files={"file": ("copy.pdf", document, "application/pdf")}, headers=headers).json()
+        results.append(check("duplicate upload deduplicated", again["deduplicated"] and again["file_url"] == first["file_url"]))
+
+        print("presigned download")
+        link = requests.get(f"{api}/blobs/{sha}/download", params={"filename": "deed.pdf"}, headers=headers).json()
+        downloaded = requests.get(link["url"])
+        results.append(check("bytes come straight from the bucket", link["presigned"] and downloaded.content == document))
+
+        print("direct upload")
+        scan = b"\xff\xd8\xff\xe0" + os.urandom(2 * 1024 * 1024)
+        scan_sha = hashlib.sha256(scan).hexdigest()
+        body = {"filename": "scan.jpg", "size": len(scan), "sha256": scan_sha, "content_type": "image/jpeg"}
+        start = requests.post(f"{api}/direct", json=body, headers=headers).json()
+        # Real S3 and MinIO refuse the PUT; stand-ins that accept it are caught at completion
+        requests.put(start["upload"]["url"], data=scan[:-1] + b"\x00", headers=start["upload"]["headers"])
+        rejected = requests.post(f"{api}/direct/complete", json={"filename": "scan.jpg", "sha256": scan_sha}, headers=headers)
+        results.append(check("content that doesn't match the hash is refused", rejected.status_code in (404, 422)))
+        put = requests.put(start["upload"]["url"], data=scan, headers=start["upload"]["headers"])
+        results.append(check("presigned PUT accepted", put.status_code == 200))
+        done = requests.post(f"{api}/direct/complete", json={"filename": "scan.jpg", "sha256": scan_sha}, headers=headers).json()
+        results.append(check("completed upload recorded", done.get("sha256") == scan_sha and done.get("file_type") == "image/jpeg"))
+        repeat = requests.post(f"{api}/direct", json=body, headers=headers).json()
+        results.append(check("known content needs no upload", repeat["deduplicated"] and repeat["upload"] is None))
+
+        print("garbage collection")
+        gc = subprocess.run(
+            [sys.executable, os.path.join(backend_dir, "scripts", "gc_uploads.py"), "--grace-hours", "0"],
+            cwd=workdir, env={**os.environ, **storage_env, "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'uploads.db')}"},
+            capture_output=True, text=True
+        )
+        remaining = s3.list_objects_v2(Bucket=args.bucket).get("KeyCount", 0)
+        results.append(check("unreferenced objects removed from the bucket", gc.returncode == 0 and remaining == 0))
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+        if moto_server:
+            moto_server.stop()
+
+    print(f"{sum(results)}/{len(results)} checks passed")
+    return 0 if all(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Script to garbage-collect unreferenced uploads
+Deletes stored blobs that no photo or report references and that have not
+been uploaded or referenced within the grace period, along with abandoned
+partial uploads, expired resumable upload sessions and direct uploads that
+were never completed. Safe to run while the API is serving; schedule it
+daily.
+
+Usage:
+    python scripts/gc_uploads.py
+    python scripts/gc_uploads.py --dry-run
+    python scripts/gc_uploads.py --recount --grace-hours 48
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, dispose_engines
+from app.services.blob_store import collect_garbage, recount_references
+from app.services.direct_uploads import expire_direct_uploads
+from app.services.upload_sessions import expire_sessions
+
+async def run(args) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            if args.recount:
+                counts = await recount_references(db)
+                print(f"Recounted references: {len(counts)} blobs in use")
+            expired = [] if args.dry_run else await expire_sessions(db)
+            expired_direct = [] if args.dry_run else await expire_direct_uploads(db)
+            removed = await collect_garbage(db, timedelta(hours=args.grace_hours), dry_run=args.dry_run)
+    finally:
+        await dispose_engines()
+
+    if not args.dry_run:
+        print(f"{len(expired)} expired upload sessions removed")
+        print(f"{len(expired_direct)} uncompleted direct uploads removed")
+    for url in removed:
+        print(f"{'Would remove' if args.dry_run else 'Removed'} {url}")
+    print(f"{len(removed)} unreferenced blobs {'found' if args.dry_run else 'removed'}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--grace-hours", type=float, default=get_settings().UPLOAD_GC_GRACE_HOURS)
+    parser.add_argument("--dry-run", action="store_true", help="List what would be removed")
+    parser.add_argument("--recount", action="store_true", help="Rebuild reference counts from photos and reports first")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Script to render missing photo derivatives
+New photos get their thumbnail, medium and print copies in the background
+when they are created; this fills them in for photos that predate that or
+whose rendering failed. Safe to re-run.
+
+Usage:
+    python scripts/generate_photo_derivatives.py
+    python scripts/generate_photo_derivatives.py --limit 500
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, dispose_engines
+from app.models.photo import Photo
+from app.services.photo_derivatives import generate_derivatives, has_derivatives, shutdown_image_pool
+
+async def run(args) -> int:
+    try:
+        async with AsyncSessionLocal() as db:
+            query = select(Photo.file_url).where(Photo.derivatives.is_(None)).distinct()
+            if args.limit:
+                query = query.limit(args.limit)
+            file_urls = [url for (url,) in await db.execute(query) if has_derivatives(url)]
+        print(f"{len(file_urls)} photos without derivatives")
+
+        # One in flight per worker process keeps them all busy without piling up temp files
+        semaphore = asyncio.Semaphore(max(get_settings().IMAGE_WORKERS, 1))
+        failures = 0
+
+        async def render(file_url: str) -> None:
+            nonlocal failures
+            async with semaphore:
+                try:
+                    await generate_derivatives(file_url)
+                    print(f"Rendered {file_url}")
+                except Exception as e:
+                    failures += 1
+                    print(f"Failed {file_url}: {e}")
+
+        await asyncio.gather(*(render(url) for url in file_urls))
+        return failures
+    finally:
+        shutdown_image_pool()
+        await dispose_engines()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many distinct files")
+    args = parser.parse_args()
+    return 1 if asyncio.run(run(args)) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Script to create or migrate the database schema
+Run once per deploy (not from every app instance) before starting the server.
+
+- Fresh database: creates all tables from the models and stamps the head revision
+- Database managed by alembic: upgrades to the head revision
+- Database created by older releases (tables but no alembic_version): runs all migrations
+
+Usage:
+    python scripts/init_db.py
+    python scripts/init_db.py --check      # exit 1 if the schema is not at head
+"""
+
+import argparse
+import os
+import sys
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect
+
+from app.core.config import get_settings
+from app.core.database import Base, normalize_database_url
+from app.core.migrations import get_head_revisions
+from app.models import *
+
+def get_alembic_config() -> Config:
+    config = Config(os.path.join(backend_dir, "alembic.ini"))
+    # alembic.ini's script_location is relative to the backend directory
+    config.set_main_option("script_location", os.path.join(backend_dir, "alembic"))
+    return config
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="Only report whether the schema is at head")
+    args = parser.parse_args()
+
+    database_url = normalize_database_url(get_settings().DATABASE_URL)
+    engine = create_engine(database_url)
+    try:
+        tables = set(inspect(engine).get_table_names())
+        current = set()
+        if "alembic_version" in tables:
+            with engine.connect() as conn:
+                current = set(conn.exec_driver_sql("SELECT version_num FROM alembic_version").scalars().all())
+    finally:
+        engine.dispose()
+
+    heads = set(get_head_revisions())
+    print(f"Current revision: {', '.join(sorted(current)) or 'none'}")
+    print(f"Head revision:    {', '.join(sorted(heads))}")
+
+    if args.check:
+        return 0 if current == heads else 1
+    if current == heads:
+        print("Database schema is up to date")
+        return 0
+
+    config = get_alembic_config()
+    if not tables & set(Base.metadata.tables):
+        print("Creating tables...")
+        engine = create_engine(database_url)
+        try:
+            Base.metadata.create_all(engine)
+        finally:
+            engine.dispose()
+        command.stamp(config, "head")
+    else:
+        print("Applying migrations...")
+        command.upgrade(config, "head")
+
+    print("Database schema is up to date")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Script to run background job workers outside the API
+Report generation runs in workers that take jobs from the jobs table. The
+API starts JOB_WORKERS of them in each process; set JOB_WORKERS=0 there and
+run this (e.g. as a systemd service) to keep rendering off the API's event
+loop. Stops on SIGINT/SIGTERM, handing running jobs back to the queue.
+
+Usage:
+    python scripts/run_job_worker.py
+    python scripts/run_job_worker.py --workers 2
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import dispose_engines
+from app.services.jobs import start_job_workers, stop_job_workers
+from app.services.photo_derivatives import shutdown_image_pool
+
+async def run(workers: int) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stop.set)
+
+    tasks = start_job_workers(workers)
+    print(f"{workers} job workers running")
+    try:
+        await stop.wait()
+    finally:
+        await stop_job_workers(tasks)
+        shutdown_image_pool()
+        await dispose_engines()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=1, help="Jobs run at the same time by this process")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(run(args.workers))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Script to exercise resumable uploads over a connection that keeps dropping
+Starts the API on a scratch SQLite database, then uploads a large file in
+chunks through /api/v1/upload/sessions. A share of the chunk requests are cut
+off partway through (the socket is closed mid-body); the client asks the
+server for its offset and resumes from there. Exits non-zero unless the
+stored file's SHA-256 matches the original.
+
+Usage:
+    python scripts/simulate_resumable_upload.py
+    python scripts/simulate_resumable_upload.py --size-mb 50 --chunk-mb 4 --drop-rate 0.5
+"""
+
+import argparse
+import hashlib
+import http.client
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from sqlalchemy import create_engine
+
+EMAIL = "resumable@example.com"
+PASSWORD = "resumable-password"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(workdir: str) -> tuple:
+    from app.core.database import Base
+    import app.models  # registers the tables on Base.metadata
+
+    database = os.path.join(workdir, "resumable.db")
+    engine = create_engine(f"sqlite:///{database}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    port = free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{database}",
+        "DB_SCHEMA_CHECK": "false",
+        "ENVIRONMENT": "benchmark",
+        "RATE_LIMIT_ENABLED": "false",
+        "PYTHONPATH": backend_dir,
+    }
+    # Run from the scratch directory so UPLOAD_DIR (relative) lands there
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env
+    )
+    for _ in range(100):
+        try:
+            requests.get(f"http://127.0.0.1:{port}/health", timeout=1)
+            return server, port
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("Server did not start")
+
+def dropped_put(port: int, path: str, headers: dict, body: bytes, sent: int) -> None:
+    """Send the headers and only `sent` bytes of the body, then kill the connection."""
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.putrequest("PUT", path)
+    for name, value in {**headers, "Content-Length": str(len(body))}.items():
+        conn.putheader(name, value)
+    conn.endheaders()
+    conn.send(body[:sent])
+    # Let what was sent reach the server; an RST discards data it hasn't read yet
+    time.sleep(0.1)
+    # RST rather than FIN, like a phone losing signal
+    conn.sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, b"\x01\x00\x00\x00\x00\x00\x00\x00")
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=30)
+    parser.add_argument("--chunk-mb", type=float, default=2)
+    parser.add_argument("--drop-rate", type=float, default=0.4, help="Share of chunk requests cut off (below 1)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    payload = b"%PDF-1.4\n" + rng.randbytes(int(args.size_mb * 1024 * 1024))
+    chunk_size = int(args.chunk_mb * 1024 * 1024)
+
+    workdir = tempfile.mkdtemp()
+    server, port = start_server(workdir)
+    base_url = f"http://127.0.0.1:{port}/api/v1"
+    try:
+        requests.post(f"{base_url}/auth/register", json={"email": EMAIL, "password": PASSWORD, "full_name": "Field Valuer"})
+        token = requests.post(
+            f"{base_url}/auth/login", data={"username": EMAIL, "password": PASSWORD}
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        session = requests.post(
+            f"{base_url}/upload/sessions",
+            json={"filename": "scanned-deed.pdf", "size": len(payload), "content_type": "application/pdf"},
+            headers=headers
+        ).json()
+        path = f"/api/v1/upload/sessions/{session['id']}"
+
+        drops = requests_sent = 0
+        offset = 0
+        start = time.perf_counter()
+        while offset < len(payload):
+            body = payload[offset:offset + chunk_size]
+            chunk_headers = {
+                **headers,
+                "Content-Type": "application/octet-stream",
+                "Content-Range": f"bytes {offset}-{offset + len(body) - 1}/{len(payload)}",
+            }
+            requests_sent += 1
+            if rng.random() < args.drop_rate:
+                drops += 1
+                dropped_put(port, path, chunk_headers, body, rng.randrange(len(body)))
+                # After a drop the client doesn't know what arrived; ask the server
+                time.sleep(0.05)
+                offset = requests.get(f"http://127.0.0.1:{port}{path}", headers=headers).json()["received"]
+                continue
+            response = requests.put(f"http://127.0.0.1:{port}{path}", data=body, headers=chunk_headers)
+            response.raise_for_status()
+            offset = response.json()["received"]
+
+        result = requests.post(f"http://127.0.0.1:{port}{path}/complete", headers=headers).json()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    expected = hashlib.sha256(payload).hexdigest()
+    print(f"{args.size_mb:.0f}MB in {args.chunk_mb:g}MB chunks: {requests_sent} chunk requests, {drops} dropped mid-body, {elapsed:.1f}s")
+    print(f"stored as {result.get('file_url')}")
+    print(f"sha256 {'matches' if result.get('sha256') == expected else 'MISMATCH'}")
+    return 0 if result.get("sha256") == expected else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
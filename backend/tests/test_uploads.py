@@ -0,0 +1,98 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    # Settings and engines are built at import, so point them at a scratch
+    # database and upload directory before the app is imported
+    workdir = tmp_path_factory.mktemp("uploads")
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{workdir / 'test.db'}",
+        "DB_SCHEMA_CHECK": "false",
+        "ENVIRONMENT": "test",
+        "RATE_LIMIT_ENABLED": "false",
+        "JOB_WORKERS": "0",
+    })
+    cwd = os.getcwd()
+    os.chdir(workdir)
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+
+    import app.models  # noqa: F401
+    from app.core.database import Base
+    from main import app
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    with TestClient(app) as client:
+        client.post("/api/v1/auth/register", json={
+            "email": "valuer@example.com", "password": "password123", "full_name": "Valuer"
+        })
+        token = client.post("/api/v1/auth/login", data={
+            "username": "valuer@example.com", "password": "password123"
+        }).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        yield client
+    os.chdir(cwd)
+
+def test_truncated_multipart_body_is_rejected(client):
+    from app.services.blob_store import INCOMING_DIR
+
+    boundary = "truncatedboundary"
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="deed.pdf"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + b"%PDF-" + os.urandom(64 * 1024)
+    # No closing --boundary--: the file part never ends
+
+    response = client.post(
+        "/api/v1/upload/single",
+        content=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        timeout=10,
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Incomplete multipart body"
+    assert os.listdir(INCOMING_DIR) == []
+
+def test_client_disconnect_mid_file_leaves_no_partial_file(client):
+    import asyncio
+
+    from starlette.requests import ClientDisconnect, Request
+
+    from app.services.blob_store import INCOMING_DIR
+    from app.services.uploads import receive_uploads
+
+    boundary = "disconnectboundary"
+    head = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="plan.pdf"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + b"%PDF-" + os.urandom(2 * 1024 * 1024)
+    messages = [
+        {"type": "http.request", "body": head, "more_body": True},
+        {"type": "http.disconnect"},
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    request = Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/api/v1/upload/single",
+        "headers": [(b"content-type", f"multipart/form-data; boundary={boundary}".encode())],
+    }, receive)
+
+    with pytest.raises(ClientDisconnect):
+        asyncio.run(receive_uploads(request, "file", max_files=1, user_id=None))
+    assert os.listdir(INCOMING_DIR) == []
@@ -5,8 +5,9 @@ import {
   RegisterRequest, 
   User,
   Report,
+  FullReport,
   CreateReportRequest,
-  PaginatedResponse,
+  CursorPaginatedResponse,
   Applicant,
   Property,
   Valuation,
@@ -18,12 +19,16 @@ import {
   GeocodeResult,
   DirectionsResult,
   ValuerProfile,
-  UploadResponse
+  UploadResponse,
+  Job
 } from '@/types'
 
 class ApiClient {
   private client: AxiosInstance
   private token: string | null = null
+  private refreshing: Promise<string | null> | null = null
+  // Time of our latest write as reported by the API; echoed back so reads after it skip lagging replicas
+  private lastWrite: number | null = null
 
   constructor() {
     this.client = axios.create({
@@ -41,6 +46,9 @@ class ApiClient {
         if (token) {
           config.headers.Authorization = `Bearer ${token}`
         }
+        if (this.lastWrite !== null) {
+          config.headers['X-Last-Write'] = String(this.lastWrite)
+        }
         return config
       },
       (error) => Promise.reject(error)
@@ -48,8 +56,24 @@ class ApiClient {
 
     // Response interceptor for error handling
     this.client.interceptors.response.use(
-      (response) => response,
+      (response) => {
+        const lastWrite = Number(response.headers['x-last-write'])
+        if (lastWrite && lastWrite > (this.lastWrite ?? 0)) {
+          this.lastWrite = lastWrite
+        }
+        return response
+      },
       async (error) => {
+        const original = error.config
+        // Access tokens are short-lived: rotate the refresh token once and replay the request
+        if (error.response?.status === 401 && original && !original._retried && !['/auth/login', '/auth/refresh'].includes(original.url)) {
+          original._retried = true
+          const token = await this.refreshAccessToken()
+          if (token) {
+            original.headers.Authorization = `Bearer ${token}`
+            return this.client(original)
+          }
+        }
         if (error.response?.status === 401) {
           this.clearToken()
           if (typeof window !== 'undefined') {
@@ -76,10 +100,38 @@ class ApiClient {
   private clearToken(): void {
     if (typeof window !== 'undefined') {
       localStorage.removeItem('access_token')
+      localStorage.removeItem('refresh_token')
     }
     this.token = null
   }
 
+  private setTokens(auth: AuthResponse): void {
+    this.setToken(auth.access_token)
+    if (typeof window !== 'undefined' && auth.refresh_token) {
+      localStorage.setItem('refresh_token', auth.refresh_token)
+    }
+  }
+
+  private refreshAccessToken(): Promise<string | null> {
+    // Share one in-flight refresh: a refresh token is single-use, and replaying it revokes the session
+    if (!this.refreshing) {
+      const refreshToken = typeof window !== 'undefined' ? localStorage.getItem('refresh_token') : null
+      this.refreshing = (refreshToken
+        ? this.client
+            .post<AuthResponse>('/auth/refresh', { refresh_token: refreshToken })
+            .then((response) => {
+              this.setTokens(response.data)
+              return response.data.access_token
+            })
+            .catch(() => null)
+        : Promise.resolve(null)
+      ).finally(() => {
+        this.refreshing = null
+      })
+    }
+    return this.refreshing
+  }
+
   // Authentication
   async login(credentials: LoginRequest): Promise<AuthResponse> {
     const formData = new FormData()
@@ -97,7 +149,7 @@ class ApiClient {
     )
     
     if (response.data.access_token) {
-      this.setToken(response.data.access_token)
+      this.setTokens(response.data)
     }
     
     return response.data
@@ -124,9 +176,9 @@ class ApiClient {
   }
 
   // Reports
-  async getReports(page = 1, limit = 10, filters?: Record<string, any>): Promise<PaginatedResponse<Report>> {
-    const params = { page, limit, ...filters }
-    const response: AxiosResponse<PaginatedResponse<Report>> = await this.client.get('/api/v1/reports', { params })
+  async getReports(cursor?: string, limit = 10, filters?: Record<string, any>): Promise<CursorPaginatedResponse<Report>> {
+    const params = { cursor, limit, ...filters }
+    const response: AxiosResponse<CursorPaginatedResponse<Report>> = await this.client.get('/api/v1/reports', { params })
     return response.data
   }
 
@@ -135,6 +187,11 @@ class ApiClient {
     return response.data
   }
 
+  async getFullReport(id: string): Promise<FullReport> {
+    const response: AxiosResponse<FullReport> = await this.client.get(`/api/v1/reports/${id}/full`)
+    return response.data
+  }
+
   async createReport(data: CreateReportRequest): Promise<Report> {
     const response: AxiosResponse<Report> = await this.client.post('/api/v1/reports', data)
     return response.data
@@ -149,15 +206,37 @@ class ApiClient {
     await this.client.delete(`/api/v1/reports/${id}`)
   }
 
-  async generateReportPDF(id: string): Promise<Blob> {
-    const response = await this.client.post(`/api/v1/reports/${id}/generate-pdf`, {}, {
-      responseType: 'blob'
-    })
+  // Report files are rendered by a background job: queue it, follow it, then fetch the file
+  async generateReportPDF(id: string, onProgress?: (job: Job) => void): Promise<Blob> {
+    const response: AxiosResponse<Job> = await this.client.post(`/api/v1/reports/${id}/generate-pdf`)
+    return this.downloadJobResult(await this.waitForJob(response.data.id, onProgress))
+  }
+
+  async generateReportDOCX(id: string, onProgress?: (job: Job) => void): Promise<Blob> {
+    const response: AxiosResponse<Job> = await this.client.post(`/api/v1/reports/${id}/generate-docx`)
+    return this.downloadJobResult(await this.waitForJob(response.data.id, onProgress))
+  }
+
+  async getJob(id: string): Promise<Job> {
+    const response: AxiosResponse<Job> = await this.client.get(`/api/v1/jobs/${id}`)
     return response.data
   }
 
-  async generateReportDOCX(id: string): Promise<Blob> {
-    const response = await this.client.post(`/api/v1/reports/${id}/generate-docx`, {}, {
+  async waitForJob(id: string, onProgress?: (job: Job) => void, intervalMs = 1000): Promise<Job> {
+    // Polled rather than read from /jobs/{id}/events: EventSource can't send the bearer token
+    for (;;) {
+      const job = await this.getJob(id)
+      onProgress?.(job)
+      if (job.status === 'succeeded') return job
+      if (job.status === 'failed') throw new Error(job.error || 'Report generation failed')
+      await new Promise((resolve) => setTimeout(resolve, intervalMs))
+    }
+  }
+
+  private async downloadJobResult(job: Job): Promise<Blob> {
+    // The link is signed (or presigned for S3), so it's fetched without the Authorization header
+    const response = await axios.get(job.download_url!, {
+      baseURL: this.client.defaults.baseURL,
       responseType: 'blob'
     })
     return response.data
@@ -21,7 +21,9 @@ export interface RegisterRequest {
 
 export interface AuthResponse {
   access_token: string
+  refresh_token: string
   token_type: string
+  expires_in: number
   user: User
 }
 
@@ -223,6 +225,16 @@ export interface LegalAspect {
   updated_at: string
 }
 
+// Report with every related record, as returned by GET /reports/{id}/full
+export interface FullReport extends Report {
+  properties: Property[]
+  valuations: Valuation[]
+  comparables: Comparable[]
+  photos: Photo[]
+  legal_aspects: LegalAspect[]
+  applicants: Applicant[]
+}
+
 // Upload and Processing Types
 export interface UploadResponse {
   file_url: string
@@ -309,6 +321,38 @@ export interface PaginatedResponse<T> {
   pages: number
 }
 
+export interface CursorPaginatedResponse<T> {
+  items: T[]
+  next_cursor: string | null
+  limit: number
+  total: number | null
+  total_is_estimate: boolean
+}
+
+// Background job (report generation)
+export interface Job {
+  id: string
+  report_id?: string
+  kind: 'report_pdf' | 'report_docx'
+  status: 'queued' | 'running' | 'succeeded' | 'failed'
+  progress: number
+  message?: string
+  result?: {
+    file_url: string
+    file_size: number
+    file_type: string
+    sha256: string
+    filename: string
+  }
+  error?: string
+  attempts: number
+  max_attempts: number
+  created_at?: string
+  started_at?: string
+  finished_at?: string
+  download_url?: string
+}
+
 // Form Types
 export interface ReportFormData {
   title: string